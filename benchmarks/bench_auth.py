@@ -0,0 +1,52 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Benchmarks of the per-request overhead of checking the auth token.
+
+Every request made through a service accesses ``Service.session``, which
+checks the expiration of the token and sets the ``Authorization`` header.
+"""
+
+import base64
+import json
+import time
+
+from descarteslabs.client.auth import Auth
+from descarteslabs.client.services.service import Service
+
+from harness import benchmark
+
+
+def make_token(exp):
+    parts = [b"header", json.dumps({"exp": exp, "sub": "benchmark"}).encode("utf-8"), b"sig"]
+    return b".".join(base64.urlsafe_b64encode(part) for part in parts).decode("utf-8")
+
+
+def make_auth():
+    return Auth(jwt_token=make_token(time.time() + 3600), token_info_path=None, client_id="benchmark")
+
+
+@benchmark("auth.Auth.token")
+def bench_token():
+    auth = make_auth()
+    return lambda: auth.token
+
+
+@benchmark("auth.Service.session")
+def bench_session():
+    service = Service("https://example.com", auth=make_auth())
+    service.session
+    return lambda: service.session
@@ -0,0 +1,50 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmarks of boxing and accessing large metadata results as DotDicts.
+"""
+
+from descarteslabs.common.dotdict import DotDict, DotList
+
+from bench_json import metadata_feature
+from harness import benchmark
+
+
+def access(features):
+    total = 0.0
+    for feature in features:
+        total += feature.properties.cloud_fraction
+        total += feature.geometry.coordinates[0][0][0]
+    return total
+
+
+@benchmark("dotdict.box_and_access")
+def bench_box_and_access():
+    features = [metadata_feature(i) for i in range(10000)]
+    # boxed values are stored in the DotDict, so each call boxes copies
+    return lambda: access(DotList([dict(f) for f in features])), 10, "kfeatures"
+
+
+@benchmark("dotdict.access")
+def bench_access():
+    features = DotList([metadata_feature(i) for i in range(10000)])
+    access(features)
+    return lambda: access(features), 10, "kfeatures"
+
+
+@benchmark("dotdict.DotDict")
+def bench_dotdict():
+    features = [metadata_feature(i) for i in range(10000)]
+    return lambda: [DotDict(f) for f in features], 10, "kfeatures"
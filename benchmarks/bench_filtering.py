@@ -0,0 +1,36 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmarks of serializing property filters.
+"""
+
+from descarteslabs.common.property_filtering import GenericProperties
+from descarteslabs.common.property_filtering.filtering import AndExpression, OrExpression
+
+from harness import benchmark
+
+
+def expression(depth, p=GenericProperties()):
+    """A tree of alternating ands and ors of 4 branches, with 2 * 4 ** depth leaves"""
+    if depth == 0:
+        return AndExpression([p.cloud_fraction < 0.5, p.sat_id == "LANDSAT_8"])
+    parts = [expression(depth - 1) for _ in range(4)]
+    return OrExpression(parts) if depth % 2 else AndExpression(parts)
+
+
+@benchmark("filtering.Expression.serialize")
+def bench_serialize():
+    tree = expression(6)
+    return tree.serialize, 2 * 4 ** 6 / 1e3, "kleaves"
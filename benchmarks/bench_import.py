@@ -0,0 +1,48 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Benchmark of importing the package in a fresh interpreter.
+
+The time includes the start of the interpreter, which doesn't depend on
+the package but is small next to a regression of the import.
+"""
+
+import atexit
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import descarteslabs
+
+from harness import benchmark
+
+
+@benchmark("import.descarteslabs")
+def bench_import():
+    # the package is imported from the same location as in this process,
+    # with an empty home directory so no user configuration is read
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [os.path.dirname(os.path.dirname(os.path.abspath(descarteslabs.__file__)))]
+        + [path for path in [env.get("PYTHONPATH")] if path]
+    )
+    env["HOME"] = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, env["HOME"], True)
+    command = [sys.executable, "-c", "import descarteslabs"]
+
+    return lambda: subprocess.check_call(command, env=env)
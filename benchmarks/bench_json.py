@@ -0,0 +1,88 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Benchmarks of decoding a page of 1000 features from the Metadata service
+with each installed JSON backend (see
+:mod:`descarteslabs.client.services.service.codec`).
+"""
+
+import functools
+import importlib
+import json
+import random
+
+from descarteslabs.client.services.service import codec
+
+from harness import benchmark
+
+
+def metadata_feature(i):
+    lon, lat = random.uniform(-180, 179), random.uniform(-80, 79)
+    return {
+        "id": "landsat:LC08:PRE:TOAR:meta_LC80270312016188_v1_{}".format(i),
+        "type": "Feature",
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[
+                [lon, lat], [lon + 1, lat], [lon + 1, lat + 1], [lon, lat + 1], [lon, lat],
+            ]],
+        },
+        "properties": {
+            "acquired": "2016-07-06T16:59:42.753476Z",
+            "area": 35619.4,
+            "bits_per_pixel": [0.836, 1.767, 0.804],
+            "bright_fraction": 0.3294,
+            "bucket": "gs://descartes-l8/",
+            "cloud_fraction": 0.1865,
+            "cloud_fraction_0": 0.1242,
+            "cs_code": "EPSG:32615",
+            "descartes_version": "hedj-landsat-0.9.1",
+            "file_md5s": ["{:032x}".format(random.getrandbits(128)) for _ in range(3)],
+            "file_sizes": [random.randint(10 ** 7, 10 ** 8) for _ in range(3)],
+            "files": ["2016-07-06_027031_L8_432.jp2", "2016-07-06_027031_L8_567.jp2"],
+            "fill_fraction": 0.6495,
+            "geolocation_accuracy": 4.79,
+            "geotrans": [258292.5, 15.0, 0.0, 4743307.5, 0.0, -15.0],
+            "identifier": "LC80270312016188LGN00",
+            "processed": "2016-09-06T00:56:28.456346Z",
+            "product": "landsat:LC08:PRE:TOAR",
+            "proj4": "+proj=utm +zone=15 +datum=WGS84 +units=m +no_defs ",
+            "raster_size": [16000, 16000],
+            "reflectance_scale": [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+            "roll_angle": -0.001,
+            "sat_id": "LANDSAT_8",
+            "solar_azimuth_angle": 130.2,
+            "solar_elevation_angle": 63.8,
+            "sw_version": "LPGS_2.6.2",
+            "terrain_correction": "L1T",
+            "tile_id": "027031",
+        },
+    }
+
+
+def bench_loads(name):
+    page = json.dumps([metadata_feature(i) for i in range(1000)]).encode("utf-8")
+    # each backend is called directly, not to switch the backend of the process
+    loads = codec._CODECS[name][1]
+    return functools.partial(loads, page), len(page) / 1e6, "MB"
+
+
+for _name in codec.JSON_BACKENDS:
+    try:
+        importlib.import_module(_name)
+    except ImportError:
+        continue
+    benchmark("json.loads.{}".format(_name))(functools.partial(bench_loads, _name))
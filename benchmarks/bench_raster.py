@@ -0,0 +1,57 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmarks of decoding rasters and assembling stacks of rasters.
+"""
+
+import json
+from io import BytesIO
+
+import numpy as np
+
+from descarteslabs.client.services.raster.raster import read_blosc_array, read_blosc_string
+from descarteslabs.client.stubserver import synthetic
+
+from fixtures import DLTILE, CannedRaster
+from harness import benchmark
+
+
+def blosc_stream():
+    # smooth data with some noise compresses like imagery, unlike random data
+    y, x = np.mgrid[0:1024, 0:1024]
+    array = np.stack([(x + y) * (i + 1) % 10000 for i in range(3)]).astype(np.uint16)
+    array += np.random.RandomState(0).randint(0, 16, size=array.shape).astype(np.uint16)
+
+    parts = synthetic.blosc_frames(array, {})
+    return json.loads(parts[1].decode("utf-8")), b"".join(parts[2:]), array.nbytes
+
+
+@benchmark("raster.read_blosc_array")
+def bench_read_blosc_array():
+    array_meta, data, nbytes = blosc_stream()
+    return lambda: read_blosc_array(array_meta, BytesIO(data)), nbytes / 1e6, "MB"
+
+
+@benchmark("raster.read_blosc_string")
+def bench_read_blosc_string():
+    array_meta, data, nbytes = blosc_stream()
+    return lambda: read_blosc_string(array_meta, BytesIO(data)), nbytes / 1e6, "MB"
+
+
+@benchmark("raster.Raster.stack")
+def bench_raster_stack():
+    raster = CannedRaster()
+    ids = ["stub:synthetic:meta_{:08d}_v1".format(i) for i in range(16)]
+    return lambda: raster.stack(ids, bands=["red", "green", "blue"], dltile=DLTILE, max_workers=4), 16, "rasters"
@@ -0,0 +1,86 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmarks of scenes: constructing Scenes from metadata, operations on
+large collections of Scenes, and assembling stacks.
+"""
+
+from descarteslabs.common.dltile import dltile
+from descarteslabs.common.dotdict import DotDict
+from descarteslabs.scenes import DLTile, Scene, SceneCollection
+
+from fixtures import DLTILE, CannedRaster, product_bands, scene_features
+from harness import benchmark
+
+_collection = []
+
+
+def collection():
+    """
+    A collection of 100k scenes, shared by the benchmarks. Their times vary
+    more than others from one process to the next, as they walk through
+    much more memory, so they have a higher threshold.
+    """
+    if not _collection:
+        bands = product_bands()
+        scenes = (Scene(DotDict(f), bands) for f in scene_features(100000))
+        _collection.append(SceneCollection(scenes, raster_client=CannedRaster()))
+    return _collection[0]
+
+
+@benchmark("scenes.Scene.__init__")
+def bench_scene_init():
+    features = scene_features(1000)
+    bands = product_bands()
+
+    def construct():
+        # like the results of Metadata.search; their properties are boxed in copies
+        # when accessed, which Scene then modifies
+        return [Scene(DotDict(f), bands) for f in features]
+
+    return construct, 1000, "scenes"
+
+
+@benchmark("scenes.Collection.groupby", threshold=0.5)
+def bench_groupby():
+    scenes = collection()
+    return lambda: list(scenes.groupby("properties.date.month")), len(scenes) / 1e3, "kscenes"
+
+
+@benchmark("scenes.Collection.sorted", threshold=0.5)
+def bench_sorted():
+    scenes = collection()
+    return lambda: scenes.sorted("properties.cloud_fraction"), len(scenes) / 1e3, "kscenes"
+
+
+@benchmark("scenes.Collection.filter", threshold=0.5)
+def bench_filter():
+    scenes = collection()
+    return lambda: scenes.filter(lambda s: s.properties.cloud_fraction < 0.5), len(scenes) / 1e3, "kscenes"
+
+
+@benchmark("scenes.SceneCollection.stack")
+def bench_scenecollection_stack():
+    bands = product_bands()
+    scenes = SceneCollection((Scene(DotDict(f), bands) for f in scene_features(16)), raster_client=CannedRaster())
+    ctx = DLTile(dltile(DLTILE))
+    return lambda: scenes.stack(["red", "green", "blue"], ctx, max_workers=4), 16, "rasters"
+
+
+@benchmark("scenes.FeatureTable.filter")
+def bench_table_filter():
+    # the same filter as scenes.Collection.filter, on the columns of the collection
+    table = collection().to_table()
+    return lambda: table[table["cloud_fraction"] < 0.5], len(table) / 1e3, "kscenes"
@@ -0,0 +1,35 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmarks of vector features.
+"""
+
+import math
+
+from descarteslabs.vectors import Feature
+
+from bench_json import metadata_feature
+from harness import benchmark
+
+
+@benchmark("vectors.Feature.geojson")
+def bench_geojson():
+    ring = [[math.cos(t * math.pi / 500), math.sin(t * math.pi / 500)] for t in range(1000)]
+    ring.append(ring[0])
+    features = [
+        Feature(geometry={"type": "Polygon", "coordinates": [ring]}, properties=metadata_feature(i)["properties"])
+        for i in range(100)
+    ]
+    return lambda: [f.geojson for f in features], 100, "features"
@@ -0,0 +1,82 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Data shared by the benchmarks of the suite, generated with the synthetic
+data of the stub platform (see :mod:`descarteslabs.client.stubserver`).
+"""
+
+import json
+import threading
+from io import BytesIO
+
+from descarteslabs.client.auth import Auth
+from descarteslabs.client.services.raster import Raster
+from descarteslabs.client.stubserver import Catalog, stub_token
+from descarteslabs.client.stubserver import synthetic
+
+# A DLTile of 288x288 pixels
+DLTILE = "256:16:30.0:15:-2:45"
+
+
+class CannedResponse(object):
+    def __init__(self, content):
+        self.content = content
+        self.raw = BytesIO(content)
+
+    def close(self):
+        pass
+
+
+class CannedRaster(Raster):
+    """
+    A Raster client answering requests with responses generated once per
+    set of parameters, without a server, so that only the time spent by the
+    client decoding and assembling rasters is measured.
+    """
+
+    def __init__(self):
+        auth = Auth(jwt_token=stub_token(), token_info_path=None)
+        super(CannedRaster, self).__init__(url="http://localhost/raster/v1", auth=auth)
+        self._responses = {}
+        self._lock = threading.Lock()
+
+    def _post_stream(self, path, params):
+        # all scenes get the same raster
+        key = json.dumps(dict(params, ids=None), sort_keys=True)
+        with self._lock:
+            content = self._responses.get(key)
+            if content is None:
+                band_names, rows, cols, dtype, metadata = synthetic.raster_grid(params, (256, 256))
+                array = synthetic.raster_array(params, band_names, rows, cols, dtype)
+                if path == "/npz" and params.get("of") == "blosc":
+                    parts = synthetic.blosc_frames(array, metadata)
+                elif path == "/npz":
+                    parts = [synthetic.npz_content(array, metadata)]
+                else:
+                    parts = synthetic.raster_files(params, array, metadata)
+                content = self._responses[key] = b"".join(parts)
+        return CannedResponse(content)
+
+
+def scene_features(count):
+    """The metadata of `count` scenes, as returned by `Metadata.search`"""
+    catalog = Catalog(scenes=count)
+    return [catalog.feature("stub:synthetic", i) for i in range(count)]
+
+
+def product_bands():
+    """The bands of the scenes of `scene_features`, as returned by `Metadata.get_bands_by_product`"""
+    return synthetic.bands("stub:synthetic")
@@ -0,0 +1,188 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Timing harness of the benchmark suite (see ``run.py``).
+
+A benchmark is a function registered with `benchmark`, which prepares its
+data and returns the callable to time, or a ``(callable, amount, unit)``
+tuple to also report a throughput, e.g. ``(decode, nbytes / 1e6, "MB")``.
+
+Each callable is timed by `measure` as the best of several repeats of
+enough calls to last at least ``min_time`` seconds, with the garbage
+collector disabled. To compare runs made on different machines or under
+different loads, every time is also divided by the time of a fixed
+pure-Python workload measured right before and after it (`reference`),
+and regressions are detected on these normalized times. As machines have
+slow periods, benchmarks which seem to regress are run again before a
+regression is reported.
+"""
+
+import collections
+import gc
+import json
+import platform
+import sys
+import timeit
+
+
+Benchmark = collections.namedtuple("Benchmark", ["name", "setup", "threshold"])
+
+# Registered benchmarks, by name
+BENCHMARKS = collections.OrderedDict()
+
+# Relative increase of a normalized time over the baseline reported as a regression
+DEFAULT_THRESHOLD = 0.25
+
+
+def benchmark(name, threshold=None):
+    """
+    Register the decorated function as the benchmark `name`.
+
+    :param str name: The name of the benchmark, e.g. ``raster.read_blosc_array``.
+    :param float threshold: The relative increase of its normalized time reported
+        as a regression, if not the threshold of the run.
+    """
+    def register(setup):
+        if name in BENCHMARKS:
+            raise ValueError("Benchmark {} is already registered".format(name))
+        BENCHMARKS[name] = Benchmark(name, setup, threshold)
+        return setup
+
+    return register
+
+
+def measure(func, min_time=0.2, repeat=5):
+    """
+    The number of seconds `func` takes per call: the best of `repeat`
+    timings of as many calls as needed to last at least `min_time`.
+    """
+    timer = timeit.Timer(func)
+
+    number = 1
+    while True:
+        seconds = timer.timeit(number)
+        if seconds >= min_time:
+            break
+        # aim a bit above min_time, to not have to calibrate again
+        number = max(number * 2, int(number * 1.2 * min_time / max(seconds, 1e-9)))
+
+    timings = [seconds] + [timer.timeit(number) for _ in range(repeat - 1)]
+    return min(timings) / number
+
+
+def reference():
+    """A fixed pure-Python workload, against which times are normalized"""
+    items = dict(("key{}".format(i), i) for i in range(2000))
+    total = 0
+    for key in sorted(items, reverse=True):
+        total += items[key] * 2
+    return [str(i) for i in range(total % 1000)]
+
+
+def run(names=None, min_time=0.2, repeat=5, out=sys.stdout):
+    """
+    Run the benchmarks with the given `names` (all by default).
+
+    :return: A dictionary with the best ``reference`` time, the ``machine`` and
+        ``python`` the benchmarks ran on, and their ``results`` by name, each
+        with its ``seconds`` per call, its ``normalized`` time and, for
+        benchmarks reporting one, its ``throughput`` per second and ``unit``.
+    :rtype: dict
+    """
+    # each time is normalized by the best time of the reference timed right
+    # before and after it, so that both are affected by a slow period of the machine
+    references = [measure(reference, min_time=min_time, repeat=repeat)]
+    results = collections.OrderedDict()
+
+    for name, bench in BENCHMARKS.items():
+        if names is not None and name not in names:
+            continue
+
+        timed = bench.setup()
+        amount = unit = None
+        if isinstance(timed, tuple):
+            timed, amount, unit = timed
+
+        gc.collect()
+        seconds = measure(timed, min_time=min_time, repeat=repeat)
+        references.append(measure(reference, min_time=min_time, repeat=repeat))
+        result = {"seconds": seconds, "normalized": seconds / min(references[-2:])}
+        if amount is not None:
+            result["throughput"] = amount / seconds
+            result["unit"] = unit
+        results[name] = result
+
+        line = "{:<45} {:>12}".format(name, _format_seconds(seconds))
+        if amount is not None:
+            line += "  {:10.1f} {}/s".format(result["throughput"], unit)
+        out.write(line + "\n")
+        out.flush()
+
+    return {
+        "reference": min(references),
+        "machine": platform.platform(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare the normalized times of a run with a baseline run.
+
+    :return: A list of ``(name, change, regressed)`` tuples for the benchmarks of
+        both runs, where `change` is the relative change of the normalized time
+        (e.g. 0.1 when 10% slower) and `regressed` whether it's beyond the threshold.
+    :rtype: list(tuple)
+    """
+    comparison = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        change = result["normalized"] / base["normalized"] - 1
+        bench = BENCHMARKS.get(name)
+        limit = bench.threshold if bench is not None and bench.threshold is not None else threshold
+        comparison.append((name, change, change > limit))
+    return comparison
+
+
+def best(*runs):
+    """Merge runs of the same benchmarks, keeping the best result of each"""
+    merged = dict(runs[0], results=collections.OrderedDict(runs[0]["results"]))
+    for other in runs[1:]:
+        for name, result in other["results"].items():
+            if name not in merged["results"] or result["normalized"] < merged["results"][name]["normalized"]:
+                merged["results"][name] = result
+    return merged
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def _format_seconds(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return "{:.2f} {}".format(seconds / scale, unit)
+    return "{:.1f} ns".format(seconds * 1e9)
@@ -0,0 +1,113 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Run the benchmark suite, comparing the results with a baseline.
+
+The benchmarks cover the hot paths of the client: importing the package,
+checking the auth token, decoding JSON and rasters, assembling stacks,
+boxing metadata in DotDicts, operations on large collections of scenes,
+serializing filters and vector features. The normalized times of the run
+(see harness.py) are compared with the baseline of the running Python
+version in benchmarks/baselines, and the run fails if any benchmark is
+slower than its baseline by more than the threshold.
+
+Run with python benchmarks/run.py, or python benchmarks/run.py --save
+to record a new baseline, e.g. after a change known to be slower or faster.
+"""
+
+import argparse
+import os
+import platform
+import sys
+
+import harness
+
+import bench_auth  # noqa: F401
+import bench_dotdict  # noqa: F401
+import bench_filtering  # noqa: F401
+import bench_import  # noqa: F401
+import bench_json  # noqa: F401
+import bench_raster  # noqa: F401
+import bench_scenes  # noqa: F401
+import bench_vectors  # noqa: F401
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+
+def default_baseline():
+    return os.path.join(BASELINES, "py{}{}.json".format(*platform.python_version_tuple()[:2]))
+
+
+parser = argparse.ArgumentParser(description="Run the benchmark suite")
+parser.add_argument("-k", dest="pattern", help="Only run the benchmarks whose name contains this string")
+parser.add_argument("--baseline", default=None, help="The baseline file (default: baselines/py<version>.json)")
+parser.add_argument("--save", action="store_true", help="Save the results as the baseline instead of comparing")
+parser.add_argument("--threshold", type=float, default=harness.DEFAULT_THRESHOLD,
+                    help="The relative slowdown reported as a regression (default: %(default)s)")
+parser.add_argument("--min-time", type=float, default=0.2, help="Minimum seconds of each timing")
+parser.add_argument("--repeat", type=int, default=5, help="Number of timings of each benchmark")
+parser.add_argument("--rounds", type=int, default=3,
+                    help="Maximum number of runs of each benchmark, to confirm regressions or save a baseline")
+
+
+def main(args=None):
+    args = parser.parse_args(args)
+    baseline_path = args.baseline or default_baseline()
+
+    names = None
+    if args.pattern:
+        names = [name for name in harness.BENCHMARKS if args.pattern in name]
+
+    results = harness.run(names=names, min_time=args.min_time, repeat=args.repeat)
+
+    if args.save:
+        for _ in range(args.rounds - 1):
+            results = harness.best(results, harness.run(names=names, min_time=args.min_time, repeat=args.repeat))
+        if os.path.exists(baseline_path) and names is not None:
+            # only replace the results of the benchmarks which were run
+            baseline = harness.load(baseline_path)
+            baseline["results"].update(results["results"])
+            results = dict(results, results=baseline["results"])
+        harness.save(results, baseline_path)
+        print("Saved baseline {}".format(baseline_path))
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print("No baseline {}, run with --save to record one".format(baseline_path))
+        return 0
+
+    baseline = harness.load(baseline_path)
+    comparison = harness.compare(results, baseline, threshold=args.threshold)
+    for _ in range(args.rounds - 1):
+        regressions = [name for name, _, regressed in comparison if regressed]
+        if not regressions:
+            break
+        print("\nRunning again: {}".format(", ".join(regressions)))
+        results = harness.best(results, harness.run(names=regressions, min_time=args.min_time, repeat=args.repeat))
+        comparison = harness.compare(results, baseline, threshold=args.threshold)
+
+    print("\nCompared with {}:".format(baseline_path))
+    for name, change, regressed in comparison:
+        print("{:<45} {:+7.1%}{}".format(name, change, "  REGRESSION" if regressed else ""))
+
+    regressions = [name for name, _, regressed in comparison if regressed]
+    if regressions:
+        print("\n{} benchmark(s) regressed beyond the threshold".format(len(regressions)))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
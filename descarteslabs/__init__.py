@@ -13,26 +13,44 @@
 # limitations under the License.
 
 # flake8: noqa
-from .client.auth import Auth
-from .client import services
-from .client.services import *
-from .client import exceptions
+import sys
+
+from .common.lazy import lazy_attributes, lazy_import
 from .common.property_filtering import GenericProperties
+from .client import ASYNC_SERVICES, SERVICES
+
+_services = list(SERVICES)
+if sys.version_info >= (3, 6):
+    _services += ASYNC_SERVICES
+
+
+def _default_client(service):
+    def factory():
+        module = sys.modules[__name__]
+        return getattr(module, service)(auth=module.descartes_auth)
+
+    return factory
 
-try:
-    from . import scenes
-except ImportError:
-    pass
 
-try:
-    from . import vectors
-except ImportError:
-    pass
+# The clients, services and optional subpackages (which import shapely, geojson
+# and numpy) are only imported or created when first used, so importing the
+# package doesn't read the token info file or import heavy dependencies.
+lazy_attributes(
+    __name__,
+    dict(
+        {service: lazy_import("descarteslabs.client.services", service) for service in _services},
+        Auth=lazy_import("descarteslabs.client.auth", "Auth"),
+        services=lazy_import("descarteslabs.client.services"),
+        exceptions=lazy_import("descarteslabs.client.exceptions"),
+        scenes=lazy_import("descarteslabs.scenes"),
+        vectors=lazy_import("descarteslabs.vectors"),
+        descartes_auth=lambda: sys.modules[__name__].Auth.from_environment_or_token_json(),
+        metadata=_default_client("Metadata"),
+        places=_default_client("Places"),
+        raster=_default_client("Raster"),
+    ),
+)
 
-descartes_auth = Auth.from_environment_or_token_json()
-metadata = Metadata(auth=descartes_auth)
-places = Places(auth=descartes_auth)
-raster = Raster(auth=descartes_auth)
 properties = GenericProperties()
 
-__all__ = ["descartes_auth", "metadata", "places", "raster", "properties", "Auth", "exceptions"] + services.__all__
+__all__ = ["descartes_auth", "metadata", "places", "raster", "properties", "Auth", "exceptions"] + _services
@@ -11,3 +11,22 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+
+# The clients exported by `descarteslabs.client.services`, and by `descarteslabs`,
+# which imports them lazily. Kept here, as importing the services imports all
+# their dependencies.
+SERVICES = [
+    "Raster",
+    "Metadata",
+    "Places",
+    "Storage",
+    "Catalog",
+    "AsyncTasks",
+    "Tasks",
+    "FutureTask",
+    "CloudFunction",
+    "Vector",
+]
+
+# The asyncio clients, with Python 3.6+
+ASYNC_SERVICES = ["AsyncMetadata", "AsyncRaster", "AsyncStorage"]
@@ -49,6 +49,21 @@ try:
 except ImportError:
     mercantile = ThirdParty("mercantile")
 
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = ThirdParty("aiohttp")
+
+try:
+    import orjson
+except ImportError:
+    orjson = ThirdParty("orjson")
+
+try:
+    import ujson
+except ImportError:
+    ujson = ThirdParty("ujson")
+
 
 def import_matplotlib_pyplot():
     try:
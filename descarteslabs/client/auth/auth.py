@@ -13,12 +13,14 @@
 # limitations under the License.
 
 import base64
-import datetime
+import contextlib
 import errno
 import json
 import os
 import random
 import stat
+import threading
+import time
 import warnings
 from hashlib import sha1
 
@@ -28,7 +30,12 @@ from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 from descarteslabs.client.exceptions import AuthError, OauthError
-from descarteslabs.common.threading.local import ThreadLocalWrapper
+from descarteslabs.common.threading.local import ProcessLocalWrapper, ThreadLocalWrapper
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 DEFAULT_TOKEN_INFO_PATH = os.path.join(
     os.path.expanduser("~"), ".descarteslabs", "token_info.json"
@@ -59,6 +66,33 @@ def makedirs_if_not_exists(path):
                 raise
 
 
+@contextlib.contextmanager
+def token_info_lock(token_info_path):
+    """
+    Hold an exclusive lock on the token info file, so only one process at a
+    time refreshes the token it holds. Not locked on platforms without
+    `fcntl` (i.e. Windows), or if the directory of the file doesn't exist yet.
+    """
+    if not token_info_path or fcntl is None:
+        yield
+        return
+
+    try:
+        fd = os.open(token_info_path + ".lock", os.O_RDWR | os.O_CREAT, stat.S_IRUSR | stat.S_IWUSR)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            warnings.warn("failed to lock token info: {}".format(e))
+        yield
+        return
+
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
 class Auth:
 
     RETRY_CONFIG = Retry(
@@ -70,6 +104,15 @@ class Auth:
 
     ADAPTER = ThreadLocalWrapper(lambda: HTTPAdapter(max_retries=Auth.RETRY_CONFIG))
 
+    # The token is refreshed in the background when it is used less than this
+    # many seconds before it enters the expiration `leeway`, so requests don't
+    # wait for it to be refreshed. If 0, it is only refreshed once in the leeway.
+    REFRESH_AHEAD = 300
+
+    # Seconds before a failed background refresh is tried again, doubled after
+    # each failure of the same token, up to REFRESH_AHEAD
+    REFRESH_BACKOFF = 10
+
     def __init__(
         self,
         domain="https://accounts.descarteslabs.com",
@@ -94,13 +137,7 @@ class Auth:
         """
         self.token_info_path = token_info_path
 
-        token_info = {}
-        if self.token_info_path:
-            try:
-                with open(self.token_info_path) as fp:
-                    token_info = json.load(fp)
-            except (IOError, ValueError):
-                pass
+        token_info = self._read_token_info()
 
         self.client_id = next(
             (
@@ -176,7 +213,12 @@ class Auth:
                 self._token = None
 
         self._namespace = None
+        self._token_claims = None
         self._session = ThreadLocalWrapper(self.build_session)
+        self._refresh_lock = ProcessLocalWrapper(threading.Lock)
+        self._background_guard = ProcessLocalWrapper(threading.Lock)
+        self._background_refresh = None
+        self._background_failure = None
         self.domain = domain
         self.leeway = leeway
 
@@ -195,36 +237,38 @@ class Auth:
     @property
     def token(self):
         if self._token is None:
-            self._get_token()
+            self._refresh_token(None)
         else:  # might have token but could be close to expiration
-            exp = self.payload.get("exp")
+            token = self._token
+            exp = self._claims(token).get("exp")
 
             if exp is not None:
-                now = (
-                    datetime.datetime.utcnow() - datetime.datetime(1970, 1, 1)
-                ).total_seconds()
+                now = _now()
                 if now + self.leeway > exp:
                     try:
-                        self._get_token()
+                        self._refresh_token(token)
                     except AuthError as e:
                         # Unable to refresh, raise if now > exp
                         if now > exp:
                             raise e
+                elif now + self.leeway + self.REFRESH_AHEAD > exp:
+                    self._start_background_refresh(token)
 
         return self._token
 
     @property
     def payload(self):
         if self._token is None:
-            self._get_token()
+            self._refresh_token(None)
 
-        if isinstance(self._token, six.text_type):
-            token = self._token.encode("utf-8")
-        else:
-            token = self._token
+        return dict(self._claims(self._token))
 
-        claims = token.split(b".")[1]
-        return json.loads(base64url_decode(claims).decode("utf-8"))
+    def _claims(self, token):
+        # decoded once per token, as the token is checked on every request
+        token_claims = self._token_claims
+        if token_claims is None or token_claims[0] != token:
+            token_claims = self._token_claims = (token, _decode_claims(token))
+        return token_claims[1]
 
     @property
     def session(self):
@@ -235,6 +279,100 @@ class Auth:
         session.mount("https://", self.ADAPTER.get())
         return session
 
+    def _refresh_token(self, token):
+        """
+        Refresh the expiring `token`, unless another thread or process
+        already did.
+
+        Threads of a process refresh one at a time, and so do processes
+        sharing a token info file: a process waiting on another one reads
+        back the token it saved instead of refreshing it again.
+        """
+        with self._refresh_lock.get():
+            if self._token is not token and not self._expiring(self._token):
+                return
+
+            with token_info_lock(self.token_info_path):
+                saved_token = self._read_saved_token()
+                if saved_token is not None and saved_token != token and not self._expiring(saved_token):
+                    self._token = saved_token
+                else:
+                    self._get_token()
+
+    def _start_background_refresh(self, token):
+        # the guard is separate from the refresh lock and never waited on,
+        # so requests don't wait for a background refresh to start or finish
+        failure = self._background_failure
+        if failure is not None and failure[0] == token and _now() < failure[2]:
+            return
+
+        guard = self._background_guard.get()
+        if not guard.acquire(False):
+            return
+
+        try:
+            thread = threading.Thread(
+                target=self._refresh_in_background, args=(token, guard), name="descarteslabs-auth-refresh"
+            )
+            thread.daemon = True
+            thread.start()
+        except Exception:
+            guard.release()
+            raise
+        self._background_refresh = thread
+
+    def _refresh_in_background(self, token, guard):
+        try:
+            self._refresh_token(token)
+        except Exception as e:
+            # the token is refreshed again when used in the expiration leeway.
+            # Until then, failed refreshes of the same token are retried after
+            # a growing delay, and refreshes which can't succeed (e.g. without
+            # a client id) aren't retried at all
+            failure = self._background_failure
+            failures = failure[1] + 1 if failure is not None and failure[0] == token else 1
+            if isinstance(e, AuthError) and not isinstance(e, OauthError):
+                retry_at = float("inf")
+            else:
+                retry_at = _now() + min(self.REFRESH_BACKOFF * 2 ** min(failures - 1, 16), self.REFRESH_AHEAD)
+            self._background_failure = (token, failures, retry_at)
+        else:
+            self._background_failure = None
+        finally:
+            guard.release()
+
+    def _expiring(self, token):
+        if token is None:
+            return True
+
+        try:
+            exp = _decode_claims(token).get("exp")
+        except (IndexError, TypeError, ValueError):
+            return True
+        return exp is not None and _now() + self.leeway > exp
+
+    def _read_token_info(self):
+        token_info = {}
+        if self.token_info_path:
+            try:
+                with open(self.token_info_path) as fp:
+                    token_info = json.load(fp)
+            except (IOError, ValueError):
+                pass
+        return token_info
+
+    def _read_saved_token(self):
+        # the token saved by another process, if it was refreshed with the same credentials
+        token_info = self._read_token_info()
+        same_credentials = (
+            token_info.get("client_id") == self.client_id
+            and token_info.get("client_secret") == self.client_secret
+            and token_info.get("refresh_token") == self.refresh_token
+        )
+        if not same_credentials:
+            return None
+        return token_info.get("jwt_token") or token_info.get("JWT_TOKEN")
+
     def _get_token(self, timeout=100):
         if self.client_id is None:
             raise AuthError("Could not find client_id")
@@ -287,15 +425,8 @@ class Auth:
             self._token = id_token
         else:
             raise OauthError("could not retrieve token")
-        token_info = {}
-
-        if self.token_info_path:
-            try:
-                with open(self.token_info_path) as fp:
-                    token_info = json.load(fp)
-            except (IOError, ValueError):
-                pass
 
+        token_info = self._read_token_info()
         token_info["jwt_token"] = self._token
 
         if self.token_info_path:
@@ -317,6 +448,18 @@ class Auth:
         return self._namespace
 
 
+def _now():
+    return time.time()
+
+
+def _decode_claims(token):
+    if isinstance(token, six.text_type):
+        token = token.encode("utf-8")
+
+    claims = token.split(b".")[1]
+    return json.loads(base64url_decode(claims).decode("utf-8"))
+
+
 if __name__ == "__main__":
     auth = Auth()
 
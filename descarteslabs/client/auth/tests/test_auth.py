@@ -15,13 +15,19 @@
 import base64
 import datetime
 import json
+import os
+import shutil
+import tempfile
+import threading
+import time
 import unittest
 
 import six
 
 import responses
 from descarteslabs.client.auth import Auth
-from descarteslabs.client.exceptions import AuthError
+from descarteslabs.client.auth import auth as auth_module
+from descarteslabs.client.exceptions import AuthError, OauthError
 from mock import patch
 
 
@@ -255,5 +261,163 @@ class TestAuth(unittest.TestCase):
             self.assertEqual(auth.client_id, environ.get("CLIENT_ID"))
 
 
+def make_token(exp):
+    return b".".join(
+        base64.urlsafe_b64encode(to_bytes(p)) for p in ["header", json.dumps(dict(exp=exp)), "sig"]
+    ).decode("utf-8")
+
+
+def now():
+    return (datetime.datetime.utcnow() - datetime.datetime(1970, 1, 1)).total_seconds()
+
+
+class TestTokenRefresh(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.token_info_path = os.path.join(self.tempdir, "token_info.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def auth(self, token, **kwargs):
+        kwargs.setdefault("token_info_path", None)
+        return Auth(jwt_token=token, client_id="client_id", client_secret="client_secret", **kwargs)
+
+    def test_single_flight(self):
+        expired = make_token(0)
+        fresh = make_token(now() + 3600)
+        auth = self.auth(expired)
+
+        def get_token():
+            time.sleep(0.1)
+            auth._token = fresh
+
+        with patch.object(auth, "_get_token", side_effect=get_token) as _get_token:
+            tokens = []
+            threads = [threading.Thread(target=lambda: tokens.append(auth.token)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        _get_token.assert_called_once()
+        self.assertEqual(tokens, [fresh] * 8)
+
+    def test_read_back_saved_token(self):
+        fresh = make_token(now() + 3600)
+        with open(self.token_info_path, "w") as fp:
+            json.dump(
+                dict(client_id="client_id", client_secret="client_secret", jwt_token=make_token(0)), fp
+            )
+        auth = self.auth(None, token_info_path=self.token_info_path)
+
+        # another process refreshed the token meanwhile
+        with open(self.token_info_path, "w") as fp:
+            json.dump(dict(client_id="client_id", client_secret="client_secret", jwt_token=fresh), fp)
+
+        with patch.object(auth, "_get_token") as _get_token:
+            self.assertEqual(auth.token, fresh)
+        _get_token.assert_not_called()
+        self.assertTrue(os.path.exists(self.token_info_path + ".lock"))
+
+    def test_ignore_saved_token_of_other_credentials(self):
+        with open(self.token_info_path, "w") as fp:
+            json.dump(dict(client_id="other_id", jwt_token=make_token(now() + 3600)), fp)
+        auth = self.auth(make_token(0), token_info_path=self.token_info_path)
+
+        with patch.object(auth, "_get_token") as _get_token:
+            auth.token
+        _get_token.assert_called_once()
+
+    def test_background_refresh(self):
+        token = make_token(now() + 500 + Auth.REFRESH_AHEAD / 2)
+        fresh = make_token(now() + 3600)
+        auth = self.auth(token, leeway=500)
+        started = threading.Event()
+        refreshed = threading.Event()
+
+        def get_token():
+            started.wait(5)
+            auth._token = fresh
+            refreshed.set()
+
+        with patch.object(auth, "_get_token", side_effect=get_token):
+            self.assertEqual(auth.token, token)
+            started.set()
+            self.assertTrue(refreshed.wait(5))
+            auth._background_refresh.join()
+            self.assertEqual(auth.token, fresh)
+
+    def test_background_refresh_not_waited_on(self):
+        token = make_token(now() + 500 + Auth.REFRESH_AHEAD / 2)
+        auth = self.auth(token, leeway=500)
+        release = threading.Event()
+
+        with patch.object(auth, "_get_token", side_effect=lambda: release.wait(5)) as _get_token:
+            auth.token
+            start = time.time()
+            for _ in range(3):
+                self.assertEqual(auth.token, token)
+            self.assertLess(time.time() - start, 1)
+            release.set()
+            auth._background_refresh.join()
+        _get_token.assert_called_once()
+
+    def test_background_refresh_backoff(self):
+        token = make_token(now() + 500 + Auth.REFRESH_AHEAD / 2)
+        auth = self.auth(token, leeway=500)
+
+        with patch.object(auth, "_get_token", side_effect=OauthError("503")) as _get_token:
+            auth.token
+            auth._background_refresh.join()
+            auth.token
+            _get_token.assert_called_once()
+            self.assertEqual(auth._background_failure[1], 1)
+
+            auth._background_failure = (token, 1, 0)
+            auth.token
+            auth._background_refresh.join()
+            self.assertEqual(_get_token.call_count, 2)
+            self.assertEqual(auth._background_failure[1], 2)
+            self.assertGreater(auth._background_failure[2], now() + Auth.REFRESH_BACKOFF)
+
+    def test_background_refresh_impossible(self):
+        token = make_token(now() + 500 + Auth.REFRESH_AHEAD / 2)
+        auth = Auth(jwt_token=token, token_info_path=None, leeway=500)
+        auth.client_id = None
+        auth.token
+        auth._background_refresh.join()
+        self.assertEqual(auth._background_failure[2], float("inf"))
+
+        thread = auth._background_refresh
+        auth.token
+        self.assertIs(auth._background_refresh, thread)
+
+    def test_claims_decoded_once_per_token(self):
+        token = make_token(now() + 3600)
+        auth = self.auth(token)
+        decode_claims = auth_module._decode_claims
+        with patch.object(auth_module, "_decode_claims", side_effect=decode_claims) as _decode_claims:
+            for _ in range(3):
+                self.assertEqual(auth.token, token)
+            self.assertEqual(auth.payload["exp"], auth.payload["exp"])
+            _decode_claims.assert_called_once_with(token)
+
+            auth._token = make_token(now() + 7200)
+            auth.token
+            self.assertEqual(_decode_claims.call_count, 2)
+
+        # callers may modify the payload they get
+        auth.payload["exp"] = 0
+        self.assertNotEqual(auth.payload["exp"], 0)
+
+    def test_no_background_refresh(self):
+        auth = self.auth(make_token(now() + 500 + Auth.REFRESH_AHEAD * 2), leeway=500)
+        with patch.object(auth, "_get_token") as _get_token:
+            auth.token
+        self.assertIsNone(auth._background_refresh)
+        _get_token.assert_not_called()
+
+
 if __name__ == "__main__":
     unittest.main()
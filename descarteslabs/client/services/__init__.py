@@ -13,6 +13,9 @@
 # limitations under the License.
 
 # flake8: noqa
+import sys
+
+from descarteslabs.client import ASYNC_SERVICES, SERVICES
 from descarteslabs.client.services.metadata import Metadata
 from descarteslabs.client.services.places import Places
 from descarteslabs.client.services.raster import Raster
@@ -21,15 +24,11 @@ from descarteslabs.client.services.catalog import Catalog
 from descarteslabs.client.services.tasks import AsyncTasks, Tasks, FutureTask, CloudFunction
 from descarteslabs.client.services.vector import Vector
 
-__all__ = [
-    "Raster",
-    "Metadata",
-    "Places",
-    "Storage",
-    "Catalog",
-    "AsyncTasks",
-    "Tasks",
-    "FutureTask",
-    "CloudFunction",
-    "Vector"
-]
+__all__ = list(SERVICES)
+
+if sys.version_info >= (3, 6):
+    from descarteslabs.client.services.metadata import AsyncMetadata
+    from descarteslabs.client.services.raster import AsyncRaster
+    from descarteslabs.client.services.storage import AsyncStorage
+
+    __all__ += ASYNC_SERVICES
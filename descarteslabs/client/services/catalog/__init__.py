@@ -1,3 +1,8 @@
-from .catalog import catalog, Catalog
+from descarteslabs.common.lazy import lazy_attributes, lazy_import
+from .catalog import Catalog
+
+# the default client shadows the catalog module, as it always has
+globals().pop("catalog")
+lazy_attributes(__name__, {"catalog": lazy_import("descarteslabs.client.services.catalog.catalog", "catalog")})
 
 __all__ = ["catalog", "Catalog"]
@@ -11,6 +11,7 @@ from descarteslabs.client.deprecation import check_deprecated_kwargs
 from descarteslabs.client.exceptions import ServerError
 from descarteslabs.client.services.metadata import Metadata
 from descarteslabs.client.services.service import Service, ThirdPartyService
+from descarteslabs.common.lazy import lazy_attributes
 
 
 class Catalog(Service):
@@ -870,4 +871,5 @@ class Catalog(Service):
         return 0, fd.name, ""
 
 
-catalog = Catalog()
+# created when first used, so importing this module doesn't read the token info file
+lazy_attributes(__name__, {"catalog": Catalog})
@@ -12,10 +12,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import sys
+
 from .metadata import Metadata
+from .cache import MetadataCache
+from .table import FeatureTable
 from descarteslabs.common.property_filtering import GenericProperties
 
 
 properties = GenericProperties()
 
-__all__ = ["Metadata", "properties"]
+__all__ = ["Metadata", "MetadataCache", "FeatureTable", "properties"]
+
+if sys.version_info >= (3, 6):
+    from .async_metadata import AsyncMetadata  # noqa: F401
+
+    __all__ += ["AsyncMetadata"]
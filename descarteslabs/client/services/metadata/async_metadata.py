@@ -0,0 +1,85 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""asyncio variant of the Metadata client. Requires Python 3.6+ and aiohttp."""
+
+import asyncio
+import os
+
+from descarteslabs.client.services.metadata.metadata import Metadata
+from descarteslabs.client.services.service.async_service import AsyncService, DEFAULT_MAX_CONCURRENCY
+from descarteslabs.common.dotdict import DotDict
+
+
+class AsyncMetadata(AsyncService):
+    """
+    asyncio variant of :class:`~descarteslabs.client.services.metadata.Metadata`
+    for searching images.
+    """
+
+    TIMEOUT = Metadata.TIMEOUT
+
+    def __init__(self, url=None, auth=None, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        """
+        :param str url: URL of the Metadata service; defaults to ``DESCARTESLABS_METADATA_URL``.
+        :param Auth auth: The authentication to use.
+        :param int max_concurrency: Maximum number of requests in flight at once.
+        """
+        if url is None:
+            url = os.environ.get(
+                "DESCARTESLABS_METADATA_URL",
+                "https://platform.descarteslabs.com/metadata/v1",
+            )
+
+        super(AsyncMetadata, self).__init__(url, auth=auth, max_concurrency=max_concurrency)
+        # builds the search requests, which may need the Places or Raster service
+        self._metadata = Metadata(url=url, auth=self.auth)
+
+    async def features(self, products=None, batch_size=1000, **kwargs):
+        """
+        Asynchronous generator that scrolls through the search results.
+
+        Takes the same search arguments as :meth:`Metadata.features
+        <descarteslabs.client.services.metadata.Metadata.features>`.
+
+        :param list(str) products: Products to search.
+        :param int batch_size: Number of features to fetch per request.
+
+        :return: Asynchronous generator of GeoJSON ``Feature`` objects.
+
+        Example::
+
+            >>> async def count(products):  # doctest: +SKIP
+            ...     async with AsyncMetadata() as metadata:
+            ...         return len([f async for f in metadata.features(products)])
+        """
+        loop = asyncio.get_event_loop()
+        params = await loop.run_in_executor(
+            None, lambda: self._metadata._search_params(products=products, limit=batch_size, **kwargs)
+        )
+
+        while True:
+            r = await self.request("POST", "/search", json=params)
+            features = r.json()
+            if not features:
+                break
+
+            for feature in features:
+                yield DotDict(feature)
+
+            continuation_token = r.headers.get("x-continuation-token")
+            if not continuation_token:
+                break
+            params["continuation_token"] = continuation_token
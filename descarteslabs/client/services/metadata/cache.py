@@ -0,0 +1,286 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from hashlib import sha1
+
+from cachetools import LRUCache
+from six import string_types
+
+from descarteslabs.client.services.service import codec
+from descarteslabs.client.services.service.metrics import metrics_registry
+from descarteslabs.common.cache import Transaction, connect
+from descarteslabs.common.threading.local import ThreadLocalWrapper
+from .sharding import parse_datetime
+
+
+DEFAULT_TTL = 3600
+DEFAULT_MAX_MEMORY = 64 * 1024 ** 2
+DEFAULT_MAX_SIZE = 1024 ** 3
+
+# Coordinates of geometries closer than this are the same in cache keys
+DEFAULT_TOLERANCE = 1e-7
+
+# Properties of queries whose order doesn't matter
+_UNORDERED = ("products", "sat_ids", "fields")
+
+
+class MetadataCache(object):
+    """
+    A cache of the results of metadata queries, each expiring after a time
+    to live, held in memory and optionally in a directory shared by many
+    processes on the same host.
+
+    Queries are identified by the user making them and a canonical form of
+    their parameters (see `canonical_query`), so that equivalent queries, like
+    queries for the same products in a different order, or for geometries
+    within `tolerance` of each other, share their results.
+
+    Example::
+
+        >>> from descarteslabs.client.services.metadata import Metadata, MetadataCache
+        >>> metadata = Metadata(cache=MetadataCache(ttl=600, path="/tmp/dl-metadata-cache"))
+        >>> fc = metadata.search("landsat:LC08:PRE:TOAR", dltile="256:0:75.0:15:-5:230")
+        >>> fc = metadata.search("landsat:LC08:PRE:TOAR", dltile="256:0:75.0:15:-5:230")
+        >>> metadata.cache.stats
+        {'hits': 1, 'misses': 1, 'evictions': 0}
+    """
+
+    INDEX_NAME = "metadata.sqlite"
+
+    def __init__(
+        self,
+        ttl=DEFAULT_TTL,
+        max_memory=DEFAULT_MAX_MEMORY,
+        path=None,
+        max_size=DEFAULT_MAX_SIZE,
+        tolerance=DEFAULT_TOLERANCE,
+    ):
+        """
+        :param float ttl: Number of seconds after which cached results expire,
+            unless given for a specific result.
+        :param int max_memory: Maximum total size in bytes of the results cached in
+            memory, as JSON. Least recently used results are evicted to stay within this size.
+        :param str path: Directory in which to also store the results, shared with other
+            processes. Created if it doesn't exist. If None, results are only cached in memory.
+        :param int max_size: Maximum total size in bytes of the results stored in `path`.
+            Expired, then least recently used results are evicted to stay within this size.
+        :param float tolerance: Geometries of queries whose coordinates are within this
+            distance of each other are considered the same.
+        """
+        self.ttl = ttl
+        self.max_memory = max_memory
+        self.path = path
+        self.max_size = max_size
+        self.tolerance = tolerance
+
+        self._lock = threading.Lock()
+        self._memory = LRUCache(maxsize=max_memory, getsizeof=_entry_size)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if path is not None:
+            if not os.path.exists(path):
+                try:
+                    os.makedirs(path)
+                except OSError:
+                    if not os.path.isdir(path):
+                        raise
+
+            # sqlite connections can't be shared across threads or processes
+            self._connection = ThreadLocalWrapper(self._connect)
+            with self._transaction() as db:
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                    "expires REAL NOT NULL, last_access REAL NOT NULL)"
+                )
+                db.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+
+    @property
+    def stats(self):
+        """
+        Number of cache hits, misses and evictions in this process. Hits and misses
+        are also counted by the ``metadata_cache_total`` counter of the
+        :py:func:`~descarteslabs.client.services.service.metrics_registry`.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def key(self, url, params, identity=None):
+        """
+        The cache key of a query of `url` with the JSON body `params`.
+
+        :param str identity: The user making the query, e.g. their namespace.
+            Results depend on the products the user may access, so they are
+            only shared by the queries of the same user.
+        """
+        canonical = json.dumps(
+            [url, identity, canonical_query(params, self.tolerance)], sort_keys=True, separators=(",", ":")
+        )
+        return sha1(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Return the cached result for `key`, or None if it isn't cached or has expired.
+        Every call returns a new copy of the result.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._memory[key]
+                entry = None
+
+        if entry is None and self.path is not None:
+            with self._transaction() as db:
+                row = db.execute("SELECT value, expires FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is not None and row[1] > now:
+                    db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            if row is not None and row[1] > now:
+                entry = (row[1], bytes(row[0]))
+                self._remember(key, entry)
+
+        self._record(hit=entry is not None)
+        return None if entry is None else codec.loads(entry[1])
+
+    def set(self, key, value, ttl=None):
+        """
+        Cache the JSON-serializable `value` under `key`, for `ttl` seconds,
+        or the default time to live of the cache if None.
+        """
+        data = codec.dumps(value)
+        expires = time.time() + (self.ttl if ttl is None else ttl)
+        self._remember(key, (expires, data))
+
+        if self.path is not None and len(data) <= self.max_size:
+            now = time.time()
+            evictions = 0
+            with self._transaction() as db:
+                db.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, expires, last_access) VALUES (?, ?, ?, ?, ?)",
+                    (key, sqlite3.Binary(data), len(data), expires, now)
+                )
+                db.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+
+                total, = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+                if total > self.max_size:
+                    for old_key, old_size in db.execute(
+                        "SELECT key, size FROM entries ORDER BY last_access"
+                    ).fetchall():
+                        if total <= self.max_size:
+                            break
+                        db.execute("DELETE FROM entries WHERE key = ?", (old_key,))
+                        total -= old_size
+                        evictions += 1
+            with self._lock:
+                self.evictions += evictions
+
+    def clear(self):
+        """
+        Remove all results from the cache, including those stored in `path`.
+        """
+        with self._lock:
+            self._memory.clear()
+        if self.path is not None:
+            with self._transaction() as db:
+                db.execute("DELETE FROM entries")
+
+    def _remember(self, key, entry):
+        with self._lock:
+            if _entry_size(entry) <= self.max_memory:
+                count = len(self._memory) + (key not in self._memory)
+                self._memory[key] = entry
+                # with a store in `path`, results evicted from memory are still cached
+                if self.path is None:
+                    self.evictions += count - len(self._memory)
+
+    def _record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        metrics_registry().counter("metadata_cache_total", {"result": "hit" if hit else "miss"}).inc()
+
+    def _connect(self):
+        return connect(self.path, self.INDEX_NAME)
+
+    def _transaction(self):
+        return Transaction(self._connection.get())
+
+
+def _entry_size(entry):
+    return len(entry[1])
+
+
+def canonical_query(params, tolerance=DEFAULT_TOLERANCE):
+    """
+    The canonical form of the body of a metadata query, which is the same
+    for equivalent queries: lists of products, satellites and fields are
+    sorted, datetimes are in UTC, and the coordinates of the geometry are
+    rounded to multiples of `tolerance`. Parameters which are None are dropped.
+
+    :param dict params: The body of a `/search` or `/summary` request.
+    :param float tolerance: The precision of the coordinates of the geometry.
+    :rtype: dict
+    """
+    canonical = {}
+    for name, value in params.items():
+        if value is None:
+            continue
+        if name in _UNORDERED and isinstance(value, (list, tuple)):
+            value = sorted(value)
+        elif name == "geom":
+            value = _canonical_geometry(value, tolerance)
+        elif name in ("start_datetime", "end_datetime"):
+            try:
+                value = parse_datetime(value).isoformat()
+            except ValueError:
+                pass
+        canonical[name] = value
+    return canonical
+
+
+def _canonical_geometry(geom, tolerance):
+    if isinstance(geom, string_types):
+        try:
+            geom = json.loads(geom)
+        except ValueError:
+            import shapely.geometry
+            import shapely.wkt
+
+            geom = shapely.geometry.mapping(shapely.wkt.loads(geom))
+    if geom.get("type") == "Feature":
+        geom = geom["geometry"]
+
+    if "geometries" in geom:
+        return {
+            "type": geom["type"],
+            "geometries": [_canonical_geometry(g, tolerance) for g in geom["geometries"]],
+        }
+    return {"type": geom.get("type"), "coordinates": _round(geom.get("coordinates"), tolerance)}
+
+
+def _round(coordinates, tolerance):
+    if isinstance(coordinates, (list, tuple)):
+        return [_round(c, tolerance) for c in coordinates]
+    if isinstance(coordinates, (int, float)):
+        return int(round(coordinates / tolerance))
+    return coordinates
@@ -18,6 +18,7 @@ import itertools
 from warnings import warn, simplefilter
 from six import string_types
 from descarteslabs.client.services.service import Service
+from descarteslabs.client.services.service.codec import iter_response_array
 from descarteslabs.client.services.places import Places
 from descarteslabs.client.auth import Auth
 from descarteslabs.client.deprecation import check_deprecated_kwargs
@@ -27,6 +28,10 @@ from descarteslabs.common.property_filtering.filtering import (
     GenericProperties,
 )
 from descarteslabs.common.dotdict import DotDict, DotList
+from descarteslabs.common.threading.executor import map_ordered
+from descarteslabs.common.threading.readahead import DEFAULT_DEPTH, ReadAhead
+from .sharding import shard_params, sharded_features
+from .table import FeatureTable
 
 
 SOURCES_DEPRECATION_MESSAGE = (
@@ -35,6 +40,11 @@ SOURCES_DEPRECATION_MESSAGE = (
     "Metadata.available_products() or Metadata.products() instead. "
 )
 
+# Number of ids looked up by each `/batch/images` request of `Metadata.iter_by_ids`,
+# and maximum number of these requests running at once
+DEFAULT_IDS_CHUNK_SIZE = 1000
+DEFAULT_MAX_WORKERS = 8
+
 
 class Metadata(Service):
     """
@@ -50,10 +60,13 @@ class Metadata(Service):
 
     properties = GenericProperties()
 
-    def __init__(self, url=None, auth=None):
+    def __init__(self, url=None, auth=None, cache=None):
         """The parent Service class implements authentication and exponential
         backoff/retry. Override the url parameter to use a different instance
         of the backing service.
+
+        :param MetadataCache cache: An optional cache for the results of searches
+            and summaries. Randomized searches are never cached.
         """
         if auth is None:
             auth = Auth()
@@ -66,6 +79,7 @@ class Metadata(Service):
             )
 
         super(Metadata, self).__init__(url, auth=auth)
+        self.cache = cache
         self._raster = Raster(auth=self.auth)
 
     def sources(self):
@@ -355,8 +369,11 @@ class Metadata(Service):
         if pixels:
             kwargs["pixels"] = pixels
 
-        r = self.session.post("/summary", json=kwargs)
-        return DotDict(r.json())
+        return DotDict(self._cached("/summary", kwargs, self._post_summary))
+
+    def _post_summary(self, params):
+        r = self.session.post("/summary", json=params)
+        return r.json()
 
     def _query(
         self,
@@ -386,6 +403,85 @@ class Metadata(Service):
         Use :py:func:`search` or :py:func:`features` instead, which batch searches into smaller requests
         and handle paging for you.
         """
+        kwargs = self._search_params(
+            products=products,
+            sat_ids=sat_ids,
+            date=date,
+            place=place,
+            geom=geom,
+            start_datetime=start_datetime,
+            end_datetime=end_datetime,
+            cloud_fraction=cloud_fraction,
+            cloud_fraction_0=cloud_fraction_0,
+            fill_fraction=fill_fraction,
+            q=q,
+            limit=limit,
+            fields=fields,
+            dltile=dltile,
+            sort_field=sort_field,
+            sort_order=sort_order,
+            randomize=randomize,
+            continuation_token=continuation_token,
+            **kwargs
+        )
+
+        return self._search_page(kwargs)
+
+    def _search_page(self, params):
+        """The ``FeatureCollection`` of a `/search` request with the given body"""
+        return DotDict(self._cached("/search", params, self._post_search))
+
+    def _post_search(self, params):
+        r = self.session.post("/search", json=params)
+
+        fc = {"type": "FeatureCollection", "features": r.json()}
+
+        if "x-continuation-token" in r.headers:
+            fc["properties"] = {"continuation_token": r.headers["x-continuation-token"]}
+
+        return fc
+
+    def _cached(self, path, params, request):
+        # the result of `request(params)`, from the cache if any. Pages of results
+        # are cached with their continuation token, so that the following pages
+        # are requested with the same token, and found in the cache as well
+        # (see `_SearchPages` for the pages of a walk).
+        if self.cache is None or params.get("random_seed"):
+            return request(params)
+
+        key = self._cache_key(path, params)
+        result = self.cache.get(key)
+        if result is None:
+            result = request(params)
+            self.cache.set(key, result)
+        return result
+
+    def _cache_key(self, path, params):
+        return self.cache.key(self.base_url + path, params, identity=self.auth.namespace)
+
+    def _search_params(
+        self,
+        products=None,
+        sat_ids=None,
+        date="acquired",
+        place=None,
+        geom=None,
+        start_datetime=None,
+        end_datetime=None,
+        cloud_fraction=None,
+        cloud_fraction_0=None,
+        fill_fraction=None,
+        q=None,
+        limit=100,
+        fields=None,
+        dltile=None,
+        sort_field=None,
+        sort_order="asc",
+        randomize=None,
+        continuation_token=None,
+        **kwargs
+    ):
+        """The body of a `/search` request for the arguments of :py:func:`_query`"""
         check_deprecated_kwargs(
             kwargs,
             {
@@ -465,14 +561,7 @@ class Metadata(Service):
         if continuation_token is not None:
             kwargs["continuation_token"] = continuation_token
 
-        r = self.session.post("/search", json=kwargs)
-
-        fc = {"type": "FeatureCollection", "features": r.json()}
-
-        if "x-continuation-token" in r.headers:
-            fc["properties"] = {"continuation_token": r.headers["x-continuation-token"]}
-
-        return DotDict(fc)
+        return kwargs
 
     def search(
         self,
@@ -493,6 +582,8 @@ class Metadata(Service):
         sort_field=None,
         sort_order="asc",
         randomize=None,
+        parallel=None,
+        shard_by=None,
         **kwargs
     ):
         """Search metadata given a spatio-temporal query. All parameters are
@@ -518,6 +609,9 @@ class Metadata(Service):
         :param str sort_field: Property to sort on.
         :param str sort_order: Order of sort.
         :param bool randomize: Randomize the results. You may also use an `int` or `str` as an explicit seed.
+        :param int parallel: Number of shards to split the search into, searched
+            concurrently. See :py:func:`features`.
+        :param str shard_by: How to split the search into shards. See :py:func:`features`.
 
         return: GeoJSON ``FeatureCollection``
 
@@ -567,6 +661,8 @@ class Metadata(Service):
             sort_field=sort_field,
             sort_order=sort_order,
             randomize=randomize,
+            parallel=parallel,
+            shard_by=shard_by,
             **kwargs
         )
         limited_features = itertools.islice(features_iter, limit)
@@ -688,11 +784,37 @@ class Metadata(Service):
         sort_field=None,
         sort_order="asc",
         randomize=None,
+        prefetch=DEFAULT_DEPTH,
+        parallel=None,
+        shard_by=None,
+        stream=False,
         **kwargs
     ):
         """Generator that efficiently scrolls through the search results.
 
         :param int batch_size: Number of features to fetch per request.
+        :param int prefetch: Number of batches to request in the background
+            while the current batch is consumed, 1 by default. The batches are
+            requested by a daemon thread started for each iteration, which
+            stops when the iteration completes or is closed. If 0, no thread
+            is started, and batches are requested only when needed.
+        :param int parallel: Number of shards to split the search into. The
+            shards are searched concurrently, each requesting its next batch while
+            the current one is consumed (``prefetch`` is ignored), and their
+            features are merged without duplicates. Unless ``sort_field`` is given,
+            features are generated in the order their batches are received.
+            If None or 1, the search is not split.
+        :param str shard_by: ``"time"`` to split the search into disjoint intervals
+            between ``start_datetime`` and ``end_datetime``, ``"space"`` to split the
+            region of interest into strips, or ``"both"``. If None, the search is
+            split by time if ``start_datetime`` and ``end_datetime`` are ISO 8601
+            datetimes, otherwise by space if there is a region of interest.
+        :param bool stream: Whether to decode each batch incrementally as it's
+            received, generating its features before the whole batch has arrived,
+            and holding only part of it in memory at once. The next batch is
+            requested as soon as the first feature of a batch is received, and
+            ``prefetch`` batches are requested ahead. Ignored with ``parallel``,
+            or with a ``cache``.
 
         :return: Generator of GeoJSON ``Feature`` objects.
 
@@ -712,10 +834,11 @@ class Metadata(Service):
             31898
         """
 
-        continuation_token = None
+        if parallel is not None and parallel < 1:
+            raise ValueError("parallel must be greater than 0")
 
-        while True:
-            result = self._query(
+        if parallel is not None and parallel > 1:
+            params = self._search_params(
                 sat_ids=sat_ids,
                 products=products,
                 date=date,
@@ -733,19 +856,128 @@ class Metadata(Service):
                 sort_field=sort_field,
                 sort_order=sort_order,
                 randomize=randomize,
-                continuation_token=continuation_token,
                 **kwargs
             )
+            features = sharded_features(
+                _SearchPages(self),
+                shard_params(params, parallel, shard_by=shard_by),
+                # randomized results aren't sorted
+                sort_field=None if randomize else sort_field,
+                sort_order=sort_order,
+            )
+            try:
+                for feature in features:
+                    yield feature
+            finally:
+                features.close()
+            return
+
+        query = dict(
+            sat_ids=sat_ids,
+            products=products,
+            date=date,
+            place=place,
+            geom=geom,
+            start_datetime=start_datetime,
+            end_datetime=end_datetime,
+            cloud_fraction=cloud_fraction,
+            cloud_fraction_0=cloud_fraction_0,
+            fill_fraction=fill_fraction,
+            q=q,
+            fields=fields,
+            limit=batch_size,
+            dltile=dltile,
+            sort_field=sort_field,
+            sort_order=sort_order,
+            randomize=randomize,
+            **kwargs
+        )
+
+        if stream and self.cache is None:
+            pages = self._streamed_feature_pages(self._search_params(**query))
+            with ReadAhead(pages, depth=prefetch) as pages:
+                for page in pages:
+                    try:
+                        for feature in page:
+                            yield feature
+                    finally:
+                        page.close()
+            return
+
+        pages = self._feature_pages(**query)
+
+        with ReadAhead(pages, depth=prefetch) as pages:
+            for page in pages:
+                for feature in page:
+                    yield feature
+
+    def features_table(self, fields=None, geometries=False, **kwargs):
+        """Search features like :py:func:`features`, into a :py:class:`FeatureTable`
+        holding a column per property instead of a dictionary per feature.
+
+        Takes the same parameters as :py:func:`features`, and:
+
+        :param list(str) fields: Properties to return, and make columns of.
+            All the properties of the features if None.
+        :param bool geometries: Whether to keep the geometries of the features,
+            as WKB. Their bounds are always kept.
+
+        :return: The ``FeatureTable`` of the features.
+
+        Example::
+
+            >>> from descarteslabs.client.services import Metadata
+            >>> table = Metadata().features_table(
+            ...     "landsat:LC08:PRE:TOAR",
+            ...     start_datetime='2016-01-01',
+            ...     end_datetime="2016-03-01"
+            ... )
+            >>> clear = table[table["cloud_fraction"] < 0.1]
+            >>> len(clear) # doctest: +SKIP
+            8102
+        """
+        return FeatureTable.from_features(
+            self.features(fields=fields, **kwargs), fields=fields, geometries=geometries
+        )
+
+    def _feature_pages(self, **kwargs):
+        params = self._search_params(**kwargs)
+        search_page = _SearchPages(self)
+
+        while True:
+            result = search_page(params)
 
             if not result["features"]:
                 break
 
-            for feature in result["features"]:
-                yield feature
+            yield result["features"]
 
             continuation_token = result["properties"].get("continuation_token")
             if not continuation_token:
                 break
+            params = dict(params, continuation_token=continuation_token)
+
+    def _streamed_feature_pages(self, params):
+        # like `_feature_pages`, generating each page as a generator of its features,
+        # decoded as they're received, and requesting the next page once it's started
+        continuation_token = None
+
+        while True:
+            if continuation_token is not None:
+                params = dict(params, continuation_token=continuation_token)
+            r = self.session.post("/search", json=params, stream=True)
+
+            features = iter_response_array(r)
+            first = next(features, None)
+            if first is None:
+                features.close()
+                break
+
+            yield _Page(first, features)
+
+            continuation_token = r.headers.get("x-continuation-token")
+            if not continuation_token:
+                break
 
     def get(self, image_id):
         """Get metadata of a single image.
@@ -769,25 +1001,73 @@ class Metadata(Service):
         r = self.session.get("/get/{}".format(image_id))
         return DotDict(r.json())
 
-    def get_by_ids(self, ids, fields=None, ignore_not_found=True, **kwargs):
+    def get_by_ids(self, ids, fields=None, ignore_not_found=True, chunk_size=DEFAULT_IDS_CHUNK_SIZE,
+                   max_workers=None, stream=False, **kwargs):
         """Get metadata for multiple images by id. The response contains found images in the
         order of the given ids.
 
+        The ids are looked up in chunks of `chunk_size` ids, with concurrent requests
+        (see :py:meth:`iter_by_ids`).
+
         :param list(str) ids: Image identifiers.
         :param list(str) fields: Properties to return.
         :param bool ignore_not_found: For image id lookups that fail: if :py:obj:`True`, ignore;
                                       if :py:obj:`False`, raise :py:exc:`NotFoundError`. Default is :py:obj:`True`.
+        :param int chunk_size: Number of ids looked up by each request.
+        :param int max_workers: Maximum number of requests running at once,
+            `DEFAULT_MAX_WORKERS` if None.
+        :param bool stream: Whether to decode each response incrementally as it's
+            received, holding only part of it in memory at once.
 
         :return: List of image metadata.
         :rtype: list(dict)
         """
-        kwargs["ids"] = ids
+        return DotList(self.iter_by_ids(
+            ids, fields=fields, ignore_not_found=ignore_not_found, chunk_size=chunk_size,
+            max_workers=max_workers, stream=stream, **kwargs
+        ))
+
+    def iter_by_ids(self, ids, fields=None, ignore_not_found=True, chunk_size=DEFAULT_IDS_CHUNK_SIZE,
+                    max_workers=None, stream=False, **kwargs):
+        """Generate the metadata of images by id, in the order of the given ids.
+
+        The ids are looked up in chunks of `chunk_size` ids, by requests running
+        concurrently on the shared
+        :py:func:`~descarteslabs.common.threading.executor.io_executor`. At most
+        `max_workers` chunks are requested or held at once, so that large numbers
+        of ids, which can also be generated as they are read, take bounded memory.
+
+        :param iterable(str) ids: Image identifiers.
+        :param list(str) fields: Properties to return.
+        :param bool ignore_not_found: For image id lookups that fail: if :py:obj:`True`, ignore;
+                                      if :py:obj:`False`, raise :py:exc:`NotFoundError`. Default is :py:obj:`True`.
+        :param int chunk_size: Number of ids looked up by each request.
+        :param int max_workers: Maximum number of chunks requested or held at once,
+            `DEFAULT_MAX_WORKERS` if None.
+        :param bool stream: Whether to decode each response incrementally as it's
+            received, holding only part of it in memory at once.
+
+        :return: Generator of image metadata.
+        :rtype: generator(dict)
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be greater than 0")
+
         kwargs["ignore_not_found"] = ignore_not_found
         if fields is not None:
             kwargs["fields"] = fields
 
-        r = self.session.post("/batch/images", json=kwargs)
-        return DotList(r.json())
+        def lookup(chunk):
+            r = self.session.post("/batch/images", json=dict(kwargs, ids=chunk), stream=stream)
+            # streamed responses are decoded as they're received, not to hold them entirely in memory
+            features = iter_response_array(r) if stream else r.json()
+            return [DotDict(feature) for feature in features]
+
+        ids = iter(ids)
+        chunks = iter(lambda: list(itertools.islice(ids, chunk_size)), [])
+        for features in map_ordered(lookup, chunks, max_workers=max_workers or DEFAULT_MAX_WORKERS):
+            for feature in features:
+                yield feature
 
     def get_product(self, product_id):
         """Get information about a single product.
@@ -815,3 +1095,80 @@ class Metadata(Service):
         """
         r = self.session.get("/bands/derived/{}".format(derived_band_id))
         return DotDict(r.json())
+
+
+class _Page(object):
+    # the DotDict features of a streamed page, closing its response when closed,
+    # even if it wasn't iterated
+
+    def __init__(self, first, features):
+        self._first = first
+        self._features = features
+
+    def __iter__(self):
+        try:
+            yield DotDict(self._first)
+            for feature in self._features:
+                yield DotDict(feature)
+        finally:
+            self.close()
+
+    def close(self):
+        self._features.close()
+
+
+class _SearchPages(object):
+    """
+    Requests the pages of the continuation chains of `/search` requests made
+    by `metadata`, from its cache if any.
+
+    A cached page holds the continuation token of the following page, which
+    may have expired by the time the following page isn't cached anymore. So
+    the page following a page from the cache is only taken from the cache: if
+    it isn't cached, its chain is requested again from the first page, without
+    the cache, to get a fresh continuation token.
+    """
+
+    def __init__(self, metadata):
+        self._metadata = metadata
+        # by the continuation token of each page returned: the body of the first request
+        # of its chain, the index of the following page, and whether the page was cached
+        self._chains = {}
+
+    def __call__(self, params):
+        metadata = self._metadata
+        if metadata.cache is None or params.get("random_seed"):
+            return DotDict(metadata._post_search(params))
+
+        token = params.get("continuation_token")
+        first, index, cached = (params, 0, True) if token is None else self._chains.pop(token, (params, 0, False))
+
+        key = metadata._cache_key("/search", params)
+        result = metadata.cache.get(key) if cached else None
+        if result is None:
+            if cached and token is not None:
+                result = self._walk(first, index)
+            else:
+                result = metadata._post_search(params)
+                metadata.cache.set(key, result)
+            cached = False
+
+        token = (result.get("properties") or {}).get("continuation_token")
+        if token:
+            self._chains[token] = (first, index + 1, cached)
+        return DotDict(result)
+
+    def _walk(self, first, index):
+        # the page at `index` of the chain starting with `first`, requesting and caching
+        # every page up to it
+        metadata = self._metadata
+        params = first
+        for i in range(index + 1):
+            result = metadata._post_search(params)
+            metadata.cache.set(metadata._cache_key("/search", params), result)
+            token = (result.get("properties") or {}).get("continuation_token")
+            if i < index and not token:
+                # the chain is now shorter
+                return {"type": "FeatureCollection", "features": []}
+            params = dict(first, continuation_token=token)
+        return result
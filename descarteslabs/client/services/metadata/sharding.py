@@ -0,0 +1,335 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Sharded metadata searches (see ``Metadata.features(parallel=...)``).
+
+The body of a `/search` request is split into shards covering disjoint
+time intervals and/or parts of its geometry, the continuation chain of
+each shard is walked concurrently on the shared I/O executor, and their
+features are merged into a single stream without duplicates (a scene
+overlapping two parts of the geometry, or acquired on the boundary of two
+time intervals, is found by both shards).
+"""
+
+import datetime
+import heapq
+import json
+import math
+import re
+
+from six import string_types
+
+from descarteslabs.client.addons import concurrent
+from descarteslabs.common.threading.executor import io_executor
+
+SHARD_BY = ("time", "space", "both")
+
+_DATETIME = re.compile(
+    r"^(\d{4})-(\d{2})-(\d{2})"
+    r"(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.(\d+))?)?)?"
+    r"\s*(Z|[+-]\d{2}:?\d{2})?$"
+)
+
+_DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+def parse_datetime(value):
+    """
+    The naive UTC datetime of an ISO 8601 date or datetime string.
+    Raises ValueError for other values.
+    """
+    match = _DATETIME.match(value.strip()) if isinstance(value, string_types) else None
+    if match is None:
+        raise ValueError("Cannot parse {!r} as an ISO 8601 datetime".format(value))
+
+    year, month, day, hour, minute, second, fraction, zone = match.groups()
+    when = datetime.datetime(
+        int(year), int(month), int(day),
+        int(hour or 0), int(minute or 0), int(second or 0),
+        int((fraction or "0")[:6].ljust(6, "0")),
+    )
+    if zone and zone != "Z":
+        sign = 1 if zone[0] == "+" else -1
+        zone = zone[1:].replace(":", "")
+        when -= sign * datetime.timedelta(hours=int(zone[:2]), minutes=int(zone[2:]))
+    return when
+
+
+def time_shards(start_datetime, end_datetime, count):
+    """
+    Split the interval from `start_datetime` to `end_datetime` (ISO 8601
+    strings) into `count` intervals of the same length.
+
+    :return: A list of ``(start_datetime, end_datetime)`` tuples. The first and last
+        bounds are the given ones, the others are UTC datetimes.
+    :rtype: list(tuple)
+    """
+    start, end = parse_datetime(start_datetime), parse_datetime(end_datetime)
+    if end <= start or count <= 1:
+        return [(start_datetime, end_datetime)]
+
+    step = (end - start) / count
+    bounds = [start_datetime]
+    bounds.extend((start + step * i).strftime(_DATETIME_FORMAT) for i in range(1, count))
+    bounds.append(end_datetime)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def space_shards(geom, count):
+    """
+    Split a GeoJSON or WKT geometry into at most `count` parts, by cutting
+    it into strips of the same width across the longest side of its bounds.
+    Geometries without an area are not split.
+
+    :return: A list of GeoJSON geometry strings.
+    :rtype: list(str)
+    """
+    import shapely.geometry
+    import shapely.wkt
+
+    if isinstance(geom, string_types):
+        try:
+            geom = json.loads(geom)
+        except ValueError:
+            geom = shapely.geometry.mapping(shapely.wkt.loads(geom))
+    if geom.get("type") == "Feature":
+        geom = geom["geometry"]
+
+    shape = shapely.geometry.shape(geom)
+    if count <= 1 or shape.area == 0:
+        return [json.dumps(geom)]
+
+    minx, miny, maxx, maxy = shape.bounds
+    vertical = maxx - minx >= maxy - miny
+    step = ((maxx - minx) if vertical else (maxy - miny)) / count
+
+    shards = []
+    for i in range(count):
+        if vertical:
+            strip = shapely.geometry.box(minx + step * i, miny, minx + step * (i + 1), maxy)
+        else:
+            strip = shapely.geometry.box(minx, miny + step * i, maxx, miny + step * (i + 1))
+        part = _polygonal(shape.intersection(strip))
+        if part is not None:
+            shards.append(json.dumps(shapely.geometry.mapping(part)))
+    return shards
+
+
+def _polygonal(shape):
+    # the polygons of an intersection, without the lines and points where it only touches
+    import shapely.geometry
+
+    if shape.is_empty or shape.area == 0:
+        return None
+    if shape.geom_type == "GeometryCollection":
+        polygons = []
+        for part in shape.geoms:
+            if part.geom_type == "Polygon" and part.area > 0:
+                polygons.append(part)
+            elif part.geom_type == "MultiPolygon":
+                polygons.extend(p for p in part.geoms if p.area > 0)
+        return shapely.geometry.MultiPolygon(polygons)
+    return shape
+
+
+def shard_params(params, count, shard_by=None):
+    """
+    Split the body of a `/search` request into the bodies of the requests of
+    at most `count` shards, which together find the same features.
+
+    :param dict params: The body of the `/search` request.
+    :param int count: The number of shards.
+    :param str shard_by: ``"time"`` to split the interval between ``start_datetime``
+        and ``end_datetime``, ``"space"`` to split ``geom``, or ``"both"``.
+        If None, the interval is split if both of its bounds are ISO 8601 datetimes,
+        otherwise the geometry if there is one, otherwise the search isn't split.
+
+    :return: A list of request bodies.
+    :rtype: list(dict)
+    """
+    if shard_by is not None and shard_by not in SHARD_BY:
+        raise ValueError("shard_by must be one of {}, not {!r}".format(", ".join(SHARD_BY), shard_by))
+
+    has_interval = bool(params.get("start_datetime") and params.get("end_datetime"))
+    has_geom = bool(params.get("geom"))
+
+    if shard_by is None:
+        if has_interval and _is_datetime(params["start_datetime"]) and _is_datetime(params["end_datetime"]):
+            shard_by = "time"
+        elif has_geom:
+            shard_by = "space"
+        else:
+            return [params]
+
+    if shard_by in ("time", "both") and not has_interval:
+        raise ValueError("Sharding by time requires both start_datetime and end_datetime")
+    if shard_by in ("space", "both") and not has_geom:
+        raise ValueError("Sharding by space requires a geometry")
+
+    if shard_by == "both":
+        time_count = int(math.ceil(math.sqrt(count)))
+        space_count = max(count // time_count, 1)
+    else:
+        time_count = count if shard_by == "time" else 1
+        space_count = count if shard_by == "space" else 1
+
+    intervals = [(params.get("start_datetime"), params.get("end_datetime"))]
+    if time_count > 1:
+        intervals = time_shards(params["start_datetime"], params["end_datetime"], time_count)
+    geoms = [params.get("geom")]
+    if space_count > 1:
+        geoms = space_shards(params["geom"], space_count)
+
+    shards = []
+    for start_datetime, end_datetime in intervals:
+        for geom in geoms:
+            shard = dict(params)
+            if start_datetime is not None:
+                shard["start_datetime"] = start_datetime
+                shard["end_datetime"] = end_datetime
+            if geom is not None:
+                shard["geom"] = geom
+            shards.append(shard)
+    return shards
+
+
+def _is_datetime(value):
+    try:
+        parse_datetime(value)
+    except ValueError:
+        return False
+    return True
+
+
+class _Chain(object):
+    """The continuation chain of a shard, requesting each page while the previous one is consumed"""
+
+    def __init__(self, fetch, params, executor):
+        self._fetch = fetch
+        self._params = params
+        self._executor = executor
+        self.future = executor.submit(fetch, params)
+
+    def page(self):
+        """The features of the next page, blocking until it's received"""
+        result = self.future.result()
+        features = result["features"]
+        token = (result.get("properties") or {}).get("continuation_token")
+        if features and token:
+            self.future = self._executor.submit(self._fetch, dict(self._params, continuation_token=token))
+        else:
+            self.future = None
+        return features
+
+    def features(self):
+        while self.future is not None:
+            for feature in self.page():
+                yield feature
+
+    def cancel(self):
+        if self.future is not None:
+            self.future.cancel()
+
+
+class _SortKey(object):
+    # orders features by a property, with the features missing it last
+    __slots__ = ("value", "reverse")
+
+    def __init__(self, value, reverse):
+        self.value = value
+        self.reverse = reverse
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __lt__(self, other):
+        if self.value is None or other.value is None:
+            return self.value is not None and other.value is None
+        return other.value < self.value if self.reverse else self.value < other.value
+
+
+def _merge(streams, sort_field, reverse):
+    # k-way merge of the sorted streams of features, ties going to the first stream
+    def key(feature):
+        return _SortKey((feature.get("properties") or {}).get(sort_field), reverse)
+
+    heap = []
+    for i, stream in enumerate(streams):
+        for feature in stream:
+            heap.append((key(feature), i, feature, stream))
+            break
+    heapq.heapify(heap)
+
+    while heap:
+        _, i, feature, stream = heap[0]
+        yield feature
+        for feature in stream:
+            heapq.heapreplace(heap, (key(feature), i, feature, stream))
+            break
+        else:
+            heapq.heappop(heap)
+
+
+def sharded_features(fetch, shards, sort_field=None, sort_order="asc", executor=None):
+    """
+    Generate the features found by the continuation chains of `shards`,
+    walked concurrently, without duplicates.
+
+    :param callable fetch: Called with the body of a `/search` request, returns
+        its ``FeatureCollection`` with the ``continuation_token`` of the next page
+        in its ``properties``.
+    :param list(dict) shards: The bodies of the first requests of the shards.
+    :param str sort_field: If given, the property the results of each shard are sorted
+        on, and the features of the shards are merged to keep them sorted.
+        Otherwise features are generated in the order their pages are received.
+    :param str sort_order: ``"asc"`` or ``"desc"``.
+    :param executor: The executor running the requests, the shared
+        :py:func:`~descarteslabs.common.threading.executor.io_executor` if None.
+    """
+    if executor is None:
+        executor = io_executor()
+
+    chains = []
+    seen = set()
+    try:
+        for params in shards:
+            chains.append(_Chain(fetch, params, executor))
+
+        if sort_field is not None:
+            streams = [chain.features() for chain in chains]
+            for feature in _merge(streams, sort_field, sort_order == "desc"):
+                if feature["id"] not in seen:
+                    seen.add(feature["id"])
+                    yield feature
+            return
+
+        pending = {chain.future: chain for chain in chains}
+        while pending:
+            done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                chain = pending.pop(future)
+                features = chain.page()
+                if chain.future is not None:
+                    pending[chain.future] = chain
+                for feature in features:
+                    if feature["id"] not in seen:
+                        seen.add(feature["id"])
+                        yield feature
+    finally:
+        for chain in chains:
+            chain.cancel()
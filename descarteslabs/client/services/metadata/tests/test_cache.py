@@ -0,0 +1,198 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from descarteslabs.client.auth import Auth
+from descarteslabs.client.services.metadata import Metadata, MetadataCache
+from descarteslabs.client.services.metadata.cache import canonical_query
+from descarteslabs.client.services.raster.tests.iowa_geometry import iowa_geom
+from descarteslabs.client.services.service.metrics import metrics_registry
+from descarteslabs.client.stubserver import Catalog, StubPlatform, stub_token
+
+SQUARE = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]]}
+
+
+class TestCanonicalQuery(unittest.TestCase):
+
+    def key(self, **params):
+        return MetadataCache().key("https://example.com/search", params)
+
+    def test_equivalent_queries(self):
+        self.assertEqual(
+            self.key(products=["a", "b"], geom=json.dumps(SQUARE), start_datetime="2018-01-01", limit=10),
+            self.key(limit=10, products=["b", "a"], geom=SQUARE, start_datetime="2018-01-01T00:00:00Z", q=None),
+        )
+        self.assertEqual(
+            self.key(geom="POLYGON ((0 0, 1 0, 1 1, 0 1, 0 0))"),
+            self.key(geom={"type": "Feature", "geometry": dict(SQUARE), "properties": {}}),
+        )
+        shifted = {"type": "Polygon", "coordinates": [[[x + 1e-9, y] for x, y in SQUARE["coordinates"][0]]]}
+        self.assertEqual(self.key(geom=shifted), self.key(geom=SQUARE))
+
+    def test_different_queries(self):
+        self.assertNotEqual(self.key(products=["a"]), self.key(products=["b"]))
+        self.assertNotEqual(self.key(start_datetime="2018-01-01"), self.key(start_datetime="2018-01-02"))
+        self.assertNotEqual(self.key(query_expr={"op": "and", "args": [1]}), self.key(query_expr={"op": "and"}))
+        shifted = {"type": "Polygon", "coordinates": [[[x + 1e-3, y] for x, y in SQUARE["coordinates"][0]]]}
+        self.assertNotEqual(self.key(geom=shifted), self.key(geom=SQUARE))
+        self.assertNotEqual(MetadataCache().key("https://a", {}), MetadataCache().key("https://b", {}))
+        self.assertNotEqual(MetadataCache().key("https://a", {}, "a"), MetadataCache().key("https://a", {}, "b"))
+
+    def test_canonical_query(self):
+        self.assertEqual(
+            canonical_query({"sat_ids": ["b", "a"], "end_datetime": "2018-01-01T02:00:00+02:00", "fields": None}),
+            {"sat_ids": ["a", "b"], "end_datetime": "2018-01-01T00:00:00"},
+        )
+
+
+class TestMetadataCache(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_memory(self):
+        cache = MetadataCache()
+        self.assertIsNone(cache.get("a"))
+        cache.set("a", {"features": [1, 2]})
+
+        value = cache.get("a")
+        self.assertEqual(value, {"features": [1, 2]})
+        value["features"].append(3)
+        self.assertEqual(cache.get("a"), {"features": [1, 2]})
+        self.assertEqual(cache.stats, {"hits": 2, "misses": 1, "evictions": 0})
+
+    @mock.patch("descarteslabs.client.services.metadata.cache.time.time")
+    def test_ttl(self, now):
+        now.return_value = 1000.0
+        cache = MetadataCache(ttl=10, path=self.path)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=100)
+
+        now.return_value = 1011.0
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), 2)
+        self.assertIsNone(MetadataCache(path=self.path).get("a"))
+        self.assertEqual(MetadataCache(path=self.path).get("b"), 2)
+
+    def test_max_memory(self):
+        cache = MetadataCache(max_memory=25)
+        cache.set("a", "x" * 10)
+        cache.set("b", "y" * 10)
+        cache.get("a")
+        cache.set("c", "z" * 10)
+        cache.set("d", "z" * 100)
+        self.assertEqual(cache.get("a"), "x" * 10)
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNone(cache.get("d"))
+        self.assertEqual(cache.stats["evictions"], 1)
+
+    def test_shared(self):
+        MetadataCache(path=self.path).set("a", [1])
+        other = MetadataCache(path=self.path, max_size=25)
+        self.assertEqual(other.get("a"), [1])
+
+        other.set("b", "y" * 10)
+        other.set("c", "z" * 10)
+        self.assertIsNone(MetadataCache(path=self.path).get("a"))
+        self.assertEqual(MetadataCache(path=self.path).get("c"), "z" * 10)
+        self.assertEqual(other.stats["evictions"], 1)
+
+        other.clear()
+        self.assertIsNone(MetadataCache(path=self.path).get("c"))
+        self.assertIsNone(other.get("c"))
+
+
+class TestMetadataWithCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.platform = StubPlatform(catalog=Catalog(scenes=100)).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.platform.stop()
+
+    def setUp(self):
+        self.metadata = Metadata(url=self.platform.service_url("DESCARTESLABS_METADATA_URL"),
+                                 auth=self.platform.auth(), cache=MetadataCache())
+
+    def requests(self, endpoint):
+        return self.platform.counts["POST /metadata/v1/" + endpoint]
+
+    def test_features(self):
+        before = self.requests("search")
+        features = list(self.metadata.features(geom=iowa_geom, products=["stub:synthetic"], batch_size=30))
+        self.assertEqual(len(features), 100)
+        self.assertEqual(self.requests("search"), before + 5)
+
+        hits = metrics_registry().counter("metadata_cache_total", {"result": "hit"}).value
+        self.assertEqual(list(self.metadata.features(geom=iowa_geom, products="stub:synthetic", batch_size=30)),
+                         features)
+        self.assertEqual(self.requests("search"), before + 5)
+        self.assertEqual(metrics_registry().counter("metadata_cache_total", {"result": "hit"}).value, hits + 5)
+
+    def test_evicted_page(self):
+        cache = self.metadata.cache
+        with mock.patch.object(cache, "set", wraps=cache.set) as set_:
+            features = list(self.metadata.features(geom=iowa_geom, products=["stub:synthetic"], batch_size=30))
+        keys = [call[0][0] for call in set_.call_args_list]
+        self.assertEqual(len(keys), 5)
+
+        # the third page is evicted, so the continuation token of the second page
+        # in the cache may have expired: the walk starts again from the first page
+        get = cache.get
+        with mock.patch.object(cache, "get", side_effect=lambda key: None if key == keys[2] else get(key)), \
+                mock.patch.object(self.metadata, "_post_search", wraps=self.metadata._post_search) as post:
+            self.assertEqual(
+                list(self.metadata.features(geom=iowa_geom, products=["stub:synthetic"], batch_size=30, prefetch=0)),
+                features
+            )
+        tokens = [call[0][0].get("continuation_token") for call in post.call_args_list]
+        self.assertEqual(tokens, [None, "30", "60", "90", "100"])
+
+    def test_randomize(self):
+        before = self.requests("search")
+        for _ in range(2):
+            self.assertEqual(len(list(self.metadata.features(randomize=1, prefetch=0))), 100)
+        # a page and the last empty page each time
+        self.assertEqual(self.requests("search"), before + 4)
+
+        # scenes.search sends random_seed=False when not randomizing
+        for _ in range(2):
+            self.assertEqual(len(list(self.metadata.features(randomize=False, prefetch=0))), 100)
+        self.assertEqual(self.requests("search"), before + 6)
+
+    def test_users(self):
+        other = Metadata(url=self.metadata.base_url, cache=self.metadata.cache,
+                         auth=Auth(jwt_token=stub_token(subject="stub|1"), token_info_path=None))
+        before = self.requests("search")
+        for metadata in (self.metadata, other, self.metadata):
+            self.assertEqual(len(list(metadata.features(start_datetime="2018-02-01", prefetch=0))), 69)
+        # a page and the last empty page for each user
+        self.assertEqual(self.requests("search"), before + 4)
+
+    def test_summary(self):
+        before = self.requests("summary")
+        summary = self.metadata.summary(start_datetime="2018-01-01", end_datetime="2018-02-01")
+        self.assertEqual(self.metadata.summary(start_datetime="2018-01-01", end_datetime="2018-02-01"), summary)
+        self.assertEqual(self.requests("summary"), before + 1)
@@ -13,10 +13,22 @@
 # limitations under the License.
 
 import itertools
+import time
 import unittest
 
+import mock
+
 from descarteslabs.client.services.metadata import Metadata
+from descarteslabs.client.services.metadata import metadata as metadata_module
 from descarteslabs.client.exceptions import NotFoundError
+from descarteslabs.client.stubserver import Catalog, StubPlatform
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
 
 
 class TestMetadata(unittest.TestCase):
@@ -275,5 +287,92 @@ class TestMetadata(unittest.TestCase):
         self.assertGreater(summary_r["count"], 0)
 
 
+class TestStreamedFeatures(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.platform = StubPlatform(catalog=Catalog(scenes=100)).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.platform.stop()
+
+    def setUp(self):
+        self.metadata = Metadata(url=self.platform.service_url("DESCARTESLABS_METADATA_URL"),
+                                 auth=self.platform.auth())
+
+    def test_features(self):
+        for prefetch in (0, 2):
+            features = list(self.metadata.features(batch_size=7, stream=True, prefetch=prefetch))
+            self.assertEqual(features, list(self.metadata.features(batch_size=7)))
+            self.assertEqual(len(features), 100)
+            self.assertEqual(features[-1].properties.product, "stub:synthetic")
+
+        self.assertEqual(list(self.metadata.features(start_datetime="2019-01-01", stream=True)), [])
+
+    def test_close(self):
+        features = self.metadata.features(batch_size=30, stream=True, prefetch=0)
+        self.assertEqual(len(list(itertools.islice(features, 10))), 10)
+        features.close()
+        # the connection was released to the pool, and is reused
+        self.assertEqual(len(list(self.metadata.features(batch_size=30, stream=True))), 100)
+
+    def test_get_by_ids(self):
+        ids = ["stub:synthetic:meta_{:08d}_v1".format(i) for i in range(50)]
+        for stream in (False, True):
+            features = self.metadata.get_by_ids(ids, stream=stream)
+            self.assertEqual([f.id for f in features], ids)
+            self.assertEqual(features[3].properties.product, "stub:synthetic")
+
+    def test_get_by_ids_not_streamed(self):
+        # decoded with the JSON codec, by default
+        with mock.patch("descarteslabs.client.services.metadata.metadata.iter_response_array") as iter_response_array:
+            self.assertEqual(len(self.metadata.get_by_ids(["stub:synthetic:meta_00000001_v1"])), 1)
+        iter_response_array.assert_not_called()
+
+    def test_abandoned_pages_closed(self):
+        pages = []
+        base = metadata_module._Page
+
+        class Page(base):
+            closed = False
+
+            def __init__(self, *args):
+                base.__init__(self, *args)
+                pages.append(self)
+
+            def close(self):
+                self.closed = True
+                base.close(self)
+
+        with mock.patch.object(metadata_module, "_Page", Page):
+            features = self.metadata.features(batch_size=10, stream=True, prefetch=2)
+            next(features)
+            # the page being consumed and the two pages read ahead
+            self.assertTrue(wait_for(lambda: len(pages) == 3))
+            features.close()
+            self.assertTrue(wait_for(lambda: all(page.closed for page in pages)))
+
+    def test_get_by_ids_chunked(self):
+        ids = ["stub:synthetic:meta_{:08d}_v1".format(i) for i in range(49, -1, -1)]
+        ids.insert(10, "stub:synthetic:missing")
+        count = self.platform.counts["POST /metadata/v1/batch/images"]
+        features = self.metadata.get_by_ids(ids, chunk_size=7, max_workers=3)
+        self.assertEqual([f.id for f in features], [i for i in ids if i != "stub:synthetic:missing"])
+        self.assertEqual(self.platform.counts["POST /metadata/v1/batch/images"] - count, 8)
+
+        with self.assertRaises(NotFoundError):
+            self.metadata.get_by_ids(ids, chunk_size=7, ignore_not_found=False)
+
+    def test_iter_by_ids(self):
+        ids = ("stub:synthetic:meta_{:08d}_v1".format(i) for i in range(25))
+        features = self.metadata.iter_by_ids(ids, fields=["product"], chunk_size=10)
+        self.assertEqual([f.id for f in features], ["stub:synthetic:meta_{:08d}_v1".format(i) for i in range(25)])
+        self.assertEqual(list(self.metadata.iter_by_ids([])), [])
+
+        with self.assertRaises(ValueError):
+            list(self.metadata.iter_by_ids(["stub:synthetic:meta_00000000_v1"], chunk_size=0))
+
+
 if __name__ == "__main__":
     unittest.main()
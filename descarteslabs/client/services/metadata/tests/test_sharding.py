@@ -0,0 +1,151 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import datetime
+import json
+import unittest
+
+import shapely.geometry
+
+from descarteslabs.client.services.metadata import Metadata
+from descarteslabs.client.services.raster import Raster
+from descarteslabs.client.services.metadata.sharding import (
+    parse_datetime,
+    shard_params,
+    sharded_features,
+    space_shards,
+    time_shards,
+)
+from descarteslabs.client.services.raster.tests.iowa_geometry import iowa_geom
+from descarteslabs.client.stubserver import Catalog, StubPlatform
+from descarteslabs.scenes import AOI, search
+
+
+class TestShards(unittest.TestCase):
+
+    def test_parse_datetime(self):
+        self.assertEqual(parse_datetime("2018-02-01"), datetime.datetime(2018, 2, 1))
+        self.assertEqual(parse_datetime("2018-02-01T10:20:30.25Z"), datetime.datetime(2018, 2, 1, 10, 20, 30, 250000))
+        self.assertEqual(parse_datetime("2018-02-01T10:20+02:00"), datetime.datetime(2018, 2, 1, 8, 20))
+        with self.assertRaises(ValueError):
+            parse_datetime("Feb 1st")
+
+    def test_time_shards(self):
+        shards = time_shards("2018-01-01", "2018-01-05", 4)
+        self.assertEqual(shards, [
+            ("2018-01-01", "2018-01-02T00:00:00.000000Z"),
+            ("2018-01-02T00:00:00.000000Z", "2018-01-03T00:00:00.000000Z"),
+            ("2018-01-03T00:00:00.000000Z", "2018-01-04T00:00:00.000000Z"),
+            ("2018-01-04T00:00:00.000000Z", "2018-01-05"),
+        ])
+        self.assertEqual(time_shards("2018-01-05", "2018-01-01", 4), [("2018-01-05", "2018-01-01")])
+
+    def test_space_shards(self):
+        shards = space_shards(json.dumps(iowa_geom), 5)
+        self.assertEqual(len(shards), 5)
+        parts = [shapely.geometry.shape(json.loads(shard)) for shard in shards]
+        iowa = shapely.geometry.shape(iowa_geom)
+        self.assertAlmostEqual(sum(part.area for part in parts), iowa.area)
+        self.assertAlmostEqual(parts[0].intersection(parts[1]).area, 0)
+
+        wkt = shapely.geometry.Point(1, 2).wkt
+        self.assertEqual(len(space_shards(wkt, 5)), 1)
+
+    def test_shard_params(self):
+        params = {"limit": 10, "start_datetime": "2018-01-01", "end_datetime": "2018-01-05", "geom": iowa_geom}
+        self.assertEqual(len(shard_params(params, 4)), 4)
+        self.assertEqual({shard["geom"]["type"] for shard in shard_params(params, 4)}, {"Polygon"})
+        self.assertEqual(len({shard["start_datetime"] for shard in shard_params(params, 4)}), 4)
+        self.assertEqual(len({shard["geom"] for shard in shard_params(params, 4, shard_by="space")}), 4)
+        self.assertEqual(len(shard_params(params, 4, shard_by="both")), 4)
+        self.assertEqual(shard_params({"limit": 10}, 4), [{"limit": 10}])
+
+        with self.assertRaises(ValueError):
+            shard_params({"limit": 10}, 4, shard_by="time")
+        with self.assertRaises(ValueError):
+            shard_params(params, 4, shard_by="date")
+
+    def test_sharded_features_sorted(self):
+        pages = {
+            "a": [{"id": "1", "properties": {"n": 1}}, {"id": "3", "properties": {"n": 3}}],
+            "b": [{"id": "2", "properties": {"n": 2}}, {"id": "3", "properties": {"n": 3}},
+                  {"id": "4", "properties": {}}],
+        }
+
+        def fetch(params):
+            page = params.get("continuation_token", 0)
+            features = pages[params["shard"]][page:page + 1]
+            return {"features": features, "properties": {"continuation_token": page + 1}}
+
+        features = sharded_features(fetch, [{"shard": "a"}, {"shard": "b"}], sort_field="n")
+        self.assertEqual([f["id"] for f in features], ["1", "2", "3", "4"])
+
+        pages["a"].reverse()
+        pages["b"] = [pages["b"][1], pages["b"][0], pages["b"][2]]
+        features = sharded_features(fetch, [{"shard": "a"}, {"shard": "b"}], sort_field="n", sort_order="desc")
+        self.assertEqual([f["id"] for f in features], ["3", "2", "1", "4"])
+
+
+class TestShardedSearch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.platform = StubPlatform(catalog=Catalog(scenes=400)).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.platform.stop()
+
+    def setUp(self):
+        self.metadata = Metadata(url=self.platform.service_url("DESCARTESLABS_METADATA_URL"),
+                                 auth=self.platform.auth())
+
+    def test_features_by_time(self):
+        params = dict(start_datetime="2018-01-01", end_datetime="2018-11-01", batch_size=25)
+        expected = [f.id for f in self.metadata.features(**params)]
+        features = list(self.metadata.features(parallel=7, **params))
+        self.assertEqual(sorted(f.id for f in features), expected)
+
+    def test_features_by_space_deduplicated(self):
+        # all the scenes of the stub cover the whole world, and are found by every shard
+        features = list(self.metadata.features(geom=iowa_geom, batch_size=50, parallel=3))
+        self.assertEqual(len(features), 400)
+        self.assertEqual(len({f.id for f in features}), 400)
+
+    def test_features_sorted(self):
+        fractions = [f.properties.cloud_fraction for f in self.metadata.features(
+            start_datetime="2018-01-01", end_datetime="2019-01-01", geom=iowa_geom, shard_by="both",
+            sort_field="cloud_fraction", sort_order="desc", batch_size=30, parallel=4)]
+        self.assertEqual(len(fractions), 365)
+        self.assertEqual(fractions, sorted(fractions, reverse=True))
+
+    def test_scenes_search_sorted(self):
+        raster = Raster(url=self.platform.service_url("DESCARTESLABS_RASTER_URL"), auth=self.platform.auth())
+        params = dict(products="stub:synthetic", start_datetime="2018-01-01", end_datetime="2020-01-01",
+                      sort_field="acquired", sort_order="desc", limit=5,
+                      metadata_client=self.metadata, raster_client=raster)
+        aoi = AOI(iowa_geom, crs="EPSG:4326", resolution=0.1)
+        expected, _ = search(aoi, **params)
+        scenes, _ = search(aoi, parallel=4, **params)
+        self.assertEqual(len(scenes), 5)
+        self.assertEqual([s.properties.id for s in scenes], [s.properties.id for s in expected])
+        self.assertTrue(scenes[0].properties.acquired.startswith("2019"))
+
+    def test_search_limit(self):
+        fc = self.metadata.search(start_datetime="2018-01-01", end_datetime="2019-01-01", limit=10, parallel=4)
+        self.assertEqual(len(fc.features), 10)
+
+    def test_invalid_parallel(self):
+        with self.assertRaises(ValueError):
+            list(self.metadata.features(parallel=0))
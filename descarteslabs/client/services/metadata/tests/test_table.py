@@ -0,0 +1,106 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import shapely.geometry
+import shapely.wkb
+
+from descarteslabs.client.addons import numpy as np
+from descarteslabs.client.services.metadata import FeatureTable, Metadata
+from descarteslabs.client.services.metadata.table import Categorical
+from descarteslabs.client.stubserver import Catalog, StubPlatform
+
+
+def feature(id, geometry=None, **properties):
+    return {"type": "Feature", "id": id, "geometry": geometry, "properties": properties}
+
+
+class TestFeatureTable(unittest.TestCase):
+
+    def setUp(self):
+        square = shapely.geometry.mapping(shapely.geometry.box(-1, -2, 3, 4))
+        self.table = FeatureTable.from_features([
+            feature("a", square, acquired="2018-01-02T03:04:05.5Z", cloud_fraction=0.5, sat="L8", n=1),
+            feature("b", None, acquired=None, cloud_fraction=None, sat="S2", n=2, flag=True),
+            feature("c", {"type": "Point", "coordinates": [10, 20]}, acquired="2018-01-03", cloud_fraction=0,
+                    sat="L8", n=3, bands=["red"]),
+        ], geometries=True)
+
+    def test_columns(self):
+        table = self.table
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.fields, ["acquired", "cloud_fraction", "sat", "n", "flag", "bands"])
+        self.assertEqual(list(table.ids), ["a", "b", "c"])
+
+        self.assertEqual(table["acquired"].dtype, np.dtype("datetime64[us]"))
+        self.assertEqual(table["acquired"][0], np.datetime64("2018-01-02T03:04:05.500000"))
+        self.assertTrue(np.isnat(table["acquired"][1]))
+        self.assertEqual(table["cloud_fraction"].dtype, np.float64)
+        self.assertTrue(np.isnan(table["cloud_fraction"][1]))
+        self.assertEqual(table["n"].dtype, np.int64)
+        self.assertIsInstance(table["sat"], Categorical)
+        self.assertEqual(list(table["sat"]), ["L8", "S2", "L8"])
+        self.assertEqual(len(table["sat"].categories), 2)
+        self.assertEqual(list(table["flag"]), [None, True, None])
+        self.assertEqual(table["bands"][2], ["red"])
+
+        table = FeatureTable.from_features([feature("a", geotrans=[1, 2.5, 0]), feature("b", geotrans=(4, 5, 6))])
+        self.assertEqual(table["geotrans"].shape, (2, 3))
+        self.assertEqual(table["geotrans"][1, 2], 6)
+
+    def test_geometries(self):
+        table = self.table
+        np.testing.assert_equal(table.bounds, [[-1, -2, 3, 4], [np.nan] * 4, [10, 20, 10, 20]])
+        self.assertIsNone(table.wkb[1])
+        self.assertEqual(shapely.wkb.loads(table.wkb[2]), shapely.geometry.Point(10, 20))
+        self.assertEqual(list(table.intersects_bounds((0, 0, 1, 1))), [True, False, False])
+
+    def test_filter(self):
+        table = self.table
+        clear = table[table["cloud_fraction"] < 0.6]
+        self.assertEqual(list(clear.ids), ["a", "c"])
+        self.assertEqual(list(clear["sat"] == "L8"), [True, True])
+        self.assertEqual(list(table.filter(table["sat"] != "L8").ids), ["b"])
+        self.assertEqual(list(table["sat"].isin(["S2", "nope"])), [False, True, False])
+        self.assertEqual(table[1:]["sat"][0], "S2")
+        self.assertEqual(table.row(2)["n"], 3)
+        self.assertEqual(table.row(2)["sat"], "L8")
+
+    def test_fields(self):
+        table = FeatureTable.from_features([feature("a", n=1), feature("b")], fields=["n", "other"])
+        self.assertEqual(table.fields, ["n", "other"])
+        self.assertEqual(table["n"][0], 1)
+        self.assertTrue(np.isnan(table["n"][1]))
+        self.assertEqual(list(table["other"]), [None, None])
+        self.assertIsNone(table.wkb)
+
+    def test_empty(self):
+        table = FeatureTable.from_features([])
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.bounds.shape, (0, 4))
+
+
+class TestFeaturesTable(unittest.TestCase):
+
+    def test_features_table(self):
+        with StubPlatform(catalog=Catalog(scenes=300)) as platform:
+            metadata = Metadata(url=platform.service_url("DESCARTESLABS_METADATA_URL"), auth=platform.auth())
+            table = metadata.features_table(start_datetime="2018-02-01", end_datetime="2018-03-01", batch_size=10)
+
+        self.assertEqual(len(table), 28)
+        self.assertEqual(table["acquired"][0], np.datetime64("2018-02-01"))
+        self.assertEqual(list(table["product"] == "stub:synthetic"), [True] * 28)
+        self.assertEqual(table.bounds.shape, (28, 4))
+        self.assertEqual(table["cloud_fraction"].dtype, np.float64)
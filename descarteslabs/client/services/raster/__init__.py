@@ -1,3 +1,12 @@
-from .raster import Raster
+import sys
 
-__all__ = ["Raster"]
+from .cache import RasterCache
+from .hedge import HedgePolicy
+from .raster import Raster, set_blosc_threads
+
+__all__ = ["Raster", "RasterCache", "HedgePolicy", "set_blosc_threads"]
+
+if sys.version_info >= (3, 6):
+    from .async_raster import AsyncRaster  # noqa: F401
+
+    __all__ += ["AsyncRaster"]
@@ -0,0 +1,210 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""asyncio variant of the Raster client. Requires Python 3.6+ and aiohttp."""
+
+import asyncio
+import json
+import os
+from io import BytesIO
+
+from descarteslabs.client.services.places import Places
+from descarteslabs.client.services.raster.raster import (
+    Raster,
+    StackBuffer,
+    _band_first,
+    check_stack_params,
+    ndarray_format,
+    ndarray_params,
+    ordered_ndarray,
+    read_ndarray,
+    read_npz,
+)
+from descarteslabs.client.services.service.async_service import AsyncService, DEFAULT_MAX_CONCURRENCY
+from descarteslabs.client.services.service.metrics import metrics_registry, timed
+
+
+class AsyncRaster(AsyncService):
+    """
+    asyncio variant of :class:`~descarteslabs.client.services.raster.Raster`,
+    for fetching many rasters concurrently from a single thread.
+
+    Example::
+
+        >>> import asyncio
+        >>> async def fetch(ids):  # doctest: +SKIP
+        ...     async with AsyncRaster() as raster:
+        ...         return await asyncio.gather(*(
+        ...             raster.ndarray(id_, bands=["red"], resolution=60) for id_ in ids
+        ...         ))
+    """
+
+    TIMEOUT = Raster.TIMEOUT
+
+    def __init__(self, url=None, auth=None, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        """
+        :param str url: URL of the Raster service; defaults to ``DESCARTESLABS_RASTER_URL``.
+        :param Auth auth: The authentication to use.
+        :param int max_concurrency: Maximum number of requests in flight at once.
+        """
+        if url is None:
+            url = os.environ.get("DESCARTESLABS_RASTER_URL", "https://platform.descarteslabs.com/raster/v1")
+
+        super(AsyncRaster, self).__init__(url, auth=auth, max_concurrency=max_concurrency)
+
+    async def ndarray(
+            self,
+            inputs,
+            bands=None,
+            scales=None,
+            data_type=None,
+            srs=None,
+            resolution=None,
+            dimensions=None,
+            cutline=None,
+            place=None,
+            bounds=None,
+            bounds_srs=None,
+            align_pixels=False,
+            resampler=None,
+            order='image',
+            dltile=None,
+            processing_level=None,
+            out=None,
+            **pass_through_params
+    ):
+        """
+        Retrieve a raster as a NumPy array.
+
+        Takes the same arguments as :meth:`Raster.ndarray
+        <descarteslabs.client.services.raster.Raster.ndarray>`. Arrays are
+        decoded off the event loop, in its default executor.
+
+        :return: A tuple of ``(np_array, metadata)``.
+        """
+        loop = asyncio.get_event_loop()
+
+        if place is not None:
+            places = Places(auth=self.auth)
+            shape = await loop.run_in_executor(None, lambda: places.shape(place, geom='low'))
+            cutline = json.dumps(shape['geometry'])
+
+        params = ndarray_params(
+            inputs,
+            bands=bands,
+            scales=scales,
+            data_type=data_type,
+            srs=srs,
+            resolution=resolution,
+            dimensions=dimensions,
+            cutline=cutline,
+            bounds=bounds,
+            bounds_srs=bounds_srs,
+            align_pixels=align_pixels,
+            resampler=resampler,
+            dltile=dltile,
+            processing_level=processing_level,
+            **pass_through_params
+        )
+        params['of'] = ndarray_format()
+
+        if out is not None and not callable(out):
+            out = _band_first(out, order)
+
+        r = await self.request('POST', '/npz', json=params)
+
+        array, metadata = await loop.run_in_executor(None, _decode, params['of'], r.content, out)
+
+        return ordered_ndarray(array, metadata, order)
+
+    async def stack(
+            self,
+            inputs,
+            bands=None,
+            scales=None,
+            data_type="UInt16",
+            srs=None,
+            resolution=None,
+            dimensions=None,
+            cutline=None,
+            place=None,
+            bounds=None,
+            bounds_srs=None,
+            align_pixels=False,
+            resampler=None,
+            order='image',
+            dltile=None,
+            processing_level=None,
+            memmap=None,
+            **pass_through_params
+    ):
+        """
+        Retrieve a stack of rasters as a 4-D NumPy array.
+
+        Takes the same arguments as :meth:`Raster.stack
+        <descarteslabs.client.services.raster.Raster.stack>`, except the
+        rasters are fetched concurrently on the event loop, limited by
+        ``max_concurrency``, rather than on an executor.
+
+        :return: A tuple of ``(stack, metadata)``.
+        """
+        check_stack_params(inputs, srs, resolution, dimensions, bounds, order, dltile)
+
+        stack = StackBuffer(len(inputs), memmap=memmap)
+
+        async def ndarray(i, id_group):
+            arr, meta = await self.ndarray(
+                id_group,
+                bands=bands,
+                scales=scales,
+                data_type=data_type,
+                srs=srs,
+                resolution=resolution,
+                dimensions=dimensions,
+                cutline=cutline,
+                place=place,
+                bounds=bounds,
+                bounds_srs=bounds_srs,
+                align_pixels=align_pixels,
+                resampler=resampler,
+                order="gdal",
+                dltile=dltile,
+                processing_level=processing_level,
+                out=stack.slot(i),
+                **pass_through_params
+            )
+            stack.put(i, arr)
+            return meta
+
+        tasks = [asyncio.ensure_future(ndarray(i, id_group)) for i, id_group in enumerate(inputs)]
+        try:
+            metadata = await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        result = stack.result(order)
+        metrics_registry().histogram("stack_assembly_seconds", {"method": "AsyncRaster.stack"}).observe(
+            stack.assembly_seconds)
+        return result, list(metadata)
+
+
+def _decode(of, content, out):
+    with timed("raster_decode_seconds", {"format": of}):
+        if of == 'blosc':
+            return read_ndarray(BytesIO(content), out)
+        else:
+            return read_npz(content, out)
@@ -0,0 +1,207 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import threading
+import time
+import uuid
+from hashlib import sha1
+
+from descarteslabs.client.addons import numpy as np
+from descarteslabs.common.cache import Transaction, connect
+from descarteslabs.common.threading.local import ThreadLocalWrapper
+
+
+DEFAULT_MAX_SIZE = 10 * 1024 ** 3
+
+
+class RasterCache(object):
+    """
+    A size-bounded, least-recently-used cache of rasters on disk.
+
+    Each raster is stored as a ``.npy`` file with its metadata in a ``.json``
+    file next to it. An SQLite index in the same directory tracks entry sizes
+    and access times, so a cache directory can safely be shared by many
+    processes on the same host. Rasters are cached per user, so processes
+    authenticated as different users don't share entries.
+
+    Cached arrays are returned as read-only memory maps.
+
+    Example::
+
+        >>> from descarteslabs.client.services.raster import Raster, RasterCache
+        >>> raster = Raster(cache=RasterCache("/tmp/dl-raster-cache", max_size=2 * 1024 ** 3))
+        >>> arr, meta = raster.ndarray(
+        ...     "landsat:LC08:PRE:TOAR:meta_LC80270312016188_v1",
+        ...     bands=["red"],
+        ...     dltile="256:0:75.0:15:-5:230"
+        ... )
+        >>> raster.cache.stats
+        {'hits': 0, 'misses': 1, 'evictions': 0}
+    """
+
+    INDEX_NAME = "index.sqlite"
+
+    def __init__(self, path, max_size=DEFAULT_MAX_SIZE):
+        """
+        :param str path: Directory in which to store the cache. Created if it doesn't exist.
+        :param int max_size: Maximum total size in bytes of the cached rasters.
+            Least recently used rasters are evicted to stay within this size.
+        """
+        self.path = path
+        self.max_size = max_size
+
+        if not os.path.exists(path):
+            try:
+                os.makedirs(path)
+            except OSError:
+                if not os.path.isdir(path):
+                    raise
+
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # sqlite connections can't be shared across threads or processes
+        self._connection = ThreadLocalWrapper(self._connect)
+        with self._transaction() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, filename TEXT NOT NULL, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+
+    @property
+    def stats(self):
+        """
+        Number of cache hits, misses and evictions in this process.
+        """
+        with self._stats_lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    @staticmethod
+    def key(*args):
+        """
+        Hash the given JSON-serializable arguments into a cache key. Dictionaries
+        are canonicalized, so the key doesn't depend on the order of their items.
+        """
+        canonical = json.dumps(args, sort_keys=True, separators=(",", ":"))
+        return sha1(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Return the cached ``(array, metadata)`` for `key`, or None if it isn't cached.
+        """
+        with self._transaction() as db:
+            row = db.execute("SELECT filename FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+
+        if row is not None:
+            filename = os.path.join(self.path, row[0])
+            try:
+                array = np.load(filename + ".npy", mmap_mode="r")
+                with open(filename + ".json") as f:
+                    metadata = json.load(f)
+            except (IOError, OSError, ValueError):
+                # evicted, or not written completely
+                self._discard(key, row[0])
+            else:
+                self._count("hits")
+                return array, metadata
+
+        self._count("misses")
+        return None
+
+    def set(self, key, array, metadata):
+        """
+        Cache `array` and its JSON-serializable `metadata` under `key`,
+        evicting least recently used rasters as necessary.
+        """
+        size = array.nbytes
+        if size > self.max_size:
+            return
+
+        # every version of an entry gets its own files, so readers and other
+        # writers of the same key never see a partially written or deleted file
+        filename = "{}-{}".format(key, uuid.uuid4().hex)
+        path = os.path.join(self.path, filename)
+        with open(path + ".npy.part", "wb") as f:
+            np.save(f, np.ascontiguousarray(array))
+        with open(path + ".json.part", "w") as f:
+            json.dump(metadata, f)
+        os.rename(path + ".json.part", path + ".json")
+        os.rename(path + ".npy.part", path + ".npy")
+
+        evicted = []
+        with self._transaction() as db:
+            row = db.execute("SELECT filename FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                evicted.append(row[0])
+            db.execute(
+                "INSERT OR REPLACE INTO entries (key, filename, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, filename, size, time.time())
+            )
+
+            total, = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()
+            if total > self.max_size:
+                for old_key, old_filename, old_size in db.execute(
+                    "SELECT key, filename, size FROM entries ORDER BY last_access"
+                ).fetchall():
+                    if total <= self.max_size:
+                        break
+                    db.execute("DELETE FROM entries WHERE key = ?", (old_key,))
+                    evicted.append(old_filename)
+                    total -= old_size
+                    self._count("evictions")
+
+        for old_filename in evicted:
+            self._remove_files(old_filename)
+
+    def clear(self):
+        """
+        Remove all rasters from the cache.
+        """
+        with self._transaction() as db:
+            filenames = [row[0] for row in db.execute("SELECT filename FROM entries").fetchall()]
+            db.execute("DELETE FROM entries")
+
+        for filename in filenames:
+            self._remove_files(filename)
+
+    def _discard(self, key, filename):
+        with self._transaction() as db:
+            db.execute("DELETE FROM entries WHERE key = ? AND filename = ?", (key, filename))
+        self._remove_files(filename)
+
+    def _remove_files(self, filename):
+        for ext in (".npy", ".json"):
+            try:
+                os.remove(os.path.join(self.path, filename + ext))
+            except OSError:
+                # already removed, or still mapped by a reader on Windows
+                pass
+
+    def _count(self, counter):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _connect(self):
+        return connect(self.path, self.INDEX_NAME)
+
+    def _transaction(self):
+        return Transaction(self._connection.get())
@@ -0,0 +1,227 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import threading
+import time
+
+from descarteslabs.client.addons import concurrent
+from descarteslabs.client.services.service.metrics import metrics_registry
+
+
+_monotonic = getattr(time, "monotonic", time.time)
+
+# The histogram of the metrics registry in which policies record latencies
+HEDGE_HISTOGRAM = "hedged_request_seconds"
+
+
+class HedgePolicy(object):
+    """
+    A policy for hedging slow requests: if a request hasn't received the
+    headers of its response after a given percentile of recent latencies, a
+    duplicate request is sent, and whichever responds first is used. The
+    response of the other one is closed as soon as it arrives.
+
+    Hedges are limited by a budget: each request earns `budget` hedges, up
+    to `max_tokens` saved up, so at most about a `budget` fraction of the
+    requests are hedged even when the service slows down as a whole.
+    A request isn't hedged either when all the threads of the policy are busy,
+    as the hedge would only wait behind the requests already sent.
+
+    Latencies are recorded in the ``hedged_request_seconds`` histogram of the
+    :py:func:`~descarteslabs.client.services.service.metrics_registry`, shared
+    by the policies of the process, unless a histogram is given.
+
+    Example::
+
+        >>> from descarteslabs.client.services.raster import Raster, HedgePolicy
+        >>> raster = Raster(hedge=HedgePolicy(percentile=95, budget=0.05))
+        >>> arr, meta = raster.ndarray(
+        ...     "landsat:LC08:PRE:TOAR:meta_LC80270312016188_v1",
+        ...     bands=["red"],
+        ...     dltile="256:0:75.0:15:-5:230"
+        ... )
+        >>> raster.hedge.stats
+        {'requests': 1, 'hedged': 0, 'hedge_wins': 0}
+    """
+
+    def __init__(
+        self,
+        percentile=95,
+        budget=0.05,
+        max_tokens=10,
+        min_samples=20,
+        min_delay=0.0,
+        window=1000,
+        max_workers=32,
+        histogram=None,
+    ):
+        """
+        :param float percentile: Percentile of recent latencies after which a request is hedged.
+        :param float budget: Number of hedges each request earns, i.e. the fraction of
+            requests which may be hedged in the long run.
+        :param float max_tokens: Maximum number of hedges saved up, i.e. the number of
+            requests which may be hedged in a burst.
+        :param int min_samples: Number of latencies to observe before hedging any request.
+        :param float min_delay: Minimum number of seconds to wait before hedging a request.
+        :param int window: Number of latencies after which older latencies weigh half as much,
+            if the histogram of the registry is created by this policy.
+        :param int max_workers: Number of threads sending the requests. Defaults to twice
+            the default size of the shared I/O executor, so that hedges of requests sent
+            from all its threads can be sent right away.
+        :param LatencyHistogram histogram: The histogram in which to record latencies,
+            instead of the histogram of the registry.
+        """
+        if not 0 < percentile < 100:
+            raise ValueError("percentile must be between 0 and 100")
+        if budget < 0:
+            raise ValueError("budget must not be negative")
+
+        self.percentile = percentile
+        self.budget = budget
+        self.max_tokens = max_tokens
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_workers = max_workers
+        self.window = window
+        self._histogram = histogram
+
+        self._lock = threading.Lock()
+        # requests submitted to the executor and not finished yet
+        self._running = 0
+        self._tokens = 0.0
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+        self._executor = None
+        self._executor_pid = None
+
+    @property
+    def histogram(self):
+        """The histogram of latencies from which requests are hedged"""
+        if self._histogram is not None:
+            return self._histogram
+        return metrics_registry().histogram(HEDGE_HISTOGRAM, window=self.window)
+
+    @property
+    def stats(self):
+        """
+        Number of requests, hedged requests, and hedges which responded first, in this process.
+        """
+        with self._lock:
+            return {"requests": self.requests, "hedged": self.hedged, "hedge_wins": self.hedge_wins}
+
+    def delay(self):
+        """
+        The number of seconds after which a request is hedged, or None if not
+        enough latencies have been observed yet.
+        """
+        histogram = self.histogram
+        if histogram.count < self.min_samples:
+            return None
+        return max(self.min_delay, histogram.percentile(self.percentile))
+
+    def call(self, request, discard=None):
+        """
+        Call `request` without arguments, hedging it if it's slow, and return
+        the result of the first call to succeed.
+
+        :param callable request: Sends the request and returns once its response
+            starts arriving. It's called from other threads.
+        :param callable discard: Called with the result of the call which didn't
+            respond first, to release it.
+        """
+        with self._lock:
+            self.requests += 1
+            self._tokens = min(self.max_tokens, self._tokens + self.budget)
+
+        executor = self._get_executor()
+        futures = concurrent.futures
+        histogram = self.histogram
+        attempts = [self._submit(executor, request, histogram)]
+
+        delay = self.delay()
+        if delay is not None:
+            done, _ = futures.wait(attempts, timeout=delay)
+            if not done and self._take_token():
+                attempts.append(self._submit(executor, request, histogram))
+
+        pending = set(attempts)
+        winner = None
+        while pending and winner is None:
+            done, pending = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+            for attempt in attempts:
+                if attempt in done and attempt.exception() is None:
+                    winner = attempt
+                    break
+
+        for attempt in attempts:
+            if attempt is not winner and not attempt.cancel():
+                attempt.add_done_callback(lambda f: self._discard(f, discard))
+
+        if winner is None:
+            # all attempts failed, raise the error of the original request
+            return attempts[0].result()
+
+        if winner is not attempts[0]:
+            with self._lock:
+                self.hedge_wins += 1
+        return winner.result()
+
+    def _submit(self, executor, request, histogram):
+        with self._lock:
+            self._running += 1
+        try:
+            future = executor.submit(self._timed, request, histogram)
+        except Exception:
+            self._finished()
+            raise
+        # also called if the request is cancelled before it started
+        future.add_done_callback(self._finished)
+        return future
+
+    @staticmethod
+    def _timed(request, histogram):
+        start = _monotonic()
+        result = request()
+        histogram.observe(_monotonic() - start)
+        return result
+
+    def _finished(self, future=None):
+        with self._lock:
+            self._running -= 1
+
+    def _take_token(self):
+        with self._lock:
+            # with all threads busy, the hedge would wait for one to be free
+            if self._tokens < 1 or self._running >= self.max_workers:
+                return False
+            self._tokens -= 1
+            self.hedged += 1
+            return True
+
+    @staticmethod
+    def _discard(future, discard):
+        if discard is not None and not future.cancelled() and future.exception() is None:
+            discard(future.result())
+
+    def _get_executor(self):
+        # requests can't wait on a shared executor from which they may themselves be called
+        pid = os.getpid()
+        with self._lock:
+            if self._executor is None or self._executor_pid != pid:
+                self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+                self._executor_pid = pid
+            return self._executor
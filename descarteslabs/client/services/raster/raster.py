@@ -12,9 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import collections
 import json
+import math
 import os
 import struct
+import tempfile
+import threading
+import time
+import uuid
 from io import BytesIO
 import logging
 
@@ -23,13 +29,27 @@ import six
 from descarteslabs.client.addons import ThirdParty, blosc, concurrent, numpy as np
 from descarteslabs.client.auth import Auth
 from descarteslabs.client.services.places import Places
+from descarteslabs.client.services.service.metrics import metrics_registry, timed
 from descarteslabs.client.services.service.service import Service
 from descarteslabs.client.exceptions import ServerError
 from descarteslabs.common.dotdict import DotDict
+from descarteslabs.common.threading.executor import map_unordered
+from descarteslabs.common.threading.readahead import DEFAULT_DEPTH, ReadAhead
 
 
 DEFAULT_MAX_WORKERS = 8
 
+# Maximum number of received chunks of a raster waiting to be decompressed
+MAX_PENDING_CHUNKS = 16
+
+# Size of the chunks in which files are streamed to disk
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# Width and height in pixels of the windows fetched by `Raster.ndarray_tiled`
+DEFAULT_TILE_SIZE = 2048
+
+_monotonic = getattr(time, "monotonic", time.time)
+
 
 def as_json_string(str_or_dict):
     if not str_or_dict:
@@ -49,24 +69,487 @@ def read_blosc_buffer(data):
     return size, header + body
 
 
-def read_blosc_array(metadata, data):
-    output = np.empty(metadata['shape'], dtype=np.dtype(metadata['dtype']))
-    ptr = output.__array_interface__['data'][0]
+def read_blosc_array(metadata, data, out=None, executor=None):
+    """
+    Decompress a blosc-framed array from the stream `data`.
 
-    for _ in metadata['chunks']:
-        raw_size, buffer = read_blosc_buffer(data)
-        blosc.decompress_ptr(buffer, ptr)
-        ptr += raw_size
+    If `out` is given, the array is written into it instead of a newly allocated
+    array. `out` may be an ndarray with the same number of elements and dtype as
+    the array described by `metadata`, or a callable ``out(shape, dtype)`` which
+    returns such an ndarray (or None to allocate a new one). Chunks are
+    decompressed directly into `out` if it is C-contiguous, otherwise they are
+    decompressed into a temporary array which is then copied into `out`.
+
+    If an `executor` is given, chunks are decompressed on it while the calling
+    thread keeps receiving the following chunks from `data`.
+    """
+    shape = tuple(metadata['shape'])
+    dtype = np.dtype(metadata['dtype'])
 
-    bytes_received = ptr - output.__array_interface__['data'][0]
+    if callable(out):
+        out = out(shape, dtype)
+
+    if out is None:
+        output = np.empty(shape, dtype=dtype)
+    else:
+        _check_output(out, shape, dtype)
+        if out.flags.c_contiguous:
+            output = out.reshape(shape)
+        else:
+            output = np.empty(shape, dtype=dtype)
+
+    start = output.__array_interface__['data'][0]
+    ptr = start
+    end = start + output.nbytes
+    pending = collections.deque()
+
+    try:
+        for _ in metadata['chunks']:
+            raw_size, buffer = read_blosc_buffer(data)
+            if ptr + raw_size > end:
+                raise ServerError("Received more data than expected for array (expected {})".format(
+                    output.nbytes))
+
+            if executor is None:
+                blosc.decompress_ptr(buffer, ptr)
+            else:
+                pending.append(executor.submit(blosc.decompress_ptr, buffer, ptr))
+                # bound the amount of compressed data held in memory
+                while len(pending) > MAX_PENDING_CHUNKS:
+                    pending.popleft().result()
+            ptr += raw_size
+    finally:
+        # chunks may never be decompressed into `output` once it's been released
+        while pending:
+            pending.popleft().result()
+
+    bytes_received = ptr - start
 
     if bytes_received != output.nbytes:
         raise ServerError("Did not receive complete array (got {}, expected {})".format(
             bytes_received, output.nbytes))
 
+    if out is not None and not out.flags.c_contiguous:
+        out[...] = output.reshape(out.shape)
+        output = out.reshape(shape)
+
     return output
 
 
+_decompress_executors = {}
+_decompress_executors_lock = threading.Lock()
+
+
+def _decompress_executor(workers):
+    """
+    Return a thread pool with `workers` threads, shared by all rasters
+    decompressed in this process.
+    """
+    if not workers:
+        return None
+
+    key = (os.getpid(), workers)
+    with _decompress_executors_lock:
+        executor = _decompress_executors.get(key)
+        if executor is None:
+            if hasattr(blosc, "set_releasegil"):
+                # decompression can only run concurrently without the GIL
+                blosc.set_releasegil(True)
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+            _decompress_executors[key] = executor
+    return executor
+
+
+def set_blosc_threads(threads):
+    """
+    Set the number of threads blosc uses to decompress each chunk of a raster.
+
+    This is a global setting of the blosc package: it applies to all rasters
+    in the process, and to any other use of blosc.
+
+    :param int threads: The number of threads.
+    :return: The previous number of threads.
+    :rtype: int
+    :raises ImportError: If blosc is not installed.
+    """
+    return blosc.set_nthreads(threads)
+
+
+def _check_output(out, shape, dtype):
+    size = 1
+    for dim in shape:
+        size *= dim
+
+    if out.dtype != dtype:
+        raise ValueError("Output array has dtype {}, but the raster has dtype {}".format(out.dtype, dtype))
+    if out.size != size:
+        raise ValueError("Output array has shape {}, but the raster has shape {}".format(out.shape, shape))
+
+
+def _copy_to_output(array, out):
+    if callable(out):
+        out = out(array.shape, array.dtype)
+        if out is None:
+            return array
+
+    _check_output(out, array.shape, array.dtype)
+    out[...] = array.reshape(out.shape)
+    return out.reshape(array.shape)
+
+
+def _band_first(out, order):
+    # the service always sends arrays ordered (band, row, column)
+    if order == 'image' and out.ndim == 3:
+        return out.transpose((2, 0, 1))
+    return out
+
+
+def ndarray_params(
+        inputs,
+        bands=None,
+        scales=None,
+        data_type=None,
+        srs=None,
+        resolution=None,
+        dimensions=None,
+        cutline=None,
+        bounds=None,
+        bounds_srs=None,
+        align_pixels=False,
+        resampler=None,
+        dltile=None,
+        processing_level=None,
+        **pass_through_params
+):
+    """The body of an `/npz` request for the arguments of `Raster.ndarray`"""
+    params = {
+        'ids': inputs,
+        'bands': bands,
+        'scales': scales,
+        'ot': data_type,
+        'srs': srs,
+        'resolution': resolution,
+        'shape': as_json_string(cutline),
+        'outputBounds': bounds,
+        'outputBoundsSRS': bounds_srs,
+        'outsize': dimensions,
+        'targetAlignedPixels': align_pixels,
+        'resampleAlg': resampler,
+        'processing_level': processing_level,
+    }
+    params.update(pass_through_params)
+
+    if dltile is not None:
+        if isinstance(dltile, dict):
+            params['dltile'] = dltile['properties']['key']
+        else:
+            params['dltile'] = dltile
+
+    return params
+
+
+def ndarray_format():
+    """The format in which to request arrays: ``blosc`` if available, otherwise ``npz``"""
+    return 'npz' if isinstance(blosc, ThirdParty) else 'blosc'
+
+
+def read_ndarray(data, out=None, executor=None):
+    """
+    Read the metadata and the array of a ``blosc`` `/npz` response from the stream `data`.
+
+    See `read_blosc_array` for `out` and `executor`.
+    """
+    metadata = json.loads(data.readline().decode('utf-8').strip())
+    array_meta = json.loads(data.readline().decode('utf-8').strip())
+    array = read_blosc_array(array_meta, data, out=out, executor=executor)
+    return array, metadata
+
+
+def read_npz(content, out=None):
+    """Read the array and the metadata of an ``npz`` `/npz` response"""
+    npz = np.load(BytesIO(content))
+    array = npz['data']
+    metadata = json.loads(npz['metadata'].tostring().decode('utf-8'))
+    if out is not None:
+        array = _copy_to_output(array, out)
+    return array, metadata
+
+
+def ordered_ndarray(array, metadata, order):
+    """The ``(array, metadata)`` result of `Raster.ndarray`, given the array as sent by the service"""
+    if len(array.shape) > 2:
+        if order == 'image':
+            return array.transpose((1, 2, 0)), metadata
+        elif order == 'gdal':
+            return array, metadata
+    else:
+        return array, DotDict(metadata)
+
+
+def check_stack_params(inputs, srs, resolution, dimensions, bounds, order, dltile):
+    """Check the arguments of `Raster.stack` give rasters of the same shape"""
+    if not isinstance(inputs, (list, tuple)):
+        raise TypeError("Inputs must be a list or tuple, instead got '{}'".format(type(inputs)))
+
+    if dltile is None:
+        if resolution is None and dimensions is None:
+            raise ValueError("Must set `resolution` or `dimensions`")
+        if srs is None:
+            raise ValueError("Must set `srs`")
+        if bounds is None:
+            raise ValueError("Must set `bounds`")
+
+    if order not in ("image", "gdal"):
+        raise ValueError("Unknown order '{}'; should be one of 'image' or 'gdal'".format(order))
+
+
+class StackBuffer(object):
+    """
+    The 4-D array of a stack of rasters, allocated as soon as the shape of
+    the first raster is known, so each raster can be decompressed directly
+    into its slot. The stack is assembled in the (scene, band, row, column)
+    order the service sends.
+    """
+
+    def __init__(self, size, memmap=None):
+        self.size = size
+        self.memmap = memmap
+        self.array = None
+        # time spent copying rasters into the stack and flushing it
+        self.assembly_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def allocate(self, shape, dtype):
+        with self._lock:
+            if self.array is None:
+                if len(shape) == 2:
+                    shape = (1,) + tuple(shape)
+                self.array = allocate_array((self.size,) + tuple(shape), dtype, memmap=self.memmap)
+        return self.array
+
+    def slot(self, i):
+        """The `out` argument of `Raster.ndarray` for the raster at index `i`"""
+        return lambda shape, dtype: self.allocate(shape, dtype)[i]
+
+    def put(self, i, array):
+        start = _monotonic()
+        full_stack = self.allocate(array.shape, array.dtype)
+        if not np.may_share_memory(array, full_stack[i]):
+            full_stack[i] = array.reshape(full_stack.shape[1:])
+        self.assembly_seconds += _monotonic() - start
+
+    def result(self, order):
+        full_stack = self.array
+        if isinstance(full_stack, np.memmap):
+            start = _monotonic()
+            full_stack.flush()
+            self.assembly_seconds += _monotonic() - start
+        if full_stack is not None and order == "image":
+            full_stack = full_stack.transpose((0, 2, 3, 1))
+        return full_stack
+
+
+def _dltile_pages(client, params):
+    # sessions are thread-local, so this gets the session of the thread reading ahead
+    params = dict(params)
+    while True:
+        r = client.session.post('/dlkeys/from_shape', json=params)
+        fc = DotDict(r.json())
+        yield fc.features
+        iterstate = fc.get('iterstate', None)
+        if iterstate:
+            params['start_zone'] = iterstate.start_zone
+            params['start_ti'] = iterstate.start_ti
+            params['start_tj'] = iterstate.start_tj
+        else:
+            break
+
+
+def _output_grid(srs, resolution, dimensions, bounds, bounds_srs, align_pixels):
+    """
+    The pixel grid ``(min_x, max_y, res_x, res_y, width, height)`` of the raster
+    the service produces for these parameters, following GDAL's rules for
+    ``-te``/``-tr``/``-ts``/``-tap``, or None if it can't be known locally.
+    """
+    if srs is None or bounds is None or (bounds_srs is not None and bounds_srs != srs):
+        return None
+    if (resolution is None) == (dimensions is None):
+        return None
+
+    min_x, min_y, max_x, max_y = [float(b) for b in bounds]
+    if resolution is not None:
+        res_x = res_y = float(resolution)
+        if align_pixels:
+            min_x = math.floor(min_x / res_x) * res_x
+            min_y = math.floor(min_y / res_y) * res_y
+            max_x = math.ceil(max_x / res_x) * res_x
+            max_y = math.ceil(max_y / res_y) * res_y
+        width = int((max_x - min_x) / res_x + 0.5)
+        height = int((max_y - min_y) / res_y + 0.5)
+    else:
+        width, height = [int(d) for d in dimensions]
+        res_x = (max_x - min_x) / width
+        res_y = (max_y - min_y) / height
+
+    if width <= 0 or height <= 0:
+        return None
+    return min_x, max_y, res_x, res_y, width, height
+
+
+def _windows(width, height, tilesize):
+    """The ``(row, col, rows, cols)`` pixel windows tiling a `width` by `height` raster"""
+    for row in range(0, height, tilesize):
+        for col in range(0, width, tilesize):
+            yield row, col, min(tilesize, height - row), min(tilesize, width - col)
+
+
+def _window_params(grid, window, by_resolution):
+    """`Raster.ndarray` parameters producing exactly the pixels of `window` in `grid`"""
+    min_x, max_y, res_x, res_y, width, height = grid
+    row, col, rows, cols = window
+
+    bounds = (
+        min_x + col * res_x,
+        max_y - (row + rows) * res_y,
+        min_x + (col + cols) * res_x,
+        max_y - row * res_y,
+    )
+    params = dict(bounds=bounds, bounds_srs=None, align_pixels=False)
+    if by_resolution:
+        params.update(resolution=res_x, dimensions=None)
+    else:
+        params.update(resolution=None, dimensions=(cols, rows))
+    return params
+
+
+def _tiled_metadata(metadata, grid):
+    """Turn the metadata of the upper-left window into the metadata of the whole raster"""
+    min_x, max_y, res_x, res_y, width, height = grid
+    metadata = dict(metadata)
+    metadata['size'] = [width, height]
+
+    max_x = min_x + width * res_x
+    min_y = max_y - height * res_y
+    metadata['cornerCoordinates'] = {
+        'upperLeft': [min_x, max_y],
+        'lowerLeft': [min_x, min_y],
+        'upperRight': [max_x, max_y],
+        'lowerRight': [max_x, min_y],
+        'center': [(min_x + max_x) / 2, (min_y + max_y) / 2],
+    }
+    # only describes the extent of the window
+    metadata.pop('wgs84Extent', None)
+    return metadata
+
+
+def read_exactly(data, length):
+    buffer = data.read(length)
+    if len(buffer) != length:
+        raise ServerError("Did not receive complete file (got {}, expected {})".format(
+            len(buffer), length))
+    return buffer
+
+
+def copy_stream(data, length, f, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Copy `length` bytes from the stream `data` into the file-like object `f`,
+    `chunk_size` bytes at a time.
+    """
+    remaining = length
+    while remaining > 0:
+        chunk = data.read(min(chunk_size, remaining))
+        if not chunk:
+            raise ServerError("Did not receive complete file (got {}, expected {})".format(
+                length - remaining, length))
+        f.write(chunk)
+        remaining -= len(chunk)
+
+
+def write_stream(data, length, dest, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Write `length` bytes from the stream `data` to `dest`, a path or file-like object.
+
+    A path is first written to a temporary file in the same directory, which
+    then atomically replaces `dest`.
+    """
+    if not _is_path_like(dest):
+        copy_stream(data, length, dest, chunk_size=chunk_size)
+        return
+
+    if hasattr(os, "fspath"):
+        dest = os.fspath(dest)
+    tmp = "{}.{}.part".format(dest, uuid.uuid4().hex)
+    try:
+        with open(tmp, "wb") as f:
+            copy_stream(data, length, f, chunk_size=chunk_size)
+        _replace(tmp, dest)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def allocate_array(shape, dtype, memmap=None):
+    """
+    Allocate an uninitialized array, optionally backed by a memory-mapped ``.npy`` file
+    so that it can be larger than the available memory.
+
+    :param memmap: If a path, the array is mapped to a new ``.npy`` file at that path,
+        which can later be reopened with ``np.load(path, mmap_mode="r")``. If True,
+        the array is mapped to a temporary file, which is removed once the array
+        is garbage collected (or left in the temporary directory on Windows).
+        Otherwise the array is allocated in memory.
+    """
+    if memmap is None or memmap is False:
+        return np.empty(shape, dtype=dtype)
+
+    if memmap is True:
+        fd, path = tempfile.mkstemp(suffix=".npy")
+        os.close(fd)
+        try:
+            return np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=tuple(shape))
+        finally:
+            try:
+                # the mapping stays valid after the file is unlinked
+                os.remove(path)
+            except OSError:
+                # Windows can't remove a mapped file
+                pass
+
+    if not _is_path_like(memmap):
+        raise TypeError("memmap must be a path or a bool, not {}".format(type(memmap).__name__))
+    if hasattr(os, "fspath"):
+        memmap = os.fspath(memmap)
+    return np.lib.format.open_memmap(memmap, mode="w+", dtype=dtype, shape=tuple(shape))
+
+
+def mask_path(path):
+    """
+    The path of the file holding the mask of a stack memory-mapped to `path`:
+    ``stack.npy`` has its mask in ``stack.mask.npy``.
+    """
+    if path is True or path is None or path is False:
+        return path
+    if hasattr(os, "fspath"):
+        path = os.fspath(path)
+    root, ext = os.path.splitext(path)
+    return "{}.mask{}".format(root, ext or ".npy")
+
+
+def _is_path_like(dest):
+    return isinstance(dest, six.string_types) or (hasattr(os, "PathLike") and isinstance(dest, os.PathLike))
+
+
+def _replace(src, dst):
+    if hasattr(os, "replace"):
+        os.replace(src, dst)
+    else:
+        if os.name == "nt" and os.path.exists(dst):
+            # Python 2 on Windows can't rename over an existing file
+            os.remove(dst)
+        os.rename(src, dst)
+
+
 def read_blosc_string(metadata, data):
     output = b''
 
@@ -81,11 +564,24 @@ class Raster(Service):
     """Raster"""
     TIMEOUT = (9.5, 300)
 
-    def __init__(self, url=None, auth=None):
+    # Number of threads shared by all ndarray calls to decompress chunks of a raster
+    # while the following chunks are received. If 0, chunks are decompressed on
+    # the receiving thread.
+    DECOMPRESS_WORKERS = 4
+
+    def __init__(self, url=None, auth=None, cache=None, hedge=None):
         """The parent Service class implements authentication and exponential
         backoff/retry. Override the url parameter to use a different instance
         of the backing service.
+
+        :param RasterCache cache: An optional on-disk cache for the results of
+            :meth:`ndarray`. Cached rasters are returned as read-only memory maps.
+        :param HedgePolicy hedge: An optional policy for sending a duplicate of the
+            requests of :meth:`ndarray` and :meth:`raster` which are slow to respond.
         """
+        self.cache = cache
+        self.hedge = hedge
+
         if auth is None:
             auth = Auth()
 
@@ -95,7 +591,7 @@ class Raster(Service):
         super(Raster, self).__init__(url, auth=auth)
 
     # please keep default maxtiles value equal to MAXTILES in the service
-    def iter_dltiles_from_shape(self, resolution, tilesize, pad, shape, maxtiles=5000):
+    def iter_dltiles_from_shape(self, resolution, tilesize, pad, shape, maxtiles=5000, prefetch=DEFAULT_DEPTH):
         """Return an iterator over a feature collection of DLTile GeoJSONs
         that intersect a GeoJSON Geometry `shape`.
 
@@ -110,6 +606,11 @@ class Raster(Service):
             which to intersect DLTiles.
         :param int maxtiles: Maximum number of tiles per paged request.
             Defaults to 10000.
+        :param int prefetch: Number of pages to request in the background
+            while the current page is consumed, 1 by default. The pages are
+            requested by a daemon thread started for each iteration, which
+            stops when the iteration completes or is closed. If 0, no thread
+            is started, and pages are requested only when needed.
 
         :return: An iterator over a GeoJSON FeatureCollection of
             intersecting DLTile geometries.
@@ -180,18 +681,10 @@ class Raster(Service):
             'maxtiles': maxtiles
         }
 
-        while True:
-            r = self.session.post('/dlkeys/from_shape', json=params)
-            fc = DotDict(r.json())
-            for t in fc.features:
-                yield t
-            iterstate = fc.get('iterstate', None)
-            if iterstate:
-                params['start_zone'] = iterstate.start_zone
-                params['start_ti'] = iterstate.start_ti
-                params['start_tj'] = iterstate.start_tj
-            else:
-                break
+        with ReadAhead(_dltile_pages(self, params), depth=prefetch) as pages:
+            for page in pages:
+                for t in page:
+                    yield t
 
     def dltiles_from_shape(self, resolution, tilesize, pad, shape):
         """
@@ -406,6 +899,7 @@ class Raster(Service):
             processing_level=None,
             save=False,
             outfile_basename=None,
+            dest=None,
             **pass_through_params
     ):
         """Given a list of :class:`Metadata <descarteslabs.services.Metadata>` identifiers,
@@ -458,11 +952,16 @@ class Raster(Service):
         :param bool save: Write resulting files to disk. Default: False
         :param str outfile_basename: If 'save' is True, override default filename using
             this string as a base.
+        :param dest: A path or file-like object to stream the file into as it is received,
+            instead of holding it in memory. A path is written through a temporary file
+            in the same directory, which is renamed to ``dest`` once complete, so ``dest``
+            never contains a partial file. Incompatible with ``save``.
 
         :return: A dictionary with two keys, ``files`` and ``metadata``. The value for
             ``files`` is a dictionary mapping file names to binary data for files (at the
             moment there will always be only a single file with the appropriate file
-            extension based on the ``output_format`` requested). The value for ``metadata``
+            extension based on the ``output_format`` requested), or to ``dest`` if it
+            was given. The value for ``metadata``
             is a dictionary containing details about the raster operation that happened.
             These details can be useful for debugging but shouldn't otherwise be relied on
             (there are no guarantees that certain keys will be present).
@@ -499,20 +998,26 @@ class Raster(Service):
             else:
                 params['dltile'] = dltile
 
-        r = self.session.post('/raster', json=params)
+        if dest is not None and save:
+            raise ValueError("`dest` and `save` can't be used together")
 
-        raw = BytesIO(r.content)
+        r = self._post_stream('/raster', params)
+        raw = r.raw
+        raw.decode_content = True
 
         json_resp = json.loads(raw.readline().decode('utf-8').strip())
 
         num_files = json_resp['files']
         json_resp['files'] = {}
 
+        if dest is not None and num_files != 1:
+            r.close()
+            raise ServerError("Expected a single file to write to `dest`, but got {}".format(num_files))
+
         for _ in range(num_files):
             file_meta = json.loads(raw.readline().decode('utf-8').strip())
 
             fn = file_meta['name']
-            data = raw.read(file_meta['length'])
 
             if outfile_basename:
                 outfilename = "{}.{}".format(
@@ -522,7 +1027,11 @@ class Raster(Service):
             else:
                 outfilename = fn
 
-            json_resp['files'][outfilename] = data
+            if dest is None:
+                json_resp['files'][outfilename] = read_exactly(raw, file_meta['length'])
+            else:
+                write_stream(raw, file_meta['length'], dest)
+                json_resp['files'][outfilename] = dest
 
         if save:
             for filename, data in six.iteritems(json_resp['files']):
@@ -549,6 +1058,7 @@ class Raster(Service):
             order='image',
             dltile=None,
             processing_level=None,
+            out=None,
             **pass_through_params
     ):
         """Retrieve a raster as a NumPy array.
@@ -598,6 +1108,13 @@ class Raster(Service):
             should be adjusted, one of ``toa`` (top of atmosphere) and ``surface``. For
             products that support it, ``surface`` applies Descartes Labs' general surface
             reflectance algorithm to the output.
+        :param ndarray out: An array to write the result into, instead of allocating a new
+            one. It must have the same dtype and number of elements as the returned array,
+            in the requested ``order``. If its memory is laid out as ``(band, row, column)``
+            (e.g. a C-contiguous array with ``order='gdal'``), data is decompressed
+            directly into it; otherwise it is copied in. May also be a callable
+            ``out(shape, dtype)`` returning such an array, which is called with the
+            ``(band, row, column)`` shape of the raster once it is known.
 
         :return: A tuple of ``(np_array, metadata)``. The first element (``np_array``) is
             the rastered scene as a NumPy array. The second element (``metadata``) is a
@@ -605,64 +1122,215 @@ class Raster(Service):
             details can be useful for debugging but shouldn't otherwise be relied on (there
             are no guarantees that certain keys will be present).
         """
-        cutline = as_json_string(cutline)
-
         if place is not None:
             places = Places(auth=self.auth)
             shape = places.shape(place, geom='low')
             cutline = json.dumps(shape['geometry'])
 
-        params = {
-            'ids': inputs,
-            'bands': bands,
-            'scales': scales,
-            'ot': data_type,
-            'srs': srs,
-            'resolution': resolution,
-            'shape': cutline,
-            'outputBounds': bounds,
-            'outputBoundsSRS': bounds_srs,
-            'outsize': dimensions,
-            'targetAlignedPixels': align_pixels,
-            'resampleAlg': resampler,
-            'processing_level': processing_level,
-        }
-        params.update(pass_through_params)
+        params = ndarray_params(
+            inputs,
+            bands=bands,
+            scales=scales,
+            data_type=data_type,
+            srs=srs,
+            resolution=resolution,
+            dimensions=dimensions,
+            cutline=cutline,
+            bounds=bounds,
+            bounds_srs=bounds_srs,
+            align_pixels=align_pixels,
+            resampler=resampler,
+            dltile=dltile,
+            processing_level=processing_level,
+            **pass_through_params
+        )
 
-        if dltile is not None:
-            if isinstance(dltile, dict):
-                params['dltile'] = dltile['properties']['key']
+        if out is not None and not callable(out):
+            out = _band_first(out, order)
+
+        if self.cache is not None:
+            key = self.cache.key(self.base_url, params, self.auth.namespace)
+            cached = self.cache.get(key)
+            if cached is None:
+                array, metadata = self._fetch_ndarray(params, out)
+                self.cache.set(key, array, metadata)
             else:
-                params['dltile'] = dltile
+                array, metadata = cached
+                if out is not None:
+                    array = _copy_to_output(array, out)
+        else:
+            array, metadata = self._fetch_ndarray(params, out)
 
-        can_blosc = not isinstance(blosc, ThirdParty)
+        return ordered_ndarray(array, metadata, order)
 
-        if can_blosc:
-            params['of'] = 'blosc'
-        else:
-            params['of'] = 'npz'
+    def ndarray_tiled(
+            self,
+            inputs,
+            srs=None,
+            resolution=None,
+            dimensions=None,
+            cutline=None,
+            place=None,
+            bounds=None,
+            bounds_srs=None,
+            align_pixels=False,
+            order='image',
+            out=None,
+            tilesize=DEFAULT_TILE_SIZE,
+            max_workers=None,
+            executor=None,
+            **ndarray_params
+    ):
+        """Retrieve a large raster as a NumPy array, split into windows fetched in parallel.
+
+        The output pixel grid is planned locally from ``bounds`` and ``resolution``
+        (or ``dimensions``), split into windows of at most ``tilesize`` by ``tilesize``
+        pixels aligned to that grid, and each window is fetched with :meth:`ndarray`
+        and written into its slot of a single output array. The result has the same
+        pixels as one :meth:`ndarray` call with the same parameters, but each request
+        stays small, and at most ``max_workers`` windows are held in memory besides
+        the output.
+
+        The grid can only be planned when ``srs``, ``bounds`` and exactly one of
+        ``resolution`` or ``dimensions`` are given, with ``bounds`` in the output SRS
+        (``bounds_srs`` not given or equal to ``srs``), and ``dimensions`` taken as the
+        exact size of the raster. Otherwise, or if the raster fits in a single window,
+        this is the same as calling :meth:`ndarray`.
+
+        Accepts the same parameters as :meth:`ndarray`, and:
+
+        :param int tilesize: Maximum width and height in pixels of each window.
+        :param int max_workers: Maximum number of windows to fetch concurrently.
+            If `None`, will be set to the minimum of the number of windows
+            and `DEFAULT_MAX_WORKERS`.
+        :param executor: A :class:`concurrent.futures.Executor` on which to fetch the
+            windows. If `None`, the thread pool shared by the whole process is used
+            (see :func:`~descarteslabs.common.threading.executor.io_executor`).
+            When called from one of its threads, e.g. by :meth:`SceneCollection.stack
+            <descarteslabs.scenes.scenecollection.SceneCollection.stack>`, the windows
+            are fetched on the calling thread.
+
+        :return: A tuple of ``(np_array, metadata)``, as returned by :meth:`ndarray`.
+            The metadata is that of the upper-left window, with its ``size`` and
+            ``cornerCoordinates`` describing the whole raster.
+        """
+        if place is not None:
+            places = Places(auth=self.auth)
+            shape = places.shape(place, geom='low')
+            cutline = json.dumps(shape['geometry'])
 
-        r = self.session.post('/npz', json=params, stream=True)
+        params = dict(
+            inputs=inputs,
+            srs=srs,
+            resolution=resolution,
+            dimensions=dimensions,
+            cutline=cutline,
+            bounds=bounds,
+            bounds_srs=bounds_srs,
+            align_pixels=align_pixels,
+            order=order,
+            **ndarray_params
+        )
 
-        if can_blosc:
-            metadata = json.loads(r.raw.readline().decode('utf-8').strip())
-            array_meta = json.loads(r.raw.readline().decode('utf-8').strip())
-            array = read_blosc_array(array_meta, r.raw)
-        else:
-            npz = np.load(BytesIO(r.content))
-            array = npz['data']
-            metadata = json.loads(npz['metadata'].tostring().decode('utf-8'))
-
-        if len(array.shape) > 2:
-            if order == 'image':
-                return array.transpose((1, 2, 0)), metadata
-            elif order == 'gdal':
-                return array, metadata
+        grid = None
+        if ndarray_params.get('dltile') is None:
+            grid = _output_grid(srs, resolution, dimensions, bounds, bounds_srs, align_pixels)
+        if grid is None or (grid[4] <= tilesize and grid[5] <= tilesize):
+            return self.ndarray(out=out, **params)
+
+        if out is not None and not callable(out):
+            out = _band_first(out, order)
+
+        width, height = grid[4], grid[5]
+        windows = list(_windows(width, height, tilesize))
+        output = {}
+        lock = threading.Lock()
+
+        def allocate(shape, dtype):
+            # the service sends (band, row, column), or (row, column) for a single band
+            with lock:
+                if "array" not in output:
+                    shape = tuple(shape[:-2]) + (height, width)
+                    array = out(shape, dtype) if callable(out) else out
+                    if array is None:
+                        array = np.empty(shape, dtype=dtype)
+                    else:
+                        _check_output(array, shape, dtype)
+                        reshaped = array.reshape(shape)
+                        if not np.may_share_memory(reshaped, array):
+                            raise ValueError("Output array with shape {} can't be written as {}".format(
+                                array.shape, shape))
+                        array = reshaped
+                    output["array"] = array
+            return output["array"]
+
+        def slot(window):
+            row, col, rows, cols = window
+            return lambda shape, dtype: allocate(shape, dtype)[..., row:row + rows, col:col + cols]
+
+        def fetch(window):
+            window_params = dict(params, order='gdal')
+            window_params.update(_window_params(grid, window, resolution is not None))
+            return self.ndarray(out=slot(window), **window_params)
+
+        if max_workers is None:
+            max_workers = min(len(windows), DEFAULT_MAX_WORKERS)
+
+        if isinstance(concurrent, ThirdParty):
+            logging.warning(
+                "Failed to import concurrent.futures. ndarray calls will be serial"
+            )
+            results = ((i, fetch(window)) for i, window in enumerate(windows))
         else:
-            return array, DotDict(metadata)
+            results = map_unordered(fetch, windows, executor=executor, max_workers=max_workers)
+
+        metadata = []
+        try:
+            for i, (arr, meta) in results:
+                row, col, rows, cols = windows[i]
+                target = allocate(arr.shape, arr.dtype)[..., row:row + rows, col:col + cols]
+                if not np.may_share_memory(arr, target):
+                    target[...] = arr
+                if i == 0:
+                    metadata.append(_tiled_metadata(meta, grid))
+        finally:
+            # don't fetch the remaining windows after a failure
+            results.close()
+
+        return ordered_ndarray(output["array"], metadata[0], order)
+
+    def _fetch_ndarray(self, params, out=None):
+        params = dict(params, of=ndarray_format())
+
+        r = self._post_stream('/npz', params)
+
+        with timed("raster_decode_seconds", {"format": params['of']}):
+            if params['of'] == 'blosc':
+                return read_ndarray(r.raw, out=out, executor=self._decompress_executor())
+            else:
+                return read_npz(r.content, out=out)
+
+    def _post_stream(self, path, params):
+        if self.hedge is None:
+            return self.session.post(path, json=params, stream=True)
+
+        # the session is per thread, so it's taken from the thread sending the request
+        return self.hedge.call(
+            lambda: self.session.post(path, json=params, stream=True),
+            discard=lambda response: response.close(),
+        )
+
+    def _decompress_executor(self):
+        try:
+            return _decompress_executor(self.DECOMPRESS_WORKERS)
+        except ImportError:
+            return None
 
     def _serial_ndarray(self, id_groups, *args, **kwargs):
+        slots = kwargs.pop("slots", None)
         for i, id_group in enumerate(id_groups):
+            if slots is not None:
+                kwargs["out"] = slots(i)
             arr, meta = self.ndarray(id_group, *args, **kwargs)
             yield i, arr, meta
 
@@ -670,14 +1338,18 @@ class Raster(Service):
         """
         Thread ndarray calls by id group, keeping the same `args` and
         `kwargs` for each raster.ndarray call.
+
+        The calls run on `executor`, or on the process-wide `io_executor`
+        if None, with at most `max_workers` of them at once.
+
+        If given, `slots` is a callable returning the `out` argument to
+        use for the ndarray call of the id group at a given index.
         """
-        max_workers = kwargs.pop(
-            "max_workers",
-            min(len(id_groups), DEFAULT_MAX_WORKERS)
-        )
-        try:
-            futures = concurrent.futures
-        except ImportError:
+        max_workers = kwargs.pop("max_workers", None)
+        if max_workers is None:
+            max_workers = min(len(id_groups), DEFAULT_MAX_WORKERS) or None
+        executor = kwargs.pop("executor", None)
+        if isinstance(concurrent, ThirdParty):
             logging.warning(
                 "Failed to import concurrent.futures. ndarray calls will be serial"
             )
@@ -686,17 +1358,18 @@ class Raster(Service):
                 yield i, arr, meta
             return
 
-        with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_ndarrays = {}
-            for i, id_group in enumerate(id_groups):
-                future_ndarrays[executor.submit(
-                    self.ndarray, id_group, *args, **kwargs)
-                ] = i
+        slots = kwargs.pop("slots", None)
 
-            for future in futures.as_completed(future_ndarrays):
-                i = future_ndarrays[future]
-                arr, meta = future.result()
-                yield i, arr, meta
+        def ndarray(item):
+            i, id_group = item
+            ndarray_kwargs = dict(kwargs)
+            if slots is not None:
+                ndarray_kwargs["out"] = slots(i)
+            return self.ndarray(id_group, *args, **ndarray_kwargs)
+
+        for i, (arr, meta) in map_unordered(
+                ndarray, enumerate(id_groups), executor=executor, max_workers=max_workers):
+            yield i, arr, meta
 
     def stack(
             self,
@@ -717,6 +1390,8 @@ class Raster(Service):
             dltile=None,
             processing_level=None,
             max_workers=None,
+            memmap=None,
+            executor=None,
             **pass_through_params
     ):
         """Retrieve a stack of rasters as a 4-D NumPy array.
@@ -776,9 +1451,18 @@ class Raster(Service):
             should be adjusted, one of ``toa`` (top of atmosphere) and ``surface``. For
             products that support it, ``surface`` applies Descartes Labs' general surface
             reflectance algorithm to the output.
-        :param int max_workers: Maximum number of threads over which to
-            parallelize individual ndarray calls. If `None`, will be set to the minimum
+        :param int max_workers: Maximum number of individual ndarray calls
+            to run in parallel. If `None`, will be set to the minimum
             of the number of inputs and `DEFAULT_MAX_WORKERS`.
+        :param executor: A :class:`concurrent.futures.Executor` on which to run the
+            individual ndarray calls. If `None`, the thread pool shared by the whole
+            process is used (see :func:`~descarteslabs.common.threading.executor.io_executor`),
+            so repeated calls reuse its threads and their open connections.
+        :param memmap: Back the stack with a memory-mapped file instead of memory, so it can
+            be larger than the available memory. If a path, the stack is written to a ``.npy``
+            file at that path, in ``(scene, band, row, column)`` order regardless of ``order``,
+            which can later be reopened with ``np.load(path, mmap_mode="r")``. If True, a
+            temporary file is used.
 
         :return: A tuple of ``(stack, metadata)``.
 
@@ -790,8 +1474,7 @@ class Raster(Service):
               contain useful information about the raster, such as its geotransform matrix and WKT
               of its coordinate system, but there are no guarantees that certain keys will be present.
         """
-        if not isinstance(inputs, (list, tuple)):
-            raise TypeError("Inputs must be a list or tuple, instead got '{}'".format(type(inputs)))
+        check_stack_params(inputs, srs, resolution, dimensions, bounds, order, dltile)
 
         params = dict(
             bands=bands,
@@ -806,35 +1489,21 @@ class Raster(Service):
             bounds_srs=bounds_srs,
             align_pixels=align_pixels,
             resampler=resampler,
-            order=order,
+            order="gdal",
             dltile=dltile,
             processing_level=processing_level,
             max_workers=max_workers,
+            executor=executor,
             **pass_through_params
         )
 
-        if dltile is None:
-            if resolution is None and dimensions is None:
-                raise ValueError("Must set `resolution` or `dimensions`")
-            if srs is None:
-                raise ValueError("Must set `srs`")
-            if bounds is None:
-                raise ValueError("Must set `bounds`")
-
-        full_stack = None
+        stack = StackBuffer(len(inputs), memmap=memmap)
         metadata = [None] * len(inputs)
-        for i, arr, meta in self._threaded_ndarray(inputs, **params):
-            if len(arr.shape) == 2:
-                if order == "image":
-                    arr = np.expand_dims(arr, -1)
-                elif order == "gdal":
-                    arr = np.expand_dims(arr, 0)
-                else:
-                    raise ValueError("Unknown order '{}'; should be one of 'image' or 'gdal'".format(order))
-            if full_stack is None:
-                stack_shape = (len(inputs),) + arr.shape
-                full_stack = np.empty(stack_shape, dtype=arr.dtype)
-            full_stack[i] = arr
+        for i, arr, meta in self._threaded_ndarray(inputs, slots=stack.slot, **params):
+            stack.put(i, arr)
             metadata[i] = meta
 
-        return full_stack, metadata
+        result = stack.result(order)
+        metrics_registry().histogram("stack_assembly_seconds", {"method": "Raster.stack"}).observe(
+            stack.assembly_seconds)
+        return result, metadata
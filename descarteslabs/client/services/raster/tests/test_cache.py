@@ -0,0 +1,104 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from descarteslabs.client.addons import numpy as np
+from descarteslabs.client.services.raster import RasterCache
+
+
+class TestRasterCache(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def entries(self):
+        return sorted(name for name in os.listdir(self.path) if name != RasterCache.INDEX_NAME)
+
+    def test_key(self):
+        self.assertEqual(
+            RasterCache.key("url", {"a": 1, "b": [1, 2]}),
+            RasterCache.key("url", {"b": [1, 2], "a": 1}),
+        )
+        self.assertNotEqual(RasterCache.key("url", {"a": 1}), RasterCache.key("url", {"a": 2}))
+        self.assertNotEqual(RasterCache.key("url", {"a": 1}), RasterCache.key("other", {"a": 1}))
+
+    def test_get_set(self):
+        cache = RasterCache(self.path)
+        array = np.arange(100, dtype=np.uint16).reshape((10, 10))
+
+        self.assertIsNone(cache.get("foo"))
+        cache.set("foo", array, {"bands": ["red"]})
+        cached, metadata = cache.get("foo")
+
+        self.assertIsInstance(cached, np.memmap)
+        self.assertFalse(cached.flags.writeable)
+        self.assertTrue((cached == array).all())
+        self.assertEqual(metadata, {"bands": ["red"]})
+        self.assertEqual(cache.stats, {"hits": 1, "misses": 1, "evictions": 0})
+
+    def test_shared_index(self):
+        RasterCache(self.path).set("foo", np.zeros(10), {})
+        self.assertIsNotNone(RasterCache(self.path).get("foo"))
+
+    def test_replace(self):
+        cache = RasterCache(self.path)
+        cache.set("foo", np.zeros(10), {})
+        cache.set("foo", np.ones(10), {})
+        self.assertTrue((cache.get("foo")[0] == 1).all())
+        self.assertEqual(len(self.entries()), 2)
+
+    def test_evict_least_recently_used(self):
+        cache = RasterCache(self.path, max_size=250)
+        for key in ["a", "b"]:
+            cache.set(key, np.zeros(100, dtype=np.uint8), {})
+        cache.get("a")
+        cache.set("c", np.zeros(100, dtype=np.uint8), {})
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(len(self.entries()), 4)
+
+    def test_too_large(self):
+        cache = RasterCache(self.path, max_size=10)
+        cache.set("foo", np.zeros(100, dtype=np.uint8), {})
+        self.assertIsNone(cache.get("foo"))
+        self.assertEqual(self.entries(), [])
+
+    def test_missing_file(self):
+        cache = RasterCache(self.path)
+        cache.set("foo", np.zeros(10), {})
+        for name in self.entries():
+            os.remove(os.path.join(self.path, name))
+        self.assertIsNone(cache.get("foo"))
+        self.assertEqual(cache.misses, 1)
+
+    def test_clear(self):
+        cache = RasterCache(self.path)
+        cache.set("foo", np.zeros(10), {})
+        cache.clear()
+        self.assertIsNone(cache.get("foo"))
+        self.assertEqual(self.entries(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import re
+import threading
+import time
+import unittest
+
+import responses
+
+from descarteslabs.client.auth import Auth
+from descarteslabs.client.exceptions import ServerError
+from descarteslabs.client.services.raster import HedgePolicy, Raster
+from descarteslabs.client.services.raster.tests.test_raster import public_token, raster_response
+from descarteslabs.client.services.service.metrics import LatencyHistogram, metrics_registry
+
+
+def primed_policy(**kwargs):
+    # hedges requests taking longer than about 10ms, right away
+    policy = HedgePolicy(min_samples=100, budget=1, **kwargs)
+    for _ in range(100):
+        policy.histogram.observe(0.01)
+    return policy
+
+
+class TestHedgePolicy(unittest.TestCase):
+
+    def setUp(self):
+        metrics_registry().reset()
+
+    def test_no_hedge_without_samples(self):
+        policy = HedgePolicy(budget=1)
+        self.assertIsNone(policy.delay())
+        self.assertEqual(policy.call(lambda: "result"), "result")
+        self.assertEqual(policy.stats, {"requests": 1, "hedged": 0, "hedge_wins": 0})
+
+    def test_hedge_slow_request(self):
+        policy = primed_policy()
+        release = threading.Event()
+        calls = []
+        discarded = []
+
+        def request():
+            calls.append(None)
+            if len(calls) == 1:
+                # the original request is stuck until the hedge responded
+                release.wait(5)
+                return "slow"
+            return "fast"
+
+        self.assertEqual(policy.call(request, discard=discarded.append), "fast")
+        release.set()
+        policy._executor.shutdown(wait=True)
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(discarded, ["slow"])
+        self.assertEqual(policy.stats, {"requests": 1, "hedged": 1, "hedge_wins": 1})
+
+    def test_registry_histogram(self):
+        policy = HedgePolicy()
+        policy.call(lambda: "result")
+        self.assertEqual(metrics_registry().histogram("hedged_request_seconds").count, 1)
+        self.assertIn("dl_hedged_request_seconds_count 1", metrics_registry().to_prometheus())
+
+        histogram = LatencyHistogram()
+        HedgePolicy(histogram=histogram).call(lambda: "result")
+        self.assertEqual(histogram.count, 1)
+        self.assertEqual(metrics_registry().histogram("hedged_request_seconds").count, 1)
+
+    def test_no_hedge_when_busy(self):
+        policy = primed_policy(max_workers=1)
+        self.assertEqual(policy.call(lambda: time.sleep(0.05) or "slow"), "slow")
+        self.assertEqual(policy.stats["hedged"], 0)
+        policy._executor.shutdown(wait=True)
+        self.assertEqual(policy._running, 0)
+
+    def test_fast_request(self):
+        policy = primed_policy(min_delay=1)
+        self.assertEqual(policy.call(lambda: "result"), "result")
+        self.assertEqual(policy.stats["hedged"], 0)
+
+    def test_budget(self):
+        policy = primed_policy()
+        policy.budget = 0.5
+
+        for _ in range(4):
+            policy.call(lambda: time.sleep(0.05))
+        # only every other request earned a hedge
+        self.assertEqual(policy.stats["hedged"], 2)
+
+    def test_errors(self):
+        policy = primed_policy()
+        calls = []
+
+        def request():
+            calls.append(None)
+            if len(calls) == 1:
+                time.sleep(0.05)
+                raise ServerError("slow failure")
+            raise ServerError("fast failure")
+
+        with self.assertRaises(ServerError) as context:
+            policy.call(request)
+        self.assertEqual(str(context.exception), "slow failure")
+
+    def test_failed_hedge(self):
+        policy = primed_policy()
+        calls = []
+
+        def request():
+            calls.append(None)
+            if len(calls) == 1:
+                time.sleep(0.05)
+                return "slow"
+            raise ServerError("failure")
+
+        self.assertEqual(policy.call(request), "slow")
+        self.assertEqual(policy.stats["hedge_wins"], 0)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            HedgePolicy(percentile=100)
+        with self.assertRaises(ValueError):
+            HedgePolicy(budget=-1)
+
+
+class TestRasterHedged(unittest.TestCase):
+
+    @responses.activate
+    def test_raster(self):
+        url = "http://example.com/raster/v1"
+        raster = Raster(url=url, auth=Auth(jwt_token=public_token, token_info_path=None), hedge=primed_policy())
+        data = b"data"
+        responses.add(responses.POST, re.compile(url), body=raster_response([("id_red.tif", data)]))
+
+        r = raster.raster(["id"], bands=["red"], dltile="1024:16:15.0:41:-16:324")
+        self.assertEqual(r["files"], {"id_red.tif": data})
+        self.assertEqual(raster.hedge.stats["requests"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -14,8 +14,23 @@
 
 import json
 import unittest
+from io import BytesIO
 
-from descarteslabs.client.services.raster.raster import as_json_string
+from descarteslabs.client.addons import blosc, concurrent, numpy as np
+from descarteslabs.client.exceptions import ServerError
+from descarteslabs.client.services.raster.raster import as_json_string, read_blosc_array
+
+
+def blosc_stream(array, chunk_size=1000):
+    data = array.tobytes()
+    chunks = [blosc.compress(data[i:i + chunk_size], typesize=array.itemsize)
+              for i in range(0, len(data), chunk_size)]
+    metadata = {
+        "shape": array.shape,
+        "dtype": array.dtype.name,
+        "chunks": [len(chunk) for chunk in chunks],
+    }
+    return metadata, BytesIO(b"".join(chunks))
 
 
 class TestUtilities(unittest.TestCase):
@@ -29,6 +44,81 @@ class TestUtilities(unittest.TestCase):
         self.assertEqual(as_json_string(s), truth)
         self.assertEqual(as_json_string(None), None)
 
+    def test_read_blosc_array(self):
+        expected = np.arange(3 * 40 * 50, dtype=np.uint16).reshape((3, 40, 50))
+        metadata, data = blosc_stream(expected)
+
+        arr = read_blosc_array(metadata, data)
+        self.assertTrue((arr == expected).all())
+
+    def test_read_blosc_array_executor(self):
+        expected = np.arange(3 * 400 * 500, dtype=np.uint16).reshape((3, 400, 500))
+        metadata, data = blosc_stream(expected)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            out = np.zeros((2,) + expected.shape, dtype=expected.dtype)
+            arr = read_blosc_array(metadata, data, out=out[1], executor=executor)
+        self.assertTrue(np.may_share_memory(arr, out))
+        self.assertTrue((out[1] == expected).all())
+        self.assertTrue((out[0] == 0).all())
+
+    def test_read_blosc_array_incomplete(self):
+        expected = np.arange(40 * 50, dtype=np.uint16).reshape((40, 50))
+        metadata, data = blosc_stream(expected)
+        metadata["chunks"] = metadata["chunks"][:-1]
+
+        with self.assertRaises(ServerError):
+            read_blosc_array(metadata, data)
+
+    def test_read_blosc_array_too_large(self):
+        expected = np.arange(40 * 50, dtype=np.uint16).reshape((40, 50))
+        metadata, data = blosc_stream(expected)
+        metadata["shape"] = (40, 40)
+
+        out = np.zeros((2, 40, 40), dtype=expected.dtype)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            with self.assertRaises(ServerError):
+                read_blosc_array(metadata, data, out=out[0], executor=executor)
+        self.assertTrue((out[1] == 0).all())
+
+    def test_read_blosc_array_out(self):
+        expected = np.arange(3 * 40 * 50, dtype=np.uint16).reshape((3, 40, 50))
+        metadata, data = blosc_stream(expected)
+
+        stack = np.zeros((2,) + expected.shape, dtype=expected.dtype)
+        arr = read_blosc_array(metadata, data, out=stack[1])
+        self.assertTrue(np.may_share_memory(arr, stack))
+        self.assertTrue((stack[1] == expected).all())
+        self.assertTrue((stack[0] == 0).all())
+
+    def test_read_blosc_array_out_not_contiguous(self):
+        expected = np.arange(3 * 40 * 50, dtype=np.uint16).reshape((3, 40, 50))
+        metadata, data = blosc_stream(expected)
+
+        out = np.zeros((40, 50, 3), dtype=expected.dtype)
+        read_blosc_array(metadata, data, out=out.transpose((2, 0, 1)))
+        self.assertTrue((out.transpose((2, 0, 1)) == expected).all())
+
+    def test_read_blosc_array_out_callable(self):
+        expected = np.arange(40 * 50, dtype=np.float32).reshape((40, 50))
+        metadata, data = blosc_stream(expected)
+
+        out = np.zeros((1, 40, 50), dtype=expected.dtype)
+        arr = read_blosc_array(metadata, data, out=lambda shape, dtype: out)
+        self.assertEqual(arr.shape, (40, 50))
+        self.assertTrue((out[0] == expected).all())
+
+    def test_read_blosc_array_out_mismatch(self):
+        expected = np.arange(40 * 50, dtype=np.uint16).reshape((40, 50))
+
+        metadata, data = blosc_stream(expected)
+        with self.assertRaises(ValueError):
+            read_blosc_array(metadata, data, out=np.zeros((40, 50), dtype=np.int32))
+
+        metadata, data = blosc_stream(expected)
+        with self.assertRaises(ValueError):
+            read_blosc_array(metadata, data, out=np.zeros((40, 49), dtype=np.uint16))
+
 
 if __name__ == "__main__":
     unittest.main()
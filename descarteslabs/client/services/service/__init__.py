@@ -12,6 +12,38 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .service import Service, JsonApiService, ThirdPartyService, NotFoundError
+import sys
 
-__all__ = ["Service", "JsonApiService", "ThirdPartyService", "NotFoundError"]
+from .service import (
+    Service,
+    JsonApiService,
+    ThirdPartyService,
+    NotFoundError,
+    configure_connection_pools,
+    connection_pool_stats,
+)
+from .throttle import configure_throttling, throttle_stats
+from .hooks import RequestEvent, add_request_hook, remove_request_hook
+from .metrics import LatencyHistogram, MetricsRegistry, metrics_registry
+
+__all__ = [
+    "Service",
+    "JsonApiService",
+    "ThirdPartyService",
+    "NotFoundError",
+    "configure_connection_pools",
+    "connection_pool_stats",
+    "configure_throttling",
+    "throttle_stats",
+    "RequestEvent",
+    "add_request_hook",
+    "remove_request_hook",
+    "LatencyHistogram",
+    "MetricsRegistry",
+    "metrics_registry",
+]
+
+if sys.version_info >= (3, 6):
+    from .async_service import AsyncService, AsyncThirdPartyService  # noqa: F401
+
+    __all__ += ["AsyncService", "AsyncThirdPartyService"]
@@ -0,0 +1,217 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""asyncio variants of the service base classes. Requires Python 3.6+ and aiohttp."""
+
+import asyncio
+
+import requests
+from urllib3.exceptions import (
+    ConnectTimeoutError,
+    MaxRetryError,
+    ProtocolError,
+    ReadTimeoutError,
+    ResponseError,
+)
+from urllib3.response import HTTPResponse
+
+from descarteslabs.client.addons import aiohttp
+from descarteslabs.client.auth import Auth
+from descarteslabs.client.services.service import codec, hooks
+from descarteslabs.client.services.service.service import (
+    Service,
+    ThirdPartyService,
+    client_headers,
+    raise_for_status,
+)
+
+
+# Maximum number of requests a client has in flight at once
+DEFAULT_MAX_CONCURRENCY = 64
+
+
+class AsyncResponse(object):
+    """The status, headers and body of a successful response"""
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return codec.loads(self.content)
+
+
+class AsyncService(object):
+    """
+    Base class of the asyncio clients, with the timeouts, retries and
+    error handling of `Service`.
+
+    Clients should be closed when no longer used, with ``await client.close()``
+    or by using them as an asynchronous context manager (``async with``).
+    """
+
+    TIMEOUT = Service.TIMEOUT
+    RETRY_CONFIG = Service.RETRY_CONFIG
+    CONTENT_TYPE = "application/json"
+
+    def __init__(self, url, auth=None, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        """
+        :param str url: The URL of the service.
+        :param Auth auth: The authentication to use; a default `Auth` if None.
+        :param int max_concurrency: Maximum number of requests in flight at once;
+            further requests wait for one of them to complete.
+        """
+        if auth is None:
+            auth = Auth()
+
+        self.auth = auth
+        self.base_url = url
+        self.max_concurrency = max_concurrency
+        self._session = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """Close the connections of this client"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self):
+        # created lazily, as they must be created within the event loop using them
+        if self._session is None:
+            headers = client_headers()
+            headers["Content-Type"] = self.CONTENT_TYPE
+            self._session = aiohttp.ClientSession(
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(sock_connect=self.TIMEOUT[0], sock_read=self.TIMEOUT[1]),
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def _authorization(self):
+        # getting the token may refresh it, which is blocking
+        return await asyncio.get_event_loop().run_in_executor(None, lambda: self.auth.token)
+
+    async def request(self, method, url, **kwargs):
+        """
+        Send a request to `url`, relative to the URL of the service, retrying
+        it according to `RETRY_CONFIG`, and raising the same exceptions as
+        `Service.session` for unsuccessful responses.
+
+        Keyword arguments are passed to `aiohttp.ClientSession.request`.
+
+        :rtype: AsyncResponse
+        """
+        session = self._get_session()
+        headers = dict(kwargs.pop("headers", None) or {})
+        if kwargs.get("json") is not None:
+            kwargs["data"] = codec.dumps(kwargs.pop("json"))
+            headers.setdefault("Content-Type", "application/json")
+        authorization = await self._authorization()
+        if authorization is not None:
+            headers["Authorization"] = authorization
+
+        event = hooks.RequestEvent(type(self).__name__, method, self.base_url + url, path=url)
+        hooks.fire("pre_request", event)
+        try:
+            return await self._send(event, session, method, url, headers, kwargs)
+        except Exception as e:
+            event.error = e
+            hooks.fire("error", event)
+            raise
+
+    async def _send(self, event, session, method, url, headers, kwargs):
+        retries = self.RETRY_CONFIG.new()
+        async with self._semaphore:
+            while True:
+                try:
+                    async with session.request(method, self.base_url + url, headers=headers, **kwargs) as resp:
+                        status, resp_headers = resp.status, resp.headers
+                        retry = retries.is_retry(method, status, has_retry_after="Retry-After" in resp_headers)
+                        if not retry:
+                            event.status = status
+                            hooks.fire("response_headers", event)
+                        content = await resp.read()
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    retries = _increment(retries, method, url, error=_urllib3_error(e, url))
+                    hooks.retried(event, error=e)
+                    await asyncio.sleep(retries.get_backoff_time())
+                    continue
+
+                if retry:
+                    response = HTTPResponse(body=b"", headers=dict(resp_headers), status=status)
+                    retries = _increment(retries, method, url, response=response)
+                    hooks.retried(event, status=status)
+                    await asyncio.sleep(retries.get_retry_after(response) or retries.get_backoff_time())
+                    continue
+
+                event.bytes = len(content)
+                hooks.fire("response_complete", event)
+                if 200 <= status < 400:
+                    return AsyncResponse(status, resp_headers, content)
+                raise_for_status(method, url, status, content.decode("utf-8", "replace"))
+
+
+class AsyncThirdPartyService(AsyncService):
+    """asyncio variant of `ThirdPartyService`, for requests to absolute URLs without authentication"""
+
+    TIMEOUT = ThirdPartyService.TIMEOUT
+    RETRY_CONFIG = ThirdPartyService.RETRY_CONFIG
+    CONTENT_TYPE = "application/octet-stream"
+
+    def __init__(self, url="", max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        # requests are authorized by their (signed) URLs
+        super(AsyncThirdPartyService, self).__init__(url, auth=False, max_concurrency=max_concurrency)
+
+    async def _authorization(self):
+        return None
+
+
+def _urllib3_error(error, url):
+    # the urllib3 exception `Retry` should count an aiohttp exception as
+    if isinstance(error, getattr(aiohttp, "ConnectionTimeoutError", ())):
+        return ConnectTimeoutError(str(error))
+    if isinstance(error, aiohttp.ClientConnectorError):
+        return ConnectTimeoutError(str(error))
+    if isinstance(error, (aiohttp.ServerTimeoutError, asyncio.TimeoutError)):
+        return ReadTimeoutError(None, url, str(error))
+    return ProtocolError(str(error), error)
+
+
+def _increment(retries, method, url, response=None, error=None):
+    # raises the same exceptions as requests once retries are exhausted
+    try:
+        return retries.increment(method, url, response=response, error=error)
+    except MaxRetryError as e:
+        if isinstance(e.reason, ConnectTimeoutError):
+            raise requests.exceptions.ConnectTimeout(e) from error
+        if isinstance(e.reason, ResponseError):
+            raise requests.exceptions.RetryError(e) from error
+        raise requests.exceptions.ConnectionError(e) from error
+    except ReadTimeoutError as e:
+        raise requests.exceptions.ReadTimeout(e) from error
+    except (ConnectTimeoutError, ProtocolError) as e:
+        raise requests.exceptions.ConnectionError(e) from error
@@ -0,0 +1,265 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+The JSON codec of the services: request bodies are serialized compactly,
+and responses are decoded with the fastest JSON package installed, either
+`orjson` or `ujson`, or with the standard library's `json` otherwise.
+
+Values a faster package can't handle fall back to the standard library, so
+the result is the same whichever package is used, except that `orjson`
+also serializes numpy arrays, numpy scalars and datetimes, and writes NaN
+as null instead of raising a `ValueError`.
+
+Large JSON arrays can also be decoded incrementally from a streamed response
+with `iter_array`, an element at a time.
+"""
+
+import codecs
+import json
+import os
+import re
+import warnings
+
+import six
+
+from descarteslabs.client.addons import ThirdParty, orjson, ujson
+
+
+JSON_BACKENDS = ("orjson", "ujson", "json")
+
+_backend = {}
+
+
+def set_json_backend(name=None):
+    """
+    Choose the package used to encode and decode JSON.
+
+    :param str name: One of ``orjson``, ``ujson`` or ``json``. If None, the
+        ``DESCARTESLABS_JSON_BACKEND`` environment variable if set, otherwise the
+        first of them which is installed.
+    :raises ImportError: If the package is not installed.
+    """
+    if name is None:
+        name = os.environ.get("DESCARTESLABS_JSON_BACKEND")
+    if name is None:
+        name = next(
+            backend for backend in JSON_BACKENDS
+            if backend == "json" or not isinstance(_modules()[backend], ThirdParty)
+        )
+
+    if name not in JSON_BACKENDS:
+        raise ValueError("Unknown JSON backend '{}'; should be one of {}".format(name, ", ".join(JSON_BACKENDS)))
+    module = _modules()[name]
+    if isinstance(module, ThirdParty):
+        raise ImportError("Please install the {} package".format(name))
+
+    _backend["name"] = name
+    _backend["dumps"], _backend["loads"] = _CODECS[name]
+
+
+def json_backend():
+    """The name of the package used to encode and decode JSON"""
+    return _backend["name"]
+
+
+def dumps(obj):
+    """
+    Serialize `obj` to compact JSON.
+
+    :rtype: bytes
+    """
+    return _backend["dumps"](obj)
+
+
+def loads(data):
+    """Deserialize JSON from `data`, either bytes in UTF-8 or text"""
+    return _backend["loads"](data)
+
+
+def response_json(response, **kwargs):
+    """
+    Replacement for `requests.Response.json` decoding with the JSON backend.
+    With keyword arguments for `json.loads` or invalid JSON, it falls back to
+    `requests.Response.json`.
+    """
+    if not kwargs:
+        try:
+            return loads(response.content)
+        except ValueError:
+            pass
+    return type(response).json(response, **kwargs)
+
+
+def iter_array(fp, chunk_size=64 * 1024):
+    """
+    Generate the elements of the JSON array read from the file-like `fp`,
+    each as soon as it has been read, so that the whole array is never in
+    memory at once. Elements are decoded with the standard library's `json`.
+
+    :param fp: A file-like object with a ``read(size)`` method returning bytes in UTF-8.
+    :param int chunk_size: Number of bytes to read at once.
+    :raises ValueError: If the content isn't a JSON array.
+    """
+    reader = _Reader(fp, chunk_size)
+    decoder = _decoder
+
+    if reader.next_char() != "[":
+        raise ValueError("Expecting a JSON array at char {}".format(reader.offset()))
+    reader.pos += 1
+
+    if reader.next_char() == "]":
+        reader.pos += 1
+    else:
+        while True:
+            reader.next_char()
+            size = chunk_size
+            while True:
+                try:
+                    value, end = decoder.raw_decode(reader.buffer, reader.pos)
+                except ValueError:
+                    # the element may continue in the next chunks; as elements
+                    # are decoded again from their start, the chunks grow
+                    if not reader.read(size):
+                        raise
+                    size *= 2
+                    continue
+                # a number at the end of the buffer may also continue
+                if end == len(reader.buffer) and not reader.eof and isinstance(value, (int, float)):
+                    reader.read(size)
+                    continue
+                break
+
+            reader.pos = end
+            yield value
+
+            char = reader.next_char()
+            reader.pos += 1
+            if char == "]":
+                break
+            if char != ",":
+                raise ValueError("Expecting ',' delimiter at char {}".format(reader.offset() - 1))
+
+    if reader.next_char():
+        raise ValueError("Extra data at char {}".format(reader.offset()))
+
+
+def iter_response_array(response, chunk_size=64 * 1024):
+    """
+    Generate the elements of the JSON array of a response requested with
+    ``stream=True``, with `iter_array`. The response is closed once the array
+    has been read, or if the generator is closed.
+    """
+    try:
+        response.raw.decode_content = True
+        for value in iter_array(response.raw, chunk_size=chunk_size):
+            yield value
+    finally:
+        response.close()
+
+
+_decoder = json.JSONDecoder()
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+
+class _Reader(object):
+    # a buffer of the text of a file-like object, consumed from `pos`
+
+    def __init__(self, fp, chunk_size):
+        self._fp = fp
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._consumed = 0
+        self.buffer = u""
+        self.pos = 0
+        self.eof = False
+
+    def read(self, size=None):
+        """Read more of the text, dropping what was consumed. Returns False at the end."""
+        if self.eof:
+            return False
+        chunk = self._fp.read(size or self._chunk_size)
+        self.eof = not chunk
+        self._consumed += self.pos
+        self.buffer = self.buffer[self.pos:] + self._decoder.decode(chunk or b"", final=self.eof)
+        self.pos = 0
+        return True
+
+    def next_char(self):
+        """The next character which isn't whitespace, or an empty string at the end"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self.read():
+                return self.buffer[self.pos:self.pos + 1]
+
+    def offset(self):
+        return self._consumed + self.pos
+
+
+def _modules():
+    return {"orjson": orjson, "ujson": ujson, "json": json}
+
+
+def _json_dumps(obj):
+    return json.dumps(obj, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+def _json_loads(data):
+    if isinstance(data, six.binary_type):
+        data = data.decode("utf-8")
+    return json.loads(data)
+
+
+def _orjson_dumps(obj):
+    try:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        return _json_dumps(obj)
+
+
+def _orjson_loads(data):
+    try:
+        return orjson.loads(data)
+    except ValueError:
+        # e.g. NaN, or integers of more than 64 bits
+        return _json_loads(data)
+
+
+def _ujson_dumps(obj):
+    try:
+        return ujson.dumps(obj, escape_forward_slashes=False).encode("utf-8")
+    except (TypeError, OverflowError):
+        return _json_dumps(obj)
+
+
+def _ujson_loads(data):
+    try:
+        return ujson.loads(data)
+    except ValueError:
+        return _json_loads(data)
+
+
+_CODECS = {
+    "orjson": (_orjson_dumps, _orjson_loads),
+    "ujson": (_ujson_dumps, _ujson_loads),
+    "json": (_json_dumps, _json_loads),
+}
+
+try:
+    set_json_backend()
+except (ImportError, ValueError) as e:
+    warnings.warn("{}; using the json package instead".format(e))
+    set_json_backend("json")
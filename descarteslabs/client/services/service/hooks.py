@@ -0,0 +1,254 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Hooks called at each stage of the requests made by all services of a process.
+
+Hooks are called with a `RequestEvent` for these events, in this order:
+
+* ``pre_request``: before the request is sent
+* ``retry``: when the request is retried, after a failed attempt
+* ``response_headers``: when the headers of the response are received
+* ``response_complete``: when the body of the response has been received,
+  which for streamed responses is when it has been read or closed
+* ``error``: when the request failed, with an unsuccessful status or without a response
+
+Hooks are called on the thread making the request (or reading its response),
+so they should be quick. Exceptions raised by hooks are logged and ignored.
+"""
+
+import logging
+import re
+import threading
+import time
+
+from six.moves.urllib.parse import urlsplit
+
+from descarteslabs.client.services.service.metrics import metrics_registry
+
+
+EVENTS = ("pre_request", "retry", "response_headers", "response_complete", "error")
+
+_monotonic = getattr(time, "monotonic", time.time)
+
+_hooks = dict((event, ()) for event in EVENTS)
+_hooks_lock = threading.Lock()
+
+# The request being sent by each thread, to which retries are reported
+_current = threading.local()
+
+# Path segments kept as they are in endpoints; any other segment is
+# most likely an identifier
+_ENDPOINT_SEGMENT = re.compile(r"^[A-Za-z_]+$")
+
+# The routes of the services, relative to their URLs, where ``{}`` is a segment
+# holding an identifier and ``{...}`` the rest of the path, like a storage key
+_ROUTES = (
+    # raster
+    "/npz", "/raster", "/dlkeys/{}", "/dlkeys/from_latlon/{}/{}", "/dlkeys/from_shape",
+    # metadata
+    "/search", "/summary", "/batch/images", "/get/{}", "/sources",
+    "/products", "/products/search", "/products/{}",
+    "/bands/search", "/bands/{}", "/bands/all/{}", "/bands/id/{}", "/bands/derived/search", "/bands/derived/{}",
+    # catalog
+    "/products/{}/bands", "/products/{}/bands/{}", "/products/{}/images", "/products/{}/images/{}",
+    "/products/{}/images/upload/{}", "/products/{}/uploads", "/products/{}/uploads/{}",
+    "/products/deletion_tasks/{}", "/core/products", "/core/products/{}/bands", "/core/products/{}/images",
+    # vector
+    "/products/{}/features", "/products/{}/features/uploads", "/products/{}/features/uploads/{}",
+    "/products/{}/search", "/products/{}/search/copy", "/products/{}/search/copy/status",
+    "/products/{}/search/delete/status",
+    # places
+    "/placetypes", "/categories", "/random", "/metrics", "/find/{...}", "/shape/{}", "/prefix/{}",
+    "/data/{}", "/value/{}", "/statistics/{}",
+    # storage
+    "/{}/list", "/{}/get/{...}", "/{}/get_signed_url/{...}", "/{}/new_resumable_url/{...}", "/copy/{...}",
+    # tasks
+    "/groups", "/groups/{}", "/groups/{}/tasks", "/groups/{}/tasks/rerun", "/groups/{}/tasks/{}/results",
+    "/groups/{}/results", "/groups/{}/results/batch", "/groups/{}/webhooks", "/groups/{}/webhooks/{}",
+    "/namespaces/secrets/auth",
+)
+
+_ROUTE_SEGMENTS = [tuple(route.strip("/").split("/")) for route in _ROUTES]
+
+
+class RequestEvent(object):
+    """
+    The state of a request, as passed to hooks.
+
+    :ivar str event: The name of the event the hook is called for.
+    :ivar str service: The name of the service class making the request.
+    :ivar str method: The HTTP method of the request.
+    :ivar str url: The URL of the request.
+    :ivar str endpoint: The route of the request relative to the URL of the service,
+        with the segments holding identifiers replaced by ``{}`` (see `endpoint`).
+    :ivar int status: The status of the response, once received.
+    :ivar int retries: The number of times the request was retried so far.
+    :ivar int bytes: The number of bytes of the response body, once complete.
+    :ivar Exception error: The exception raised for a failed request.
+    :ivar float start: The time the request was sent, from a monotonic clock.
+    """
+
+    def __init__(self, service, method, url, path=None):
+        self.event = None
+        self.service = service
+        self.method = method.upper()
+        self.url = url
+        self.endpoint = endpoint(url if path is None else path)
+        self.status = None
+        self.retries = 0
+        self.bytes = None
+        self.error = None
+        self.start = _monotonic()
+
+    @property
+    def elapsed(self):
+        """The number of seconds since the request was sent"""
+        return _monotonic() - self.start
+
+    @property
+    def labels(self):
+        """The labels of the metrics of the request"""
+        return {"service": self.service, "method": self.method, "endpoint": self.endpoint}
+
+    def __repr__(self):
+        return "<RequestEvent {} {} {} {}>".format(self.event, self.service, self.method, self.url)
+
+
+def endpoint(path):
+    """
+    The endpoint of a URL or path: the route of the services it matches,
+    with the segments holding identifiers replaced by ``{}``, e.g.
+    ``/products/{}`` for ``/products/landsat:LC08:PRE:TOAR``. Of other paths,
+    only the first segment is kept if it looks like a name, e.g. ``/foo/{}``
+    for ``/foo/bar``, so that metrics have a bounded number of endpoints.
+    """
+    segments = urlsplit(path).path.strip("/").split("/")
+    if segments == [""]:
+        return "/"
+
+    best, best_literals = None, -1
+    for route in _ROUTE_SEGMENTS:
+        literals = _match(route, segments)
+        if literals is not None and literals > best_literals:
+            best, best_literals = route, literals
+    if best is not None:
+        return "/" + "/".join("{}" if segment == "{...}" else segment for segment in best)
+
+    first = segments[0] if _ENDPOINT_SEGMENT.match(segments[0]) else "{}"
+    return "/" + "/".join([first] + ["{}"] * (len(segments) - 1))
+
+
+def _match(route, segments):
+    # the number of literal segments of `route` if it matches `segments`, otherwise None
+    literals = 0
+    for i, part in enumerate(route):
+        if part == "{...}":
+            return literals if len(segments) > i else None
+        if i >= len(segments):
+            return None
+        if part != "{}":
+            if part != segments[i]:
+                return None
+            literals += 1
+    return literals if len(route) == len(segments) else None
+
+
+def add_request_hook(event, hook):
+    """
+    Call `hook` with a `RequestEvent` on every `event` of every request made
+    by the services of this process.
+
+    :param str event: One of ``pre_request``, ``retry``, ``response_headers``,
+        ``response_complete`` and ``error``.
+    :param callable hook: The hook.
+    """
+    if event not in _hooks:
+        raise ValueError("Unknown event {}, expected one of {}".format(event, ", ".join(EVENTS)))
+    with _hooks_lock:
+        _hooks[event] = _hooks[event] + (hook,)
+
+
+def remove_request_hook(event, hook):
+    """Stop calling `hook` added with `add_request_hook` on `event`"""
+    if event not in _hooks:
+        raise ValueError("Unknown event {}, expected one of {}".format(event, ", ".join(EVENTS)))
+    with _hooks_lock:
+        hooks = list(_hooks[event])
+        hooks.remove(hook)
+        _hooks[event] = tuple(hooks)
+
+
+def fire(event, request):
+    """Call the hooks of `event` with the `RequestEvent` `request`"""
+    request.event = event
+    _record(event, request)
+    for hook in _hooks[event]:
+        try:
+            hook(request)
+        except Exception:
+            logging.getLogger(__name__).exception("Request hook %r failed on %s", hook, event)
+
+
+class sending(object):
+    """
+    A context manager firing ``pre_request`` for `request`, during which
+    retries made by the current thread are reported to it.
+    """
+
+    def __init__(self, request):
+        self.request = request
+
+    def __enter__(self):
+        self._previous = getattr(_current, "request", None)
+        _current.request = self.request
+        fire("pre_request", self.request)
+        return self.request
+
+    def __exit__(self, *exc_info):
+        _current.request = self._previous
+
+
+def retrying(error=None, status=None):
+    """Report a retry of the request being sent by the current thread, if any"""
+    request = getattr(_current, "request", None)
+    if request is not None:
+        retried(request, error=error, status=status)
+
+
+def retried(request, error=None, status=None):
+    """Report a retry of `request`, after an attempt failed with `error` or `status`"""
+    request.retries += 1
+    request.status = status
+    request.error = error
+    fire("retry", request)
+    request.status = request.error = None
+
+
+def _record(event, request):
+    # the built-in metrics of every request
+    if event == "response_headers":
+        registry = metrics_registry()
+        labels = request.labels
+        registry.counter("requests_total", dict(labels, status=str(request.status))).inc()
+        registry.histogram("response_headers_seconds", labels).observe(request.elapsed)
+    elif event == "response_complete":
+        registry = metrics_registry()
+        labels = request.labels
+        registry.histogram("request_seconds", labels).observe(request.elapsed)
+        registry.counter("response_bytes_total", labels).inc(request.bytes or 0)
+    elif event == "retry":
+        metrics_registry().counter("request_retries_total", request.labels).inc()
+    elif event == "error":
+        metrics_registry().counter("request_errors_total", request.labels).inc()
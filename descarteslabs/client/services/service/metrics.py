@@ -0,0 +1,370 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Metrics of the requests made by the services of a process.
+
+Every request made by a service is recorded in the registry returned by
+`metrics_registry`, which can be exported as JSON or in the Prometheus
+text format.
+"""
+
+import bisect
+import json
+import threading
+import time
+
+from descarteslabs.common.threading.local import ProcessLocalWrapper
+
+
+_monotonic = getattr(time, "monotonic", time.time)
+
+
+def _exponential_bounds(start, factor, count):
+    return tuple(start * factor ** i for i in range(count))
+
+
+# Upper bounds in seconds of the buckets of a latency histogram: from 1ms
+# to about 10 minutes, each 25% larger than the previous one
+DEFAULT_LATENCY_BOUNDS = _exponential_bounds(0.001, 1.25, 60)
+
+# Descriptions of the metrics recorded by the client
+METRIC_HELP = {
+    "requests_total": "Number of responses, by status",
+    "request_errors_total": "Number of failed requests",
+    "request_retries_total": "Number of retried requests",
+    "response_bytes_total": "Number of bytes received in response bodies",
+    "response_headers_seconds": "Time until the headers of the responses were received",
+    "request_seconds": "Time until the responses were complete",
+    "raster_decode_seconds": "Time spent reading and decoding rasters",
+    "stack_assembly_seconds": "Time spent assembling stacks of rasters",
+    "metadata_cache_total": "Number of lookups in metadata caches, by result",
+    "hedged_request_seconds": "Time until the responses of requests sent by hedge policies started arriving",
+}
+
+
+class LatencyHistogram(object):
+    """
+    A thread-safe histogram of latencies in seconds, counting observations
+    in buckets with the given upper `bounds`, plus an overflow bucket.
+
+    If a `window` is given, the counts from which :meth:`percentile` is
+    estimated are halved every `window` observations, so it follows recent
+    latencies rather than all latencies ever observed. The counts of
+    :meth:`snapshot`, the total :attr:`count` and :attr:`sum` are never decayed.
+    """
+
+    def __init__(self, bounds=DEFAULT_LATENCY_BOUNDS, window=None):
+        if list(bounds) != sorted(bounds) or not bounds:
+            raise ValueError("bounds must be a non-empty increasing sequence")
+        if window is not None and window < 1:
+            raise ValueError("window must be at least 1")
+
+        self.bounds = tuple(bounds)
+        self.window = window
+        self.count = 0
+        self.sum = 0.0
+        self._buckets = [0] * (len(self.bounds) + 1)
+        self._recent = [0.0] * len(self._buckets) if window is not None else None
+        self._since_decay = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        """Add an observed latency of `seconds`"""
+        i = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.count += 1
+            self.sum += seconds
+            self._buckets[i] += 1
+            if self._recent is not None:
+                self._recent[i] += 1
+                self._since_decay += 1
+                if self._since_decay >= self.window:
+                    self._recent = [n / 2 for n in self._recent]
+                    self._since_decay = 0
+
+    def percentile(self, q):
+        """
+        Estimate the `q`-th percentile (between 0 and 100) of the observed
+        latencies, interpolating linearly within its bucket.
+
+        :return: The latency in seconds, or None if nothing was observed.
+        :rtype: float
+        """
+        if not 0 <= q <= 100:
+            raise ValueError("q must be between 0 and 100")
+
+        with self._lock:
+            buckets = list(self._buckets if self._recent is None else self._recent)
+
+        total = sum(buckets)
+        if not total:
+            return None
+
+        rank = total * q / 100.0
+        seen = 0.0
+        for i, n in enumerate(buckets):
+            if n and seen + n >= rank:
+                if i == len(self.bounds):
+                    # the overflow bucket has no upper bound
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0.0
+                return lower + (self.bounds[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+    def snapshot(self):
+        """
+        The state of the histogram.
+
+        :return: A dictionary with the keys
+
+            * ``count``: the number of observations
+            * ``sum``: the sum of the observed latencies
+            * ``buckets``: a list of ``(upper_bound, count)`` tuples, with an upper
+              bound of ``inf`` for the overflow bucket.
+        :rtype: dict
+        """
+        with self._lock:
+            return {
+                "count": self.count,
+                "sum": self.sum,
+                "buckets": list(zip(self.bounds + (float("inf"),), self._buckets)),
+            }
+
+
+class Counter(object):
+    """A thread-safe counter"""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        """Add `amount` to the counter"""
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        with self._lock:
+            return {"value": self.value}
+
+
+class MetricsRegistry(object):
+    """
+    A thread-safe registry of counters and latency histograms, each identified
+    by its name and the values of its labels.
+
+    Example::
+
+        >>> from descarteslabs.client.services.service import metrics_registry
+        >>> print(metrics_registry().to_prometheus())  # doctest: +SKIP
+        # HELP dl_requests_total Number of requests, by response status
+        # TYPE dl_requests_total counter
+        dl_requests_total{endpoint="/npz",method="POST",service="Raster",status="200"} 1
+        ...
+    """
+
+    # Prefix of the names of the metrics in the Prometheus text format
+    PROMETHEUS_PREFIX = "dl_"
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, labels=None, help=None):
+        """
+        The counter `name` with the given `labels`, created if it doesn't exist yet.
+
+        :param str name: The name of the counter.
+        :param dict labels: The values of its labels, if any.
+        :param str help: A description of the counter, if not in `METRIC_HELP`.
+        :rtype: Counter
+        """
+        return self._metric("counter", Counter, name, labels, help)
+
+    def histogram(self, name, labels=None, help=None, window=None):
+        """
+        The latency histogram `name` with the given `labels`, created if it doesn't exist yet.
+
+        :param str name: The name of the histogram.
+        :param dict labels: The values of its labels, if any.
+        :param str help: A description of the histogram, if not in `METRIC_HELP`.
+        :param int window: The window of its percentiles (see `LatencyHistogram`),
+            if it is created.
+        :rtype: LatencyHistogram
+        """
+        return self._metric("histogram", lambda: LatencyHistogram(window=window), name, labels, help)
+
+    def _metric(self, kind, factory, name, labels, help):
+        key = tuple(sorted((labels or {}).items()))
+        with self._lock:
+            family = self._metrics.get(name)
+            if family is None:
+                family = self._metrics[name] = {"type": kind, "help": METRIC_HELP.get(name), "metrics": {}}
+            elif family["type"] != kind:
+                raise ValueError("{} is a {}, not a {}".format(name, family["type"], kind))
+            if help is not None:
+                family["help"] = help
+
+            metric = family["metrics"].get(key)
+            if metric is None:
+                metric = family["metrics"][key] = factory()
+        return metric
+
+    def reset(self):
+        """Remove all metrics"""
+        with self._lock:
+            self._metrics = {}
+
+    def snapshot(self):
+        """
+        The state of all metrics.
+
+        :return: A dictionary with an entry for each metric name, with the keys
+
+            * ``type``: ``counter`` or ``histogram``
+            * ``help``: the description of the metric, or None
+            * ``samples``: a list of dictionaries with the ``labels`` of each metric
+              of that name, and either its ``value`` (for counters) or the ``count``,
+              ``sum`` and ``buckets`` of its histogram (see `LatencyHistogram.snapshot`)
+        :rtype: dict
+        """
+        with self._lock:
+            families = [
+                (name, dict(family, metrics=list(family["metrics"].items())))
+                for name, family in self._metrics.items()
+            ]
+
+        snapshot = {}
+        for name, family in families:
+            samples = []
+            for key, metric in family["metrics"]:
+                sample = metric.snapshot()
+                sample["labels"] = dict(key)
+                samples.append(sample)
+            snapshot[name] = {"type": family["type"], "help": family["help"], "samples": samples}
+        return snapshot
+
+    def to_json(self, **kwargs):
+        """
+        The state of all metrics (see `snapshot`) as JSON. Keyword arguments
+        are passed to `json.dumps`.
+
+        :rtype: str
+        """
+        snapshot = self.snapshot()
+        for family in snapshot.values():
+            for sample in family["samples"]:
+                if "buckets" in sample:
+                    # infinity isn't valid JSON
+                    sample["buckets"] = [
+                        [None if bound == float("inf") else bound, count]
+                        for bound, count in sample["buckets"]
+                    ]
+        kwargs.setdefault("sort_keys", True)
+        return json.dumps(snapshot, **kwargs)
+
+    def to_prometheus(self):
+        """
+        The state of all metrics in the Prometheus text exposition format.
+
+        :rtype: str
+        """
+        lines = []
+        for name, family in sorted(self.snapshot().items()):
+            name = self.PROMETHEUS_PREFIX + name
+            if family["help"]:
+                lines.append("# HELP {} {}".format(name, family["help"].replace("\\", "\\\\").replace("\n", "\\n")))
+            lines.append("# TYPE {} {}".format(name, family["type"]))
+
+            for sample in sorted(family["samples"], key=lambda sample: sorted(sample["labels"].items())):
+                labels = sample["labels"]
+                if family["type"] == "counter":
+                    lines.append("{}{} {}".format(name, _prometheus_labels(labels), _prometheus_value(sample["value"])))
+                    continue
+
+                cumulative = 0
+                for bound, count in sample["buckets"]:
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else "{:g}".format(bound)
+                    lines.append("{}_bucket{} {}".format(
+                        name, _prometheus_labels(dict(labels, le=le)), _prometheus_value(cumulative)))
+                lines.append("{}_sum{} {}".format(name, _prometheus_labels(labels), _prometheus_value(sample["sum"])))
+                lines.append("{}_count{} {}".format(name, _prometheus_labels(labels), sample["count"]))
+
+        return "".join(line + "\n" for line in lines)
+
+
+def _prometheus_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(
+        '{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in sorted(labels.items())
+    ) + "}"
+
+
+def _prometheus_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+_registry = ProcessLocalWrapper(MetricsRegistry)
+
+
+def metrics_registry():
+    """
+    The registry of the metrics of this process, in which all services record
+    their requests.
+
+    The request metrics, labeled by ``service``, ``method`` and ``endpoint``, are
+
+    * ``requests_total``: the number of responses, also labeled by ``status``
+    * ``request_errors_total``: the number of requests which failed, with an
+      unsuccessful status or without a response
+    * ``request_retries_total``: the number of retries
+    * ``response_bytes_total``: the number of bytes received in response bodies
+    * ``response_headers_seconds``: a histogram of the time until the headers of
+      the responses were received
+    * ``request_seconds``: a histogram of the time until the responses were complete
+
+    Other metrics are ``raster_decode_seconds`` (the time spent reading and
+    decoding rasters, by ``format``), ``stack_assembly_seconds`` (the time
+    spent assembling stacks of rasters, by ``method``) and
+    ``hedged_request_seconds`` (the latencies from which hedge policies decide
+    to hedge requests, see :py:class:`~descarteslabs.client.services.raster.HedgePolicy`).
+
+    :rtype: MetricsRegistry
+    """
+    return _registry.get()
+
+
+class timed(object):
+    """
+    A context manager observing the time spent in its block in the histogram `name`
+    of the registry, with the given `labels`.
+    """
+
+    def __init__(self, name, labels=None):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self._start = _monotonic()
+        return self
+
+    def __exit__(self, *exc_info):
+        metrics_registry().histogram(self.name, self.labels).observe(_monotonic() - self._start)
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
 import itertools
 import random
 import os
@@ -20,8 +21,7 @@ import sys
 from warnings import warn
 
 import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+from requests.adapters import BaseAdapter, HTTPAdapter
 from descarteslabs.client.auth import Auth
 from descarteslabs.client.version import __version__
 from descarteslabs.client.exceptions import (
@@ -32,52 +32,249 @@ from descarteslabs.client.exceptions import (
     GatewayTimeoutError,
     ConflictError,
 )
-from descarteslabs.common.threading.local import ThreadLocalWrapper
+from descarteslabs.client.services.service import codec, hooks
+from descarteslabs.client.services.service.throttle import ThrottledRetry, host_throttle
+from descarteslabs.common.threading.local import ProcessLocalWrapper, ThreadLocalWrapper
+
+
+# Maximum number of connections kept open to each host, shared by all threads and services
+DEFAULT_POOL_MAXSIZE = 32
+
+_pool_config = {"pool_maxsize": DEFAULT_POOL_MAXSIZE, "pool_block": False}
+
+
+def configure_connection_pools(pool_maxsize=None, pool_block=None):
+    """
+    Configure the connection pools shared by all services in this process.
+
+    Connections from the current pools are closed once the requests using
+    them finish.
+
+    :param int pool_maxsize: Maximum number of connections kept open to each host.
+    :param bool pool_block: Whether requests should wait for a connection of the pool
+        to become available when all of them are in use, instead of opening a new
+        connection which is closed once the request finishes.
+    """
+    if pool_maxsize is not None:
+        _pool_config["pool_maxsize"] = pool_maxsize
+    if pool_block is not None:
+        _pool_config["pool_block"] = pool_block
+
+    Service.ADAPTER.reset()
+    ThirdPartyService.ADAPTER.reset()
+
+
+def connection_pool_stats():
+    """
+    Statistics of the connection pools shared by all services in this process.
+
+    :return: A dictionary with an entry for each host (like ``https://platform.descarteslabs.com:443``)
+        a connection was made to, with the keys
+
+        * ``maxsize``: the maximum number of connections kept open
+        * ``in_use``: the number of connections currently taken from the pool
+        * ``idle``: the number of open connections in the pool, ready to be used
+        * ``created``: the number of connections opened so far
+        * ``requests``: the number of requests made so far
+    :rtype: dict
+    """
+    stats = {}
+    for adapter in (Service.ADAPTER.get(), ThirdPartyService.ADAPTER.get()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None or pool.pool is None:
+                continue
+
+            with pool.pool.mutex:
+                queued = list(pool.pool.queue)
+            host = "{}://{}:{}".format(key.key_scheme, key.key_host, key.key_port)
+            host_stats = stats.setdefault(host, dict.fromkeys(["maxsize", "in_use", "idle", "created", "requests"], 0))
+            host_stats["maxsize"] += pool.pool.maxsize
+            # every request takes an item (a connection or an empty slot) from the queue
+            host_stats["in_use"] += pool.pool.maxsize - len(queued)
+            host_stats["idle"] += sum(1 for conn in queued if conn is not None)
+            host_stats["created"] += pool.num_connections
+            host_stats["requests"] += pool.num_requests
+    return stats
+
+
+class _SharedAdapter(BaseAdapter):
+    """
+    Sends requests through the adapter shared by all sessions in the process,
+    without closing it when a session is closed, once the throttle of their
+    host allows it.
+    """
+
+    def __init__(self, adapter):
+        super(_SharedAdapter, self).__init__()
+        self._adapter = adapter
+
+    def send(self, request, **kwargs):
+        throttle = host_throttle(request.url)
+        throttle.acquire()
+        status = retry_after = None
+        try:
+            response = self._adapter.get().send(request, **kwargs)
+            status, retry_after = response.status_code, response.headers.get("Retry-After")
+            return response
+        finally:
+            throttle.release(status, retry_after)
+
+    def close(self):
+        pass
+
+
+def _pooled_adapter(retry_config):
+    return HTTPAdapter(
+        max_retries=retry_config,
+        pool_maxsize=_pool_config["pool_maxsize"],
+        pool_block=_pool_config["pool_block"],
+    )
 
 
 class WrappedSession(requests.Session):
 
     # Adapts the custom pickling protocol of requests.Session
-    __attrs__ = requests.Session.__attrs__ + ["base_url", "timeout"]
+    __attrs__ = requests.Session.__attrs__ + ["base_url", "timeout", "service"]
 
-    def __init__(self, base_url, timeout=None):
+    def __init__(self, base_url, timeout=None, service=None):
         self.base_url = base_url
         self.timeout = timeout
+        # the name of the service, with which its requests are reported to hooks
+        self.service = service
         super(WrappedSession, self).__init__()
 
     def request(self, method, url, **kwargs):
         if self.timeout and "timeout" not in kwargs:
             kwargs["timeout"] = self.timeout
 
-        resp = super(WrappedSession, self).request(
-            method, self.base_url + url, **kwargs
-        )
+        if kwargs.get("json") is not None and not kwargs.get("data"):
+            headers = kwargs.get("headers") or {}
+            if "Content-Type" not in self.headers and "Content-Type" not in headers:
+                kwargs["headers"] = dict(headers, **{"Content-Type": "application/json"})
+            kwargs["data"] = codec.dumps(kwargs.pop("json"))
+
+        event = hooks.RequestEvent(self.service, method, self.base_url + url, path=url)
+        with hooks.sending(event):
+            try:
+                resp = super(WrappedSession, self).request(
+                    method, self.base_url + url, **kwargs
+                )
+            except Exception as e:
+                event.error = e
+                hooks.fire("error", event)
+                raise
+
+        event.status = resp.status_code
+        hooks.fire("response_headers", event)
+        if resp._content_consumed:
+            event.bytes = len(resp.content)
+            hooks.fire("response_complete", event)
+        else:
+            _on_release(resp.raw, event)
 
         if resp.status_code >= 200 and resp.status_code < 400:
+            resp.json = functools.partial(codec.response_json, resp)
             return resp
-        elif resp.status_code == 400:
-            raise BadRequestError(resp.text)
-        elif resp.status_code == 404:
-            raise NotFoundError(
-                resp.text if "text" in resp else "404 {} {}".format(method, url)
-            )
-        elif resp.status_code == 409:
-            raise ConflictError(resp.text)
-        elif resp.status_code == 429:
-            raise RateLimitError(resp.text)
-        elif resp.status_code == 504:
-            raise GatewayTimeoutError(
-                "Your request timed out on the server. "
-                "Consider reducing the complexity of your request."
-            )
         else:
-            raise ServerError(resp.text)
+            try:
+                raise_for_status(method, url, resp.status_code, resp.text)
+            except Exception as e:
+                event.error = e
+                hooks.fire("error", event)
+                raise
+
+
+def _on_release(raw, event):
+    # a streamed response is complete once its connection is released, when
+    # its body has been read or the response closed. urllib3 releases it
+    # within `read`, before counting the bytes read, so it's only reported
+    # once that read returns.
+    release_conn = getattr(raw, "release_conn", None)
+    if release_conn is None:
+        hooks.fire("response_complete", event)
+        return
+
+    read = raw.read
+    state = {"reading": False, "released": False}
+
+    def complete():
+        if event.bytes is None:
+            event.bytes = raw.tell()
+            hooks.fire("response_complete", event)
+
+    def release():
+        release_conn()
+        state["released"] = True
+        if not state["reading"]:
+            complete()
+
+    def read_body(*args, **kwargs):
+        state["reading"] = True
+        try:
+            return read(*args, **kwargs)
+        finally:
+            state["reading"] = False
+            if state["released"]:
+                complete()
+
+    raw.release_conn = release
+    raw.read = read_body
+
+
+def raise_for_status(method, url, status_code, text):
+    """
+    Raise the client exception for an unsuccessful response with status `status_code`
+    and body `text` to a request with `method` to `url`.
+    """
+    if status_code == 400:
+        raise BadRequestError(text)
+    elif status_code == 404:
+        raise NotFoundError("404 {} {}".format(method, url))
+    elif status_code == 409:
+        raise ConflictError(text)
+    elif status_code == 429:
+        raise RateLimitError(text)
+    elif status_code == 504:
+        raise GatewayTimeoutError(
+            "Your request timed out on the server. "
+            "Consider reducing the complexity of your request."
+        )
+    else:
+        raise ServerError(text)
+
+
+def client_headers():
+    """The headers identifying this client, sent with every request"""
+    headers = {"User-Agent": "dl-python/{}".format(__version__)}
+
+    try:
+        headers.update(
+            {
+                # https://github.com/easybuilders/easybuild/wiki/OS_flavor_name_version
+                "X-Platform": platform.platform(),
+                "X-Python": platform.python_version(),
+                # https://stackoverflow.com/questions/47608532/how-to-detect-from-within-python-whether-packages-are-managed-with-conda
+                "X-Conda": str(
+                    os.path.exists(
+                        os.path.join(sys.prefix, "conda-meta", "history")
+                    )
+                ),
+                # https://stackoverflow.com/questions/15411967/how-can-i-check-if-code-is-executed-in-the-ipython-notebook
+                "X-Notebook": str("ipykernel" in sys.modules),
+            }
+        )
+    except Exception:
+        pass
+
+    return headers
 
 
 class Service(object):
     TIMEOUT = (9.5, 30)
 
-    RETRY_CONFIG = Retry(
+    RETRY_CONFIG = ThrottledRetry(
         total=3,
         connect=2,
         read=2,
@@ -89,9 +286,9 @@ class Service(object):
         status_forcelist=[500, 502, 503, 504],
     )
 
-    # We share an adapter (one per thread/process) among all clients to take advantage
-    # of the single underlying connection pool.
-    ADAPTER = ThreadLocalWrapper(lambda: HTTPAdapter(max_retries=Service.RETRY_CONFIG))
+    # We share an adapter (one per process) among all clients and threads to take advantage
+    # of the single underlying connection pool, which is thread-safe.
+    ADAPTER = ProcessLocalWrapper(lambda: _pooled_adapter(Service.RETRY_CONFIG))
 
     def __init__(self, url, token=None, auth=None):
         if auth is None:
@@ -125,40 +322,20 @@ class Service(object):
     @property
     def session(self):
         session = self._session.get()
-        if session.headers.get("Authorization") != self.token:
-            session.headers["Authorization"] = self.token
+        token = self.token
+        # the headers are only updated when the token changes
+        if getattr(session, "_authorization", None) is not token:
+            session.headers["Authorization"] = token
+            session._authorization = token
 
         return session
 
     def build_session(self):
-        s = WrappedSession(self.base_url, timeout=self.TIMEOUT)
-        s.mount("https://", self.ADAPTER.get())
-
-        s.headers.update(
-            {
-                "Content-Type": "application/json",
-                "User-Agent": "dl-python/{}".format(__version__),
-            }
-        )
+        s = WrappedSession(self.base_url, timeout=self.TIMEOUT, service=type(self).__name__)
+        s.mount("https://", _SharedAdapter(self.ADAPTER))
 
-        try:
-            s.headers.update(
-                {
-                    # https://github.com/easybuilders/easybuild/wiki/OS_flavor_name_version
-                    "X-Platform": platform.platform(),
-                    "X-Python": platform.python_version(),
-                    # https://stackoverflow.com/questions/47608532/how-to-detect-from-within-python-whether-packages-are-managed-with-conda
-                    "X-Conda": str(
-                        os.path.exists(
-                            os.path.join(sys.prefix, "conda-meta", "history")
-                        )
-                    ),
-                    # https://stackoverflow.com/questions/15411967/how-can-i-check-if-code-is-executed-in-the-ipython-notebook
-                    "X-Notebook": str("ipykernel" in sys.modules),
-                }
-            )
-        except Exception:
-            pass
+        s.headers.update({"Content-Type": "application/json"})
+        s.headers.update(client_headers())
 
         return s
 
@@ -204,7 +381,7 @@ class JsonApiService(Service):
 class ThirdPartyService(object):
     TIMEOUT = (9.5, 30)
 
-    RETRY_CONFIG = Retry(
+    RETRY_CONFIG = ThrottledRetry(
         total=10,
         read=2,
         backoff_factor=random.uniform(1, 3),
@@ -214,8 +391,8 @@ class ThirdPartyService(object):
         status_forcelist=[429, 500, 502, 503, 504],
     )
 
-    ADAPTER = ThreadLocalWrapper(
-        lambda: HTTPAdapter(max_retries=ThirdPartyService.RETRY_CONFIG)
+    ADAPTER = ProcessLocalWrapper(
+        lambda: _pooled_adapter(ThirdPartyService.RETRY_CONFIG)
     )
 
     def __init__(self, url=""):
@@ -228,8 +405,8 @@ class ThirdPartyService(object):
         return self._session.get()
 
     def build_session(self):
-        s = WrappedSession(self.base_url, timeout=self.TIMEOUT)
-        s.mount("https://", self.ADAPTER.get())
+        s = WrappedSession(self.base_url, timeout=self.TIMEOUT, service=type(self).__name__)
+        s.mount("https://", _SharedAdapter(self.ADAPTER))
 
         s.headers.update(
             {
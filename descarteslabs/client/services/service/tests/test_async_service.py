@@ -0,0 +1,226 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+import sys
+import threading
+import time
+import unittest
+
+import mock
+import requests
+from six.moves import BaseHTTPServer, socketserver
+
+from descarteslabs.client.addons import ThirdParty, aiohttp
+from descarteslabs.client.exceptions import BadRequestError, ConflictError, NotFoundError, RateLimitError
+from descarteslabs.client.services.service import add_request_hook, remove_request_hook
+from descarteslabs.client.services.service.hooks import EVENTS
+
+if sys.version_info >= (3, 6):
+    import asyncio
+    from descarteslabs.client.services.service.async_service import AsyncService
+
+skip_async = sys.version_info < (3, 6) or isinstance(aiohttp, ThirdParty)
+
+
+class StubServer(object):
+    """
+    An HTTP server on localhost, running in a background thread, answering
+    each request with ``handler(method, path, body)``, which returns a
+    ``(status, headers, body)`` tuple.
+    """
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def handle_request(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length)
+                with stub._lock:
+                    stub.requests.append((self.command, self.path, dict(self.headers), body))
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    status, headers, content = stub.handler(self.command, self.path, body)
+                finally:
+                    with stub._lock:
+                        stub.in_flight -= 1
+
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PUT = do_DELETE = handle_request
+
+            def log_message(self, *args):
+                pass
+
+        class Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+            daemon_threads = True
+
+        self._server = Server(("127.0.0.1", 0), RequestHandler)
+        self.url = "http://127.0.0.1:{}".format(self._server.server_address[1])
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05})
+        self._thread.daemon = True
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def run(client, coroutine_fn):
+    """Run the coroutine returned by `coroutine_fn` on a new event loop, then close `client`"""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coroutine_fn())
+    finally:
+        loop.run_until_complete(client.close())
+        asyncio.set_event_loop(None)
+        loop.close()
+
+
+def collect(async_iterable):
+    """A coroutine returning the items of `async_iterable` as a list"""
+    items = []
+    iterator = async_iterable.__aiter__()
+
+    def add_next(future):
+        try:
+            items.append(future.result())
+        except StopAsyncIteration:
+            result.set_result(items)
+        except Exception as e:
+            result.set_exception(e)
+        else:
+            asyncio.ensure_future(iterator.__anext__()).add_done_callback(add_next)
+
+    result = asyncio.Future()
+    asyncio.ensure_future(iterator.__anext__()).add_done_callback(add_next)
+    return result
+
+
+def json_response(value, status=200, headers=None):
+    return status, dict(headers or {}, **{"Content-Type": "application/json"}), json.dumps(value).encode("utf-8")
+
+
+def stub_service(url, **kwargs):
+    service = AsyncService(url, auth=mock.MagicMock(token="token"), **kwargs)
+    service.RETRY_CONFIG = AsyncService.RETRY_CONFIG.new(backoff_factor=0)
+    return service
+
+
+@unittest.skipIf(skip_async, "asyncio clients require Python 3.6+ and aiohttp")
+class TestAsyncService(unittest.TestCase):
+
+    def request(self, handler, method="GET", url="/foo", **kwargs):
+        with StubServer(handler) as server:
+            service = stub_service(server.url)
+            return run(service, lambda: service.request(method, url, **kwargs)), server
+
+    def test_request(self):
+        r, server = self.request(lambda *args: json_response({"foo": "bar"}), "POST", json={"a": 1})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json(), {"foo": "bar"})
+
+        method, path, headers, body = server.requests[0]
+        self.assertEqual((method, path), ("POST", "/foo"))
+        self.assertEqual(json.loads(body.decode("utf-8")), {"a": 1})
+        self.assertEqual(headers["Authorization"], "token")
+        self.assertTrue(headers["User-Agent"].startswith("dl-python/"))
+
+    def test_retry(self):
+        statuses = [503, 503, 200]
+        r, server = self.request(lambda *args: json_response({}, status=statuses.pop(0)))
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(server.requests), 3)
+
+    def test_hooks(self):
+        events = []
+
+        def hook(request):
+            events.append((request.event, request.service, request.endpoint, request.status))
+
+        for event in EVENTS:
+            add_request_hook(event, hook)
+        try:
+            statuses = [503, 200]
+            self.request(lambda *args: json_response({}, status=statuses.pop(0)))
+            with self.assertRaises(NotFoundError):
+                self.request(lambda *args: json_response({}, status=404))
+        finally:
+            for event in EVENTS:
+                remove_request_hook(event, hook)
+
+        self.assertEqual(events, [
+            ("pre_request", "AsyncService", "/foo", None),
+            ("retry", "AsyncService", "/foo", 503),
+            ("response_headers", "AsyncService", "/foo", 200),
+            ("response_complete", "AsyncService", "/foo", 200),
+            ("pre_request", "AsyncService", "/foo", None),
+            ("response_headers", "AsyncService", "/foo", 404),
+            ("response_complete", "AsyncService", "/foo", 404),
+            ("error", "AsyncService", "/foo", 404),
+        ])
+
+    def test_retries_exhausted(self):
+        with self.assertRaises(requests.exceptions.RetryError):
+            self.request(lambda *args: json_response({}, status=503))
+
+    def test_errors(self):
+        for status, error in [(400, BadRequestError), (409, ConflictError), (429, RateLimitError)]:
+            with self.assertRaises(error):
+                self.request(lambda *args: json_response({}, status=status))
+
+        with self.assertRaises(NotFoundError) as cm:
+            self.request(lambda *args: json_response({}, status=404), url="/missing")
+        self.assertEqual(str(cm.exception), "404 GET /missing")
+
+    def test_connection_error(self):
+        service = stub_service("http://127.0.0.1:1")
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            run(service, lambda: service.request("GET", "/foo"))
+
+    def test_max_concurrency(self):
+        def handler(*args):
+            time.sleep(0.05)
+            return json_response({})
+
+        with StubServer(handler) as server:
+            service = stub_service(server.url, max_concurrency=3)
+            responses = run(service, lambda: asyncio.gather(*(service.request("GET", "/foo") for _ in range(12))))
+
+        self.assertEqual(len(responses), 12)
+        self.assertEqual(server.max_in_flight, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import io
+import json
+import math
+import unittest
+
+import mock
+import responses
+from mock import MagicMock
+
+from descarteslabs.client.addons import ThirdParty, numpy as np, orjson, ujson
+from descarteslabs.client.services.service import Service, codec
+
+
+class TestCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = codec.json_backend()
+
+    def tearDown(self):
+        codec.set_json_backend(self.backend)
+
+    def backends(self):
+        modules = {"orjson": orjson, "ujson": ujson}
+        return [
+            backend for backend in codec.JSON_BACKENDS
+            if not isinstance(modules.get(backend), ThirdParty)
+        ]
+
+    def test_roundtrip(self):
+        value = {"a": [1, 2.5, None, True], "b": {"c": u"dé/"}, "e": 2 ** 62}
+        for backend in self.backends():
+            codec.set_json_backend(backend)
+            encoded = codec.dumps(value)
+            self.assertIsInstance(encoded, bytes)
+            self.assertEqual(json.loads(encoded.decode("utf-8")), value)
+            self.assertEqual(codec.loads(encoded), value)
+            self.assertEqual(codec.loads(encoded.decode("utf-8")), value)
+
+    def test_compact(self):
+        codec.set_json_backend("json")
+        self.assertEqual(codec.dumps({"a": [1, 2]}), b'{"a":[1,2]}')
+
+    def test_fallbacks(self):
+        for backend in self.backends():
+            codec.set_json_backend(backend)
+            # beyond 64 bits, and NaN, which only the standard library decodes
+            self.assertEqual(codec.loads(b'{"a": 36893488147419103232}'), {"a": 2 ** 65})
+            self.assertTrue(math.isnan(codec.loads(b"NaN")))
+            self.assertEqual(json.loads(codec.dumps({1: "a"}).decode("utf-8")), {"1": "a"})
+            with self.assertRaises(ValueError):
+                codec.loads(b"{")
+
+    @unittest.skipIf(isinstance(orjson, ThirdParty), "orjson not installed")
+    def test_orjson_numpy(self):
+        codec.set_json_backend("orjson")
+        self.assertEqual(codec.dumps({"bounds": np.array([0.5, 1.0])}), b'{"bounds":[0.5,1.0]}')
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            codec.set_json_backend("foo")
+
+
+class TestIterArray(unittest.TestCase):
+
+    def iter_array(self, text, chunk_size=3):
+        return list(codec.iter_array(io.BytesIO(text.encode("utf-8")), chunk_size=chunk_size))
+
+    def test_elements(self):
+        values = [{"id": "a", "coordinates": [[1.5, -2e3]]}, "caf\u00e9 \u2603", 12345, None, True, [], {}]
+        text = json.dumps(values, ensure_ascii=False)
+        for chunk_size in (1, 2, 3, 7, 1000):
+            self.assertEqual(self.iter_array(text, chunk_size), values)
+        self.assertEqual(self.iter_array(" \n[ 1 ,\t2 ] \n"), [1, 2])
+        self.assertEqual(self.iter_array("[]"), [])
+        self.assertEqual(self.iter_array("[ ]"), [])
+
+    def test_incremental(self):
+        # elements are generated before the rest of the array is read
+        fp = io.BytesIO(b'[{"a": 1}, ' + b" " * 100000 + b"2]")
+        values = codec.iter_array(fp, chunk_size=16)
+        self.assertEqual(next(values), {"a": 1})
+        self.assertLess(fp.tell(), 100)
+        self.assertEqual(list(values), [2])
+
+    def test_invalid(self):
+        for text in ("", "{}", "[1, 2", "[1 2]", "[1, ]", "[1] 2", '["a]'):
+            with self.assertRaises(ValueError):
+                self.iter_array(text)
+
+    @responses.activate
+    def test_response(self):
+        responses.add(responses.POST, "https://example.com/foo", body=b'[{"a": 1}, {"b": 2}]')
+        service = Service("https://example.com", auth=MagicMock(token="foo.bar.sig"))
+
+        r = service.session.post("/foo", json={}, stream=True)
+        with mock.patch.object(r, "close", wraps=r.close) as close:
+            values = codec.iter_response_array(r)
+            self.assertEqual(next(values), {"a": 1})
+            close.assert_not_called()
+            values.close()
+            close.assert_called_once_with()
+
+
+class TestSessionCodec(unittest.TestCase):
+
+    def setUp(self):
+        self.service = Service("https://example.com", auth=MagicMock(token="foo.bar.sig"))
+
+    @responses.activate
+    def test_request_body(self):
+        responses.add(responses.POST, "https://example.com/foo", json={"bar": [1, 2]})
+
+        r = self.service.session.post("/foo", json={"a": [1, 2]})
+        self.assertEqual(r.json(), {"bar": [1, 2]})
+
+        request = responses.calls[0].request
+        self.assertEqual(json.loads(request.body.decode("utf-8")), {"a": [1, 2]})
+        self.assertNotIn(b" ", request.body)
+        self.assertEqual(request.headers["Content-Type"], "application/json")
+        self.assertIn("gzip", request.headers["Accept-Encoding"])
+
+    @responses.activate
+    def test_invalid_json(self):
+        responses.add(responses.GET, "https://example.com/foo", body="{")
+
+        with self.assertRaises(ValueError):
+            self.service.session.get("/foo").json()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import unittest
+
+import mock
+import responses
+from urllib3.response import HTTPResponse
+
+from descarteslabs.client.exceptions import NotFoundError
+from descarteslabs.client.services.service import (
+    Service,
+    add_request_hook,
+    metrics_registry,
+    remove_request_hook,
+)
+from descarteslabs.client.services.service import hooks
+from descarteslabs.client.services.service.throttle import ThrottledRetry
+
+
+class TestEndpoint(unittest.TestCase):
+
+    def test_endpoint(self):
+        self.assertEqual(hooks.endpoint("/npz"), "/npz")
+        self.assertEqual(hooks.endpoint("/products/landsat:LC08:PRE:TOAR"), "/products/{}")
+        self.assertEqual(hooks.endpoint("/dlkeys/from_latlon/45.000000/-105.000000"), "/dlkeys/from_latlon/{}/{}")
+        self.assertEqual(hooks.endpoint("https://example.com/raster/v1/npz?foo=bar"), "/raster/{}/{}")
+        self.assertEqual(hooks.endpoint(""), "/")
+
+    def test_endpoint_names(self):
+        # identifiers which look like names are replaced as well
+        self.assertEqual(hooks.endpoint("/products/modis"), "/products/{}")
+        self.assertEqual(hooks.endpoint("/products/search"), "/products/search")
+        self.assertEqual(hooks.endpoint("/bands/all/sentinel"), "/bands/all/{}")
+        self.assertEqual(hooks.endpoint("/products/mine/bands/red"), "/products/{}/bands/{}")
+        self.assertEqual(hooks.endpoint("/data/get/mykey"), "/{}/get/{}")
+        self.assertEqual(hooks.endpoint("/data/get/my/nested/key"), "/{}/get/{}")
+        self.assertEqual(hooks.endpoint("/groups/abc/tasks/def/results"), "/groups/{}/tasks/{}/results")
+        self.assertEqual(hooks.endpoint("/unknown/route/with/names"), "/unknown/{}/{}/{}")
+
+
+class TestRequestHooks(unittest.TestCase):
+
+    def setUp(self):
+        metrics_registry().reset()
+        self.events = []
+        for event in hooks.EVENTS:
+            add_request_hook(event, self.record)
+        self.service = Service("https://example.com", auth=mock.MagicMock(token="foo.bar.sig"))
+
+    def tearDown(self):
+        for event in hooks.EVENTS:
+            remove_request_hook(event, self.record)
+
+    def record(self, request):
+        self.events.append((request.event, request.status, request.bytes))
+
+    def metric(self, name, **labels):
+        labels = dict({"service": "Service", "method": "GET", "endpoint": "/foo"}, **labels)
+        for sample in metrics_registry().snapshot()[name]["samples"]:
+            if sample["labels"] == labels:
+                return sample
+
+    @responses.activate
+    def test_request(self):
+        responses.add(responses.GET, "https://example.com/foo", body=b"12345")
+        self.service.session.get("/foo")
+
+        self.assertEqual(self.events, [
+            ("pre_request", None, None),
+            ("response_headers", 200, None),
+            ("response_complete", 200, 5),
+        ])
+        self.assertEqual(self.metric("requests_total", status="200")["value"], 1)
+        self.assertEqual(self.metric("response_bytes_total")["value"], 5)
+        self.assertEqual(self.metric("request_seconds")["count"], 1)
+        self.assertEqual(self.metric("response_headers_seconds")["count"], 1)
+
+    @responses.activate
+    def test_streamed_request(self):
+        responses.add(responses.GET, "https://example.com/foo", body=b"12345")
+        r = self.service.session.get("/foo", stream=True)
+        self.assertEqual(self.events[-1][0], "response_headers")
+
+        r.raw.read()
+        r.close()
+        self.assertEqual(self.events[-1], ("response_complete", 200, 5))
+
+    @responses.activate
+    def test_error_status(self):
+        responses.add(responses.GET, "https://example.com/foo", status=404)
+        with self.assertRaises(NotFoundError):
+            self.service.session.get("/foo")
+
+        self.assertEqual([event for event, _, _ in self.events], [
+            "pre_request", "response_headers", "response_complete", "error"
+        ])
+        self.assertEqual(self.metric("request_errors_total")["value"], 1)
+        self.assertEqual(self.metric("requests_total", status="404")["value"], 1)
+
+    @responses.activate
+    def test_connection_error(self):
+        with self.assertRaises(Exception):
+            self.service.session.get("/foo")
+
+        self.assertEqual([event for event, _, _ in self.events], ["pre_request", "error"])
+        self.assertEqual(self.metric("request_errors_total")["value"], 1)
+
+    def test_retry(self):
+        retry = ThrottledRetry(total=3, status_forcelist=[503])
+        response = HTTPResponse(body=b"", status=503)
+        request = hooks.RequestEvent("Service", "GET", "https://example.com/foo", path="/foo")
+
+        with hooks.sending(request):
+            retry.increment("GET", "/foo", response=response)
+        # retries outside of a request aren't reported
+        retry.increment("GET", "/foo", response=response)
+
+        self.assertEqual(self.events, [("pre_request", None, None), ("retry", 503, None)])
+        self.assertEqual(request.retries, 1)
+        self.assertEqual(self.metric("request_retries_total")["value"], 1)
+
+    @responses.activate
+    def test_failing_hook(self):
+        hook = mock.Mock(side_effect=ValueError("hook failed"))
+        add_request_hook("pre_request", hook)
+        try:
+            responses.add(responses.GET, "https://example.com/foo", body=b"")
+            self.service.session.get("/foo")
+        finally:
+            remove_request_hook("pre_request", hook)
+        hook.assert_called_once()
+
+    def test_unknown_event(self):
+        with self.assertRaises(ValueError):
+            add_request_hook("foo", self.record)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+import threading
+import unittest
+
+from descarteslabs.client.services.service.metrics import (
+    LatencyHistogram,
+    MetricsRegistry,
+    metrics_registry,
+    timed,
+)
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_empty(self):
+        histogram = LatencyHistogram()
+        self.assertIsNone(histogram.percentile(50))
+        self.assertEqual(histogram.snapshot()["count"], 0)
+
+    def test_percentile(self):
+        histogram = LatencyHistogram(bounds=[1, 2, 3, 4])
+        for seconds in [0.5, 1.5, 2.5, 3.5]:
+            histogram.observe(seconds)
+
+        self.assertEqual(histogram.percentile(25), 1)
+        self.assertEqual(histogram.percentile(50), 2)
+        self.assertEqual(histogram.percentile(62.5), 2.5)
+        self.assertEqual(histogram.percentile(100), 4)
+        self.assertEqual(histogram.count, 4)
+        self.assertEqual(histogram.sum, 8)
+
+    def test_overflow(self):
+        histogram = LatencyHistogram(bounds=[1, 2])
+        histogram.observe(10)
+        self.assertEqual(histogram.percentile(99), 2)
+        self.assertEqual(histogram.snapshot()["buckets"], [(1, 0), (2, 0), (float("inf"), 1)])
+
+    def test_window(self):
+        histogram = LatencyHistogram(bounds=[1, 2], window=4)
+        for _ in range(4):
+            histogram.observe(0.5)
+        for _ in range(4):
+            histogram.observe(1.5)
+
+        # older latencies weigh less
+        self.assertGreater(histogram.percentile(50), 1)
+        self.assertEqual(histogram.count, 8)
+        # but are all exported
+        self.assertEqual(histogram.snapshot()["buckets"], [(1, 4), (2, 4), (float("inf"), 0)])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            LatencyHistogram(bounds=[2, 1])
+        with self.assertRaises(ValueError):
+            LatencyHistogram(window=0)
+        with self.assertRaises(ValueError):
+            LatencyHistogram().percentile(101)
+
+    def test_threads(self):
+        histogram = LatencyHistogram()
+
+        def observe():
+            for _ in range(1000):
+                histogram.observe(0.01)
+
+        threads = [threading.Thread(target=observe) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(histogram.count, 4000)
+        self.assertEqual(sum(n for _, n in histogram.snapshot()["buckets"]), 4000)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_metrics(self):
+        counter = self.registry.counter("requests_total", {"status": "200"})
+        self.assertIs(self.registry.counter("requests_total", {"status": "200"}), counter)
+        self.assertIsNot(self.registry.counter("requests_total", {"status": "404"}), counter)
+        counter.inc()
+        counter.inc(2)
+
+        histogram = self.registry.histogram("latency_seconds", help="Latency")
+        histogram.observe(0.5)
+
+        snapshot = self.registry.snapshot()
+        self.assertEqual(snapshot["requests_total"]["type"], "counter")
+        self.assertEqual(snapshot["requests_total"]["help"], "Number of responses, by status")
+        self.assertIn({"labels": {"status": "200"}, "value": 3}, snapshot["requests_total"]["samples"])
+        self.assertEqual(snapshot["latency_seconds"]["help"], "Latency")
+        self.assertEqual(snapshot["latency_seconds"]["samples"][0]["count"], 1)
+
+        with self.assertRaises(ValueError):
+            self.registry.histogram("requests_total")
+
+        self.registry.reset()
+        self.assertEqual(self.registry.snapshot(), {})
+
+    def test_to_json(self):
+        self.registry.counter("requests_total").inc()
+        self.registry.histogram("latency_seconds").observe(1000)
+
+        snapshot = json.loads(self.registry.to_json())
+        self.assertEqual(snapshot["requests_total"]["samples"], [{"labels": {}, "value": 1}])
+        self.assertEqual(snapshot["latency_seconds"]["samples"][0]["buckets"][-1], [None, 1])
+
+    def test_to_prometheus(self):
+        self.assertEqual(self.registry.to_prometheus(), "")
+
+        self.registry.counter("requests_total", {"endpoint": '/a"b', "method": "GET"}).inc()
+        histogram = self.registry.histogram("latency_seconds")
+        histogram.observe(0.0005)
+        histogram.observe(2000)
+
+        lines = self.registry.to_prometheus().splitlines()
+        self.assertEqual(lines[0], "# TYPE dl_latency_seconds histogram")
+        self.assertEqual(lines[1], 'dl_latency_seconds_bucket{le="0.001"} 1')
+        self.assertIn('dl_latency_seconds_bucket{le="+Inf"} 2', lines)
+        self.assertIn("dl_latency_seconds_sum 2000.0005", lines)
+        self.assertIn("dl_latency_seconds_count 2", lines)
+        self.assertEqual(lines[-3:], [
+            "# HELP dl_requests_total Number of responses, by status",
+            "# TYPE dl_requests_total counter",
+            'dl_requests_total{endpoint="/a\\"b",method="GET"} 1',
+        ])
+
+    def test_timed(self):
+        metrics_registry().reset()
+        with timed("block_seconds", {"name": "test"}):
+            pass
+        self.assertEqual(metrics_registry().histogram("block_seconds", {"name": "test"}).count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
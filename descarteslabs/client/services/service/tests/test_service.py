@@ -13,11 +13,18 @@
 # limitations under the License.
 
 import pickle
+import threading
 import unittest
 
 from mock import MagicMock
-from descarteslabs.client.services.service import Service, JsonApiService
-from descarteslabs.client.services.service.service import WrappedSession
+from descarteslabs.client.services.service import (
+    Service,
+    JsonApiService,
+    ThirdPartyService,
+    configure_connection_pools,
+    connection_pool_stats,
+)
+from descarteslabs.client.services.service.service import DEFAULT_POOL_MAXSIZE, WrappedSession
 
 
 class TestService(unittest.TestCase):
@@ -26,6 +33,58 @@ class TestService(unittest.TestCase):
         service = Service("foo", auth=MagicMock(token=token))
         self.assertEqual(service.session.headers.get("Authorization"), token)
 
+    def test_session_token_changed(self):
+        auth = MagicMock(token="foo.bar.sig")
+        service = Service("foo", auth=auth)
+        self.assertEqual(service.session.headers.get("Authorization"), "foo.bar.sig")
+
+        auth.token = "foo.baz.sig"
+        self.assertEqual(service.session.headers.get("Authorization"), "foo.baz.sig")
+
+
+class TestConnectionPools(unittest.TestCase):
+    def tearDown(self):
+        configure_connection_pools(pool_maxsize=DEFAULT_POOL_MAXSIZE, pool_block=False)
+
+    def test_shared_adapter(self):
+        session = Service("foo", auth=MagicMock(token="foo.bar.sig")).session
+        adapter = session.get_adapter("https://example.com")._adapter.get()
+        self.assertIs(adapter, Service.ADAPTER.get())
+
+        other_session = Service("bar", auth=MagicMock(token="foo.bar.sig")).session
+        self.assertIs(other_session.get_adapter("https://example.com")._adapter.get(), adapter)
+
+        thread_adapters = []
+        thread = threading.Thread(target=lambda: thread_adapters.append(Service.ADAPTER.get()))
+        thread.start()
+        thread.join()
+        self.assertIs(thread_adapters[0], adapter)
+
+        # closing a session doesn't close the shared pools
+        pool = adapter.poolmanager.connection_from_url("https://example.com")
+        session.close()
+        self.assertIs(adapter.poolmanager.connection_from_url("https://example.com"), pool)
+
+    def test_configure(self):
+        adapter = Service.ADAPTER.get()
+        configure_connection_pools(pool_maxsize=4, pool_block=True)
+        self.assertIsNot(Service.ADAPTER.get(), adapter)
+        self.assertEqual(Service.ADAPTER.get()._pool_maxsize, 4)
+        self.assertTrue(Service.ADAPTER.get()._pool_block)
+        self.assertEqual(ThirdPartyService.ADAPTER.get()._pool_maxsize, 4)
+
+    def test_stats(self):
+        configure_connection_pools(pool_maxsize=4)
+        pool = Service.ADAPTER.get().poolmanager.connection_from_url("https://example.com")
+
+        conn = pool._get_conn()
+        stats = connection_pool_stats()["https://example.com:443"]
+        self.assertEqual(stats, {"maxsize": 4, "in_use": 1, "idle": 0, "created": 1, "requests": 0})
+
+        pool._put_conn(conn)
+        stats = connection_pool_stats()["https://example.com:443"]
+        self.assertEqual((stats["in_use"], stats["idle"], stats["created"]), (0, 1, 1))
+
 
 class TestJsonApiService(unittest.TestCase):
     def test_session_token(self):
@@ -0,0 +1,162 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import threading
+import unittest
+
+import mock
+import responses
+from urllib3.response import HTTPResponse
+
+from descarteslabs.client.exceptions import RateLimitError
+from descarteslabs.client.services.service import Service, configure_throttling, throttle_stats
+from descarteslabs.client.services.service import throttle as throttle_module
+from descarteslabs.client.services.service.throttle import (
+    DEFAULT_MAX_CONCURRENCY,
+    HostThrottle,
+    ThrottledRetry,
+    TokenBucket,
+    host_throttle,
+)
+
+
+class TestHostThrottle(unittest.TestCase):
+
+    def test_aimd(self):
+        throttle = HostThrottle(max_concurrency=8)
+        throttle.acquire()
+        throttle.release(429)
+        self.assertEqual(throttle.stats()["limit"], 4)
+
+        # grows by about one request per window of successful requests
+        for _ in range(5):
+            throttle.acquire()
+            throttle.release(200)
+        self.assertEqual(throttle.stats()["limit"], 5)
+
+        for _ in range(100):
+            throttle.acquire()
+            throttle.release(200)
+        self.assertEqual(throttle.stats()["limit"], 8)
+
+    def test_decrease_once_per_interval(self):
+        throttle = HostThrottle(max_concurrency=8, min_concurrency=2)
+        for _ in range(3):
+            throttle.acquire()
+        for _ in range(3):
+            throttle.release(503)
+        self.assertEqual(throttle.stats(), {"limit": 4, "in_flight": 0, "throttled": 3, "rate": 0})
+
+        with mock.patch.object(throttle_module, "DECREASE_INTERVAL", 0):
+            for _ in range(3):
+                throttle.throttle()
+        self.assertEqual(throttle.stats()["limit"], 2)
+
+    def test_neutral_outcomes(self):
+        throttle = HostThrottle(max_concurrency=8)
+        throttle.limit = 4
+        throttle.acquire()
+        throttle.release(None)
+        throttle.acquire()
+        throttle.release(500)
+        self.assertEqual(throttle.stats()["limit"], 4)
+
+    def test_acquire_waits_for_limit(self):
+        throttle = HostThrottle(max_concurrency=1)
+        throttle.acquire()
+
+        acquired = threading.Event()
+
+        def acquire():
+            throttle.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        self.assertFalse(acquired.wait(0.1))
+        throttle.release(200)
+        self.assertTrue(acquired.wait(5))
+        thread.join()
+
+    def test_retry_after(self):
+        throttle = HostThrottle(max_concurrency=8)
+        throttle.acquire()
+        throttle.release(429, retry_after="1")
+        self.assertAlmostEqual(throttle.bucket.take(), 1, places=1)
+
+        later = throttle_module._monotonic() + 2
+        with mock.patch.object(throttle_module, "_monotonic", return_value=later):
+            self.assertEqual(throttle.bucket.take(), 0)
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_rate(self):
+        bucket = TokenBucket(rate=10, burst=2)
+        self.assertEqual(bucket.take(), 0)
+        self.assertEqual(bucket.take(), 0)
+        self.assertAlmostEqual(bucket.take(), 0.1, places=2)
+
+    def test_unlimited(self):
+        bucket = TokenBucket()
+        for _ in range(100):
+            self.assertEqual(bucket.take(), 0)
+
+    def test_pause(self):
+        bucket = TokenBucket()
+        bucket.pause(10)
+        self.assertAlmostEqual(bucket.take(), 10, places=1)
+
+
+class TestThrottling(unittest.TestCase):
+
+    def tearDown(self):
+        configure_throttling(enabled=True, max_concurrency=DEFAULT_MAX_CONCURRENCY)
+
+    @responses.activate
+    def test_service_requests(self):
+        configure_throttling(max_concurrency=16)
+        responses.add(responses.GET, "https://example.com/foo", status=429)
+        responses.add(responses.GET, "https://example.com/bar", json={})
+
+        service = Service("https://example.com", auth=mock.MagicMock(token="foo.bar.sig"))
+        with self.assertRaises(RateLimitError):
+            service.session.get("/foo")
+        service.session.get("/bar")
+
+        stats = throttle_stats()["https://example.com:443"]
+        self.assertEqual((stats["throttled"], stats["in_flight"]), (1, 0))
+        self.assertEqual(stats["limit"], 8)
+
+    def test_retried_responses(self):
+        configure_throttling(max_concurrency=16)
+        retry = ThrottledRetry(total=3, status_forcelist=[503])
+        pool = mock.MagicMock(scheme="https", host="example.com", port=443)
+        response = HTTPResponse(body=b"", status=503, headers={"Retry-After": "0"})
+
+        retry.increment("GET", "/foo", response=response, _pool=pool)
+        self.assertIsInstance(retry.new(), ThrottledRetry)
+        self.assertEqual(throttle_stats()["https://example.com:443"]["throttled"], 1)
+
+    def test_disabled(self):
+        configure_throttling(enabled=False)
+        throttle = host_throttle("https://example.com/foo")
+        throttle.acquire()
+        throttle.release(429)
+        self.assertEqual(throttle_stats(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
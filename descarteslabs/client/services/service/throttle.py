@@ -0,0 +1,293 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""
+Client-side throttling of the requests to each host, shared by all
+services and threads of a process.
+
+The number of requests in flight to a host is limited by an AIMD
+(additive increase, multiplicative decrease) governor: the limit shrinks
+by half whenever the host answers 429 or 503, and grows back by one
+request for every limit's worth of successful requests. Requests may
+also be rate limited by a token bucket, which stops handing out tokens
+until the delay of a ``Retry-After`` header has passed, so throttled
+clients resume gradually instead of all at once.
+"""
+
+import threading
+import time
+
+from six.moves.urllib.parse import urlsplit
+from urllib3.exceptions import InvalidHeader
+from urllib3.util.retry import Retry
+
+from descarteslabs.client.services.service import hooks
+from descarteslabs.common.threading.local import ProcessLocalWrapper
+
+
+# Statuses with which a host asks clients to slow down
+THROTTLE_STATUSES = frozenset([429, 503])
+
+# Maximum number of requests in flight to a single host
+DEFAULT_MAX_CONCURRENCY = 64
+
+# The limit is decreased at most once per interval (in seconds), as the requests
+# in flight when the host starts throttling usually all fail together
+DECREASE_INTERVAL = 1.0
+
+_monotonic = getattr(time, "monotonic", time.time)
+
+_throttle_config = {
+    "enabled": True,
+    "max_concurrency": DEFAULT_MAX_CONCURRENCY,
+    "min_concurrency": 1,
+    "rate": 0,
+    "burst": 1,
+}
+
+
+class TokenBucket(object):
+    """
+    A token bucket handing out up to `rate` tokens per second, with up to
+    `burst` tokens saved up. A `rate` of 0 doesn't limit the rate, but the
+    bucket can still be paused.
+
+    Not thread-safe: callers must hold a lock.
+    """
+
+    def __init__(self, rate=0, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = _monotonic()
+        self._paused_until = 0
+
+    def pause(self, delay):
+        """Hand out no tokens for `delay` seconds, and start again from an empty bucket"""
+        now = _monotonic()
+        self._paused_until = max(self._paused_until, now + delay)
+        self._tokens = 0
+        self._updated = self._paused_until
+
+    def take(self):
+        """
+        Take a token if one is available.
+
+        :return: 0 if a token was taken, otherwise the number of seconds to
+            wait before one could be available.
+        :rtype: float
+        """
+        now = _monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        if not self.rate:
+            return 0
+
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+        return (1 - self._tokens) / self.rate
+
+
+class HostThrottle(object):
+    """
+    The concurrency governor and token bucket of a single host.
+
+    Requests wait in :meth:`acquire` until they are allowed to proceed, and
+    report their outcome with :meth:`release`.
+    """
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY, min_concurrency=1, rate=0, burst=1):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self.throttled = 0
+        self.bucket = TokenBucket(rate=rate, burst=burst)
+        self._last_decrease = None
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Wait until a request may be sent to the host"""
+        with self._condition:
+            while True:
+                if self.in_flight < int(self.limit):
+                    delay = self.bucket.take()
+                    if not delay:
+                        break
+                    self._condition.wait(delay)
+                else:
+                    self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, status=None, retry_after=None):
+        """
+        Report the end of a request acquired with :meth:`acquire`.
+
+        :param int status: The status of the response, or None if the request failed
+            without one.
+        :param str retry_after: The value of the ``Retry-After`` header of the response.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            if status in THROTTLE_STATUSES:
+                self._throttle(retry_after)
+            elif status is not None and status < 500:
+                self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+            self._condition.notify_all()
+
+    def throttle(self, retry_after=None):
+        """Report a throttling response to a request which is retried"""
+        with self._condition:
+            self._throttle(retry_after)
+            self._condition.notify_all()
+
+    def _throttle(self, retry_after):
+        self.throttled += 1
+        now = _monotonic()
+        if self._last_decrease is None or now - self._last_decrease >= DECREASE_INTERVAL:
+            self.limit = max(self.min_concurrency, self.limit / 2)
+            self._last_decrease = now
+
+        delay = _parse_retry_after(retry_after)
+        if delay:
+            self.bucket.pause(delay)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "throttled": self.throttled,
+                "rate": self.bucket.rate,
+            }
+
+
+class _NoThrottle(object):
+    def acquire(self):
+        pass
+
+    def release(self, status=None, retry_after=None):
+        pass
+
+    def throttle(self, retry_after=None):
+        pass
+
+
+_NO_THROTTLE = _NoThrottle()
+
+_throttles = ProcessLocalWrapper(lambda: ({}, threading.Lock()))
+
+
+def configure_throttling(enabled=None, max_concurrency=None, min_concurrency=None, rate=None, burst=None):
+    """
+    Configure the client-side throttling of the requests to each host, shared
+    by all services in this process. Only the given settings are changed, and
+    the state of all hosts is reset.
+
+    :param bool enabled: Whether requests are throttled at all.
+    :param int max_concurrency: Maximum number of requests in flight to a host.
+    :param int min_concurrency: Number of requests in flight to a host always allowed,
+        however often it throttles.
+    :param float rate: Maximum number of requests per second sent to a host, or 0 for
+        no limit (the default).
+    :param int burst: Number of requests which may be sent at once when the rate is limited.
+    """
+    settings = dict(
+        enabled=enabled,
+        max_concurrency=max_concurrency,
+        min_concurrency=min_concurrency,
+        rate=rate,
+        burst=burst,
+    )
+    _throttle_config.update((key, value) for key, value in settings.items() if value is not None)
+    _throttles.reset()
+
+
+def throttle_stats():
+    """
+    Statistics of the throttling of the requests to each host by this process.
+
+    :return: A dictionary with an entry for each host (like ``https://platform.descarteslabs.com:443``)
+        a request was sent to, with the keys
+
+        * ``limit``: the current number of requests allowed in flight
+        * ``in_flight``: the number of requests in flight
+        * ``throttled``: the number of 429 and 503 responses received
+        * ``rate``: the maximum number of requests per second, or 0 if not limited
+    :rtype: dict
+    """
+    throttles, lock = _throttles.get()
+    with lock:
+        hosts = list(throttles.items())
+    return {host: throttle.stats() for host, throttle in hosts}
+
+
+def host_throttle(url):
+    """The throttle of the host of `url`"""
+    if not _throttle_config["enabled"]:
+        return _NO_THROTTLE
+
+    parts = urlsplit(url)
+    port = parts.port or {"http": 80, "https": 443}.get(parts.scheme)
+    host = "{}://{}:{}".format(parts.scheme, parts.hostname, port)
+
+    throttles, lock = _throttles.get()
+    with lock:
+        throttle = throttles.get(host)
+        if throttle is None:
+            throttle = throttles[host] = HostThrottle(
+                max_concurrency=_throttle_config["max_concurrency"],
+                min_concurrency=_throttle_config["min_concurrency"],
+                rate=_throttle_config["rate"],
+                burst=_throttle_config["burst"],
+            )
+    return throttle
+
+
+class ThrottledRetry(Retry):
+    """
+    A `Retry` reporting the throttling responses it retries to the throttle
+    of their host, and all retries to the request hooks, as the final response
+    is the only one the session sees.
+    """
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if response is not None and _pool is not None and response.status in THROTTLE_STATUSES:
+            pool_url = "{}://{}:{}".format(_pool.scheme, _pool.host, _pool.port)
+            host_throttle(pool_url).throttle(response.getheader("Retry-After"))
+
+        retry = super(ThrottledRetry, self).increment(
+            method=method,
+            url=url,
+            response=response,
+            error=error,
+            _pool=_pool,
+            _stacktrace=_stacktrace,
+        )
+        # only once it's certain the request is retried
+        hooks.retrying(error=error, status=None if response is None else response.status)
+        return retry
+
+
+def _parse_retry_after(retry_after):
+    if not retry_after:
+        return None
+    try:
+        return Retry(0).parse_retry_after(retry_after)
+    except InvalidHeader:
+        return None
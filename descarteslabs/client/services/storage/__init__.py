@@ -1,4 +1,11 @@
+import sys
+
 from .cache import cached
 from .storage import Storage
 
 __all__ = ["Storage", "cached"]
+
+if sys.version_info >= (3, 6):
+    from .async_storage import AsyncStorage  # noqa: F401
+
+    __all__ += ["AsyncStorage"]
@@ -0,0 +1,79 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+"""asyncio variant of the Storage client. Requires Python 3.6+ and aiohttp."""
+
+import os
+
+from descarteslabs.client.services.storage.storage import Storage
+from descarteslabs.client.services.service.async_service import (
+    AsyncService,
+    AsyncThirdPartyService,
+    DEFAULT_MAX_CONCURRENCY,
+)
+
+
+class AsyncStorage(AsyncService):
+    """asyncio variant of :class:`~descarteslabs.client.services.storage.Storage`"""
+
+    TIMEOUT = Storage.TIMEOUT
+
+    def __init__(self, url=None, auth=None, max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        """
+        :param str url: URL of the Storage service; defaults to ``DESCARTESLABS_STORAGE_URL``.
+        :param Auth auth: The authentication to use.
+        :param int max_concurrency: Maximum number of requests in flight at once.
+        """
+        if url is None:
+            url = os.environ.get(
+                "DESCARTESLABS_STORAGE_URL",
+                "https://platform.descarteslabs.com/storage/v1",
+            )
+
+        super(AsyncStorage, self).__init__(url, auth=auth, max_concurrency=max_concurrency)
+        self._gcs_upload_service = AsyncThirdPartyService(max_concurrency=max_concurrency)
+
+    async def close(self):
+        await super(AsyncStorage, self).close()
+        await self._gcs_upload_service.close()
+
+    async def get(self, key, storage_type="data"):
+        """
+        Retrieve data stored at location `key`, with storage type
+        `storage_type`
+
+        :param str key: A unique string mapped to an existing storage blob
+        :param str storage_type: A type of data storage. Possible values: "data", "tmp", "result".  Default: "data".
+
+        Returns:
+            The bytes that were stored at `key`
+        """
+        r = await self.request(
+            "GET", "/{storage_type}/get/{key}".format(storage_type=storage_type, key=key)
+        )
+        return r.content
+
+    async def set(self, key, value, storage_type="data"):
+        """
+        Store `value` at location `key`, with storage type `storage_type`
+
+        :param str key: A unique string mapped to an existing storage blob
+        :param bytes value: bytes to be stored at location `key`
+        :param str storage_type: A type of data storage. Possible values: "data", "tmp", "result".  Default: "data".
+        """
+        r = await self.request(
+            "GET", "/{storage_type}/new_resumable_url/{key}".format(storage_type=storage_type, key=key)
+        )
+        await self._gcs_upload_service.request("PUT", r.content.decode("ascii"), data=value)
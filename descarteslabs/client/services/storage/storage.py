@@ -14,11 +14,13 @@
 
 import os
 import six
+import sys
 import warnings
 
 from descarteslabs.client.auth import Auth
 from descarteslabs.client.services.service import Service, ThirdPartyService
 from descarteslabs.client.exceptions import NotFoundError
+from descarteslabs.common.lazy import lazy_attributes
 
 
 class Storage(Service):
@@ -253,5 +255,9 @@ class Storage(Service):
         return
 
 
-storage = Storage()
-storage_client = storage
+def _default_storage():
+    return sys.modules[__name__].storage
+
+
+# created when first used, so importing this module doesn't read the token info file
+lazy_attributes(__name__, {"storage": Storage, "storage_client": _default_storage})
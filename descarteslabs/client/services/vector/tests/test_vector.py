@@ -217,5 +217,55 @@ class VectorsTest(ClientTestCase):
             self.client.get_product_from_query_status("2b4552ff4b8a4bb5bb278c94005db50")
 
 
+class SearchFeaturesTest(ClientTestCase):
+
+    def mock_pages(self, n_pages, page_size=2):
+        for i in range(n_pages):
+            self.mock_response(responses.POST, {
+                'data': [{'id': '{}-{}'.format(i, j), 'attributes': {}} for j in range(page_size)],
+                'meta': {
+                    'total_results': n_pages * page_size,
+                    'continuation_token': 'page{}'.format(i + 1) if i < n_pages - 1 else None,
+                },
+            })
+
+    @responses.activate
+    def test_search_features(self):
+        for prefetch in [0, 1, 3]:
+            responses.reset()
+            self.mock_pages(3)
+
+            features = self.client.search_features('foo', query_limit=10, prefetch=prefetch)
+            self.assertEqual(len(features), 6)
+            self.assertEqual([f.id for f in features], ['0-0', '0-1', '1-0', '1-1', '2-0', '2-1'])
+            self.assertEqual(len(responses.calls), 3)
+
+    @responses.activate
+    def test_search_features_error(self):
+        self.mock_response(responses.POST, {
+            'data': [{'id': '0-0', 'attributes': {}}],
+            'meta': {'total_results': 2, 'continuation_token': 'page1'},
+        })
+        self.mock_response(responses.POST, {}, status=400)
+
+        features = self.client.search_features('foo')
+        self.assertEqual(next(features).id, '0-0')
+        with self.assertRaises(BadRequestError):
+            next(features)
+
+    @responses.activate
+    def test_search_features_close(self):
+        self.mock_pages(3)
+
+        features = self.client.search_features('foo', prefetch=1)
+        next(features)
+        features.close()
+        # the page being fetched when closing is still read
+        features._pages._thread.join()
+        self.assertLessEqual(len(responses.calls), 2)
+        with self.assertRaises(StopIteration):
+            next(features)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -7,6 +7,7 @@ from descarteslabs.common.property_filtering import GenericProperties
 from descarteslabs.client.services.service import JsonApiService, ThirdPartyService
 from descarteslabs.client.auth import Auth
 from descarteslabs.common.dotdict import DotDict
+from descarteslabs.common.threading.readahead import DEFAULT_DEPTH, ReadAhead
 
 
 class _SearchFeaturesIterator(object):
@@ -19,21 +20,22 @@ class _SearchFeaturesIterator(object):
         geometry,
         query_expr,
         query_limit,
+        prefetch=DEFAULT_DEPTH,
         **kwargs
     ):
-        self._client = client
-        self._product_id = product_id
-        self._geometry = geometry
-        self._query_expr = query_expr
-        self._query_limit = query_limit
-        self._kwargs = kwargs
-        self._continuation_token = None
-        self._page_offset = 0
-        self._page_len = 0
-
-        # updates _continuation_token, _page_offset, _page_len
-        self._next_page()
-        self._length = self._page.meta.total_results
+        query = dict(
+            product_id=product_id,
+            geometry=geometry,
+            query_expr=query_expr,
+            query_limit=query_limit,
+            **kwargs
+        )
+
+        # the first page is fetched right away for the length of the results
+        page = client._fetch_feature_page(continuation_token=None, **query)
+        self._length = page.meta.total_results
+        self._pages = ReadAhead(_feature_pages(client, query, page), depth=prefetch)
+        self._page = iter(())
 
     def __iter__(self):
         return self
@@ -42,35 +44,34 @@ class _SearchFeaturesIterator(object):
         return self._length
 
     def __next__(self):
-        if self._page_offset >= self._page_len:
-            if self._continuation_token is None:
-                raise StopIteration()
-
-            self._next_page()
-
-        try:
-            return self._page.data[self._page_offset]
-        finally:
-            self._page_offset += 1
-
-    def _next_page(self):
-        self._page = self._client._fetch_feature_page(
-            product_id=self._product_id,
-            geometry=self._geometry,
-            query_expr=self._query_expr,
-            query_limit=self._query_limit,
-            continuation_token=self._continuation_token,
-            **self._kwargs
-        )
-
-        self._continuation_token = self._page.meta.continuation_token
-        self._page_offset = 0
-        self._page_len = len(self._page.data)
+        while True:
+            try:
+                return next(self._page)
+            except StopIteration:
+                self._page = iter(next(self._pages))
 
     def next(self):
         """Backwards compatibility for Python 2"""
         return self.__next__()
 
+    def close(self):
+        """Stop iterating, and fetching pages of results in the background"""
+        self._pages.close()
+        self._page = iter(())
+
+
+def _feature_pages(client, query, page):
+    # must not reference the _SearchFeaturesIterator, so it can be
+    # garbage collected (stopping the read-ahead) when abandoned
+    while True:
+        yield page.data
+
+        continuation_token = page.meta.continuation_token
+        if continuation_token is None:
+            break
+
+        page = client._fetch_feature_page(continuation_token=continuation_token, **query)
+
 
 class Vector(JsonApiService):
     """
@@ -484,6 +485,7 @@ class Vector(JsonApiService):
         geometry=None,
         query_expr=None,
         query_limit=None,
+        prefetch=DEFAULT_DEPTH,
         **kwargs
     ):
         """
@@ -521,16 +523,22 @@ class Vector(JsonApiService):
             property which doesn't exist as part of the expression that
             comparison will evaluate to False.
         :param int query_limit: Maximum number of features to return for this query, defaults to all.
+        :param int prefetch: Number of pages of features to request in the background
+            while the current page is consumed, 1 by default. The pages are requested
+            by a daemon thread started for each search, which stops when the search
+            completes or is closed. If 0, no thread is started, and pages are
+            requested only when needed.
         :rtype: Iterator
         :return: Features satisfying the query, as JSONAPI primary data objects.
 
                  The Features' IDs are under ``.id``,
                  and their properties are under ``.attributes``.
                  len() can be used on the returned iterator to determine
-                 the query size.
+                 the query size. Call ``close()`` on the iterator to stop
+                 requesting pages in the background if you stop iterating early.
         """
         return _SearchFeaturesIterator(
-            self, product_id, geometry, query_expr, query_limit)
+            self, product_id, geometry, query_expr, query_limit, prefetch=prefetch)
 
     def create_product_from_query(
         self,
@@ -0,0 +1,4 @@
+from .server import StubPlatform, stub_token
+from .synthetic import Catalog
+
+__all__ = ["StubPlatform", "Catalog", "stub_token"]
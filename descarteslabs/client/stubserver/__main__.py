@@ -0,0 +1,60 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Run the stub platform until interrupted, printing the environment variables
+pointing the services to it, e.g.::
+
+    $ eval "$(python -m descarteslabs.client.stubserver --port 8000 --latency 0.05 &)"
+"""
+
+import argparse
+import sys
+
+from descarteslabs.client.stubserver import Catalog, StubPlatform
+
+
+parser = argparse.ArgumentParser(prog="python -m descarteslabs.client.stubserver")
+parser.add_argument("--host", default="127.0.0.1", help="The address on which to listen")
+parser.add_argument("--port", default=0, type=int, help="The port on which to listen (default: any free port)")
+parser.add_argument("--latency", default=0.0, type=float, help="Seconds to wait before sending each response")
+parser.add_argument("--bandwidth", default=None, type=float, help="Bytes per second at which each response is sent")
+parser.add_argument("--scenes", default=1000, type=int, help="Number of scenes of each product")
+parser.add_argument("--seed", default=0, type=int, help="Seed of the synthetic scenes")
+
+
+def main(args=None):
+    args = parser.parse_args(args)
+    platform = StubPlatform(
+        host=args.host,
+        port=args.port,
+        latency=args.latency,
+        bandwidth=args.bandwidth,
+        catalog=Catalog(scenes=args.scenes, seed=args.seed),
+    )
+
+    for name, value in sorted(platform.env().items()):
+        print("export {}={}".format(name, value))
+    sys.stdout.flush()
+
+    try:
+        platform.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        platform.stop()
+
+
+if __name__ == "__main__":
+    main()
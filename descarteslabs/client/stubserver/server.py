@@ -0,0 +1,557 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import base64
+import collections
+import itertools
+import json
+import logging
+import re
+import threading
+import time
+
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from descarteslabs.client.auth import Auth
+from descarteslabs.client.services.service.hooks import endpoint
+from descarteslabs.client.stubserver import synthetic
+from descarteslabs.common import dltile
+
+
+_monotonic = getattr(time, "monotonic", time.time)
+
+# Path of each service on the stub platform, by the name of its environment variable
+SERVICE_PATHS = collections.OrderedDict([
+    ("DESCARTESLABS_RASTER_URL", "/raster/v1"),
+    ("DESCARTESLABS_METADATA_URL", "/metadata/v1"),
+    ("DESCARTESLABS_STORAGE_URL", "/storage/v1"),
+    ("DESCARTESLABS_TASKS_URL", "/tasks/v1"),
+])
+
+# Number of bytes written at once when the bandwidth is limited
+_WRITE_SIZE = 64 * 1024
+
+
+def stub_token(subject="stub|0", groups=("public",)):
+    """
+    An unsigned JWT which never expires, accepted by the stub platform.
+
+    :param str subject: The ``sub`` claim, from which the namespace of the user is derived.
+    :param list(str) groups: The ``groups`` claim.
+    """
+    def encode(value):
+        data = json.dumps(value, sort_keys=True).encode("utf-8")
+        return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+    claims = {
+        "sub": subject,
+        "groups": list(groups),
+        "iss": "https://stub.descarteslabs.com/",
+        "aud": "stub",
+        "iat": 0,
+        "exp": 9999999999,
+    }
+    return "{}.{}.".format(encode({"typ": "JWT", "alg": "none"}), encode(claims))
+
+
+class StubError(Exception):
+    """An error response of the stub platform"""
+
+    def __init__(self, status, message):
+        super(StubError, self).__init__(message)
+        self.status = status
+        self.message = message
+
+
+class _Request(object):
+    def __init__(self, method, path, query, headers, body):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        try:
+            return json.loads(self.body.decode("utf-8")) if self.body else {}
+        except ValueError:
+            raise StubError(400, "Invalid JSON body")
+
+    def param(self, name, default=None):
+        values = self.query.get(name)
+        return values[0] if values else default
+
+
+class StubPlatform(object):
+    """
+    A local stand-in for the Raster, Metadata, Storage and Tasks services,
+    serving synthetic data over HTTP with the wire formats of the platform,
+    for offline benchmarks and end-to-end tests of client pipelines.
+
+    The server runs in background threads of this process while it's used
+    as a context manager (or between :meth:`start` and :meth:`stop`), and
+    services use it once the environment variables of :meth:`env` are set,
+    or when given its :meth:`url` and :meth:`auth`. It can also run as a
+    separate process with ``python -m descarteslabs.client.stubserver``.
+
+    Responses can be slowed down by a `latency` before their headers are
+    sent, and by a `bandwidth` at which their bodies are sent.
+
+    Example::
+
+        >>> import os
+        >>> from descarteslabs.client.services.raster import Raster
+        >>> from descarteslabs.client.stubserver import StubPlatform
+        >>> with StubPlatform(latency=0.05) as platform:
+        ...     os.environ.update(platform.env())
+        ...     arr, meta = Raster().ndarray(
+        ...         "stub:synthetic:meta_00000000_v1",
+        ...         bands=["red", "green", "blue"],
+        ...         dltile="256:16:30.0:15:-2:45",
+        ...     )
+        >>> arr.shape
+        (288, 288, 3)
+
+    Implemented endpoints:
+
+    * Raster: `/npz` (``blosc`` and ``npz`` formats), `/raster` (a single file
+      holding the raw raster), `/dlkeys/<key>`, `/dlkeys/from_latlon` and
+      `/dlkeys/from_shape`, paged by ``maxtiles``
+    * Metadata: `/search`, paged with ``x-continuation-token``, `/summary`,
+      `/batch/images`, `/get`, `/products`, `/bands/all` and `/bands/id`
+    * Storage: get, head, upload (through a resumable upload URL on the stub
+      platform), signed URLs, delete and list, paged with ``X-NEXT``
+    * Tasks: new tasks, single results and batches of results, which all succeed
+
+    Rasters are random, but identical for identical requests. Scenes are
+    described in `synthetic.Catalog`. Stored blobs are kept in memory.
+    Authorization headers are not checked.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        latency=0.0,
+        bandwidth=None,
+        catalog=None,
+        raster_size=(256, 256),
+        list_page_size=1000,
+    ):
+        """
+        :param str host: The address on which to listen.
+        :param int port: The port on which to listen, or 0 for any free port.
+        :param latency: Number of seconds to wait before sending the headers of each
+            response, or a callable ``latency(method, path)`` returning that number.
+        :param float bandwidth: Number of bytes per second at which each response
+            body is sent, or None for no limit.
+        :param synthetic.Catalog catalog: The scenes of the Metadata service,
+            1000 daily scenes of a ``stub:synthetic`` product by default.
+        :param tuple(int) raster_size: The ``(cols, rows)`` of rasters requested
+            without a DLTile, bounds or dimensions.
+        :param int list_page_size: Number of keys per page of the Storage list.
+        """
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.catalog = catalog if catalog is not None else synthetic.Catalog()
+        self.raster_size = tuple(raster_size)
+        self.list_page_size = list_page_size
+
+        self.counts = collections.Counter()
+        self.blobs = {}
+        self.tasks = collections.defaultdict(dict)
+        self._task_ids = itertools.count()
+        self._lock = threading.Lock()
+
+        self._routes = [
+            (method, re.compile("^" + pattern + "$"), handler)
+            for method, pattern, handler in [
+                ("POST", "/raster/v1/npz", self._npz),
+                ("POST", "/raster/v1/raster", self._raster),
+                ("POST", "/raster/v1/dlkeys/from_shape", self._dltiles_from_shape),
+                ("GET", "/raster/v1/dlkeys/from_latlon/(?P<lat>[^/]+)/(?P<lon>[^/]+)", self._dltile_from_latlon),
+                ("GET", "/raster/v1/dlkeys/(?P<key>[^/]+)", self._dltile),
+                ("POST", "/metadata/v1/search", self._search),
+                ("POST", "/metadata/v1/summary", self._summary),
+                ("POST", "/metadata/v1/batch/images", self._batch_images),
+                ("GET", "/metadata/v1/get/(?P<id>[^/]+)", self._get),
+                ("GET", "/metadata/v1/products/(?P<id>[^/]+)", self._product),
+                ("GET", "/metadata/v1/bands/all/(?P<id>[^/]+)", self._bands),
+                ("GET", "/metadata/v1/bands/id/(?P<id>[^/]+)", self._scene_bands),
+                ("GET|HEAD", "/storage/v1/(?P<type>[^/]+)/get/(?P<key>.+)", self._storage_get),
+                ("GET", "/storage/v1/(?P<type>[^/]+)/new_resumable_url/(?P<key>.+)", self._storage_upload_url),
+                ("GET", "/storage/v1/(?P<type>[^/]+)/get_signed_url/(?P<key>.+)", self._storage_signed_url),
+                ("GET", "/storage/v1/(?P<type>[^/]+)/list", self._storage_list),
+                ("DELETE", "/storage/v1/(?P<type>[^/]+)/(?P<key>.+)", self._storage_delete),
+                ("PUT", "/upload/(?P<type>[^/]+)/(?P<key>.+)", self._storage_put),
+                ("POST", "/tasks/v1/groups/(?P<group>[^/]+)/tasks", self._new_tasks),
+                ("POST", "/tasks/v1/groups/(?P<group>[^/]+)/results/batch", self._task_results),
+                ("GET", "/tasks/v1/groups/(?P<group>[^/]+)/tasks/(?P<task>[^/]+)/results", self._task_result),
+            ]
+        ]
+
+        self._server = _Server((host, port), _handler_class(self))
+        self._thread = None
+
+    @property
+    def url(self):
+        """The base URL of the stub platform, e.g. ``http://127.0.0.1:43567``"""
+        host, port = self._server.server_address[:2]
+        return "http://{}:{}".format(host, port)
+
+    def service_url(self, variable):
+        """The URL of a service, by the name of its environment variable"""
+        return self.url + SERVICE_PATHS[variable]
+
+    def env(self):
+        """
+        The environment variables pointing the services to the stub platform:
+        the ``DESCARTESLABS_*_URL`` of each service, and a ``DESCARTESLABS_TOKEN``
+        from `stub_token`.
+
+        :rtype: dict
+        """
+        env = dict((variable, self.service_url(variable)) for variable in SERVICE_PATHS)
+        env["DESCARTESLABS_TOKEN"] = stub_token()
+        return env
+
+    def auth(self):
+        """An `Auth` with a token from `stub_token`, which never reads or writes token files"""
+        return Auth(jwt_token=stub_token(), token_info_path=None)
+
+    def start(self):
+        """Serve requests from a background thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="StubPlatform")
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve requests from the calling thread until interrupted"""
+        self._server.serve_forever()
+
+    def stop(self):
+        """Stop serving requests and close the listening socket"""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def handle(self, request):
+        """
+        The response to a `_Request`, as a ``(status, headers, parts)`` tuple
+        where `parts` is a list of the byte strings of the body.
+
+        Requests are counted in :attr:`counts` by method and endpoint, e.g.
+        ``POST /raster/v1/npz`` or ``GET /metadata/v1/get/{}``.
+        """
+        with self._lock:
+            self.counts["{} {}".format(request.method, _endpoint(request.path))] += 1
+
+        for method, pattern, handler in self._routes:
+            match = pattern.match(request.path)
+            if match and request.method in method.split("|"):
+                break
+        else:
+            return _error(404, "No such endpoint {} {}".format(request.method, request.path))
+
+        try:
+            result = handler(request, **dict((k, unquote(v)) for k, v in match.groupdict().items()))
+        except StubError as e:
+            return _error(e.status, e.message)
+        except (ValueError, KeyError, TypeError) as e:
+            return _error(400, "Invalid request: {}".format(e))
+
+        if isinstance(result, tuple):
+            return result
+        return 200, {"Content-Type": "application/json"}, [json.dumps(result).encode("utf-8")]
+
+    def delay(self, method, path):
+        """The number of seconds to wait before sending the headers of a response"""
+        latency = self.latency
+        if callable(latency):
+            latency = latency(method, path)
+        return latency or 0.0
+
+    # Raster
+
+    def _raster_array(self, params):
+        band_names, rows, cols, dtype, metadata = synthetic.raster_grid(params, self.raster_size)
+        return synthetic.raster_array(params, band_names, rows, cols, dtype), metadata
+
+    def _npz(self, request):
+        params = request.json()
+        array, metadata = self._raster_array(params)
+        if params.get("of", "npz") == "blosc":
+            return 200, {"Content-Type": "application/octet-stream"}, synthetic.blosc_frames(array, metadata)
+        return 200, {"Content-Type": "application/octet-stream"}, [synthetic.npz_content(array, metadata)]
+
+    def _raster(self, request):
+        params = request.json()
+        array, metadata = self._raster_array(params)
+        return 200, {"Content-Type": "application/octet-stream"}, synthetic.raster_files(params, array, metadata)
+
+    def _dltile(self, request, key):
+        return dltile.dltile(key)
+
+    def _dltile_from_latlon(self, request, lat, lon):
+        return dltile.dltile_from_latlon(
+            float(lat), float(lon),
+            float(request.param("resolution")), int(request.param("tilesize")), int(request.param("pad")),
+        )
+
+    def _dltiles_from_shape(self, request):
+        import shapely.geometry
+
+        params = request.json()
+        shape = params["shape"]
+        if not isinstance(shape, dict):
+            shape = json.loads(shape)
+        if shape.get("type") == "Feature":
+            shape = shape["geometry"]
+
+        grid = dltile.Grid(params["resolution"], params["tilesize"], params["pad"])
+        zones, tis, tjs = grid.index_from_shape(shapely.geometry.shape(shape))
+        tiles = list(zip(zones.tolist(), tis.tolist(), tjs.tolist()))
+
+        start = 0
+        if params.get("start_zone") is not None:
+            start = tiles.index((params["start_zone"], params["start_ti"], params["start_tj"]))
+        page = tiles[start:start + int(params.get("maxtiles", 5000))]
+
+        fc = {"type": "FeatureCollection", "features": grid.features(*zip(*page)) if page else []}
+        if start + len(page) < len(tiles):
+            zone, ti, tj = tiles[start + len(page)]
+            fc["iterstate"] = {"start_zone": zone, "start_ti": ti, "start_tj": tj}
+        return fc
+
+    # Metadata
+
+    def _search(self, request):
+        params = request.json()
+        matches = self.catalog.search(params)
+        offset = int(params.get("continuation_token") or 0)
+        limit = int(params.get("limit") or 100)
+
+        page = matches[offset:offset + limit]
+        features = [self.catalog.feature(product, index, params.get("fields")) for product, index in page]
+        headers = {"Content-Type": "application/json"}
+        if page:
+            # like the service, every page but the last, empty one has a token
+            headers["x-continuation-token"] = str(offset + len(page))
+        return 200, headers, [json.dumps(features).encode("utf-8")]
+
+    def _summary(self, request):
+        params = request.json()
+        matches = self.catalog.search(params)
+        products = collections.Counter(product for product, _ in matches)
+        return {
+            "count": len(matches),
+            "bytes": 0,
+            "pixels": 0,
+            "products": sorted(products),
+            "items": [{"product": product, "count": count} for product, count in sorted(products.items())],
+        }
+
+    def _batch_images(self, request):
+        params = request.json()
+        features = []
+        for scene_id in params["ids"]:
+            scene = self.catalog.parse_id(scene_id)
+            if scene is None:
+                if not params.get("ignore_not_found", True):
+                    raise StubError(404, "Image {} not found".format(scene_id))
+                continue
+            features.append(self.catalog.feature(scene[0], scene[1], params.get("fields")))
+        return features
+
+    def _get(self, request, id):
+        scene = self._scene(id)
+        feature = self.catalog.feature(*scene)
+        return dict(feature["properties"], id=feature["id"], geometry=feature["geometry"])
+
+    def _product(self, request, id):
+        return synthetic.product(id)
+
+    def _bands(self, request, id):
+        return synthetic.bands(id)
+
+    def _scene_bands(self, request, id):
+        return synthetic.bands(self._scene(id)[0])
+
+    def _scene(self, scene_id):
+        scene = self.catalog.parse_id(scene_id)
+        if scene is None:
+            raise StubError(404, "Image {} not found".format(scene_id))
+        return scene
+
+    # Storage
+
+    def _storage_get(self, request, type, key):
+        with self._lock:
+            blob = self.blobs.get((type, key))
+        if blob is None:
+            raise StubError(404, "{} not found".format(key))
+        return 200, {"Content-Type": "application/octet-stream"}, [blob]
+
+    def _storage_upload_url(self, request, type, key):
+        return self._text("{}/upload/{}/{}".format(self.url, type, quote(key)))
+
+    def _storage_signed_url(self, request, type, key):
+        return self._text("{}/storage/v1/{}/get/{}".format(self.url, type, quote(key)))
+
+    def _storage_put(self, request, type, key):
+        with self._lock:
+            self.blobs[(type, key)] = request.body
+        return self._text("")
+
+    def _storage_delete(self, request, type, key):
+        with self._lock:
+            if self.blobs.pop((type, key), None) is None:
+                raise StubError(404, "{} not found".format(key))
+        return self._text("")
+
+    def _storage_list(self, request, type):
+        prefix = request.param("prefix") or ""
+        with self._lock:
+            keys = sorted(key for blob_type, key in self.blobs if blob_type == type and key.startswith(prefix))
+
+        offset = int(request.headers.get("X-NEXT") or 0)
+        page = keys[offset:offset + self.list_page_size]
+        headers = {"Content-Type": "application/json"}
+        if offset + len(page) < len(keys):
+            headers["X-NEXT"] = str(offset + len(page))
+        return 200, headers, [json.dumps(page).encode("utf-8")]
+
+    @staticmethod
+    def _text(text):
+        return 200, {"Content-Type": "text/plain"}, [text.encode("utf-8")]
+
+    # Tasks
+
+    def _new_tasks(self, request, group):
+        tasks = []
+        for message in request.json()["tasks"]:
+            task_id = "stub-{:08d}".format(next(self._task_ids))
+            with self._lock:
+                self.tasks[group][task_id] = message.get("arguments")
+            tasks.append({"id": task_id, "group_id": group, "status": "SUCCESS"})
+        return {"tasks": tasks}
+
+    def _task_results(self, request, group):
+        with self._lock:
+            arguments = dict(self.tasks.get(group, {}))
+        return {
+            "results": [
+                synthetic.task_result(group, task_id, arguments.get(task_id))
+                for task_id in request.json()["ids"]
+            ]
+        }
+
+    def _task_result(self, request, group, task):
+        with self._lock:
+            arguments = self.tasks.get(group, {}).get(task)
+        result = synthetic.task_result(group, task, arguments)
+        result["result"] = synthetic.encode_result(arguments)
+        return result
+
+
+def _endpoint(path):
+    for prefix in SERVICE_PATHS.values():
+        if path.startswith(prefix + "/"):
+            return prefix + endpoint(path[len(prefix):])
+    return endpoint(path)
+
+
+def _error(status, message):
+    return status, {"Content-Type": "application/json"}, [json.dumps({"message": message}).encode("utf-8")]
+
+
+class _Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+
+def _handler_class(platform):
+    class RequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # responses are written in several parts, which must not wait for acknowledgments
+        disable_nagle_algorithm = True
+
+        def handle_request(self):
+            url = urlsplit(self.path)
+            request = _Request(self.command, url.path, parse_qs(url.query), self.headers, self._read_body())
+
+            try:
+                status, headers, parts = platform.handle(request)
+            except Exception:
+                logging.getLogger(__name__).exception("Stub platform failed on %s %s", self.command, self.path)
+                status, headers, parts = _error(500, "Internal error")
+
+            delay = platform.delay(self.command, url.path)
+            if delay:
+                time.sleep(delay)
+
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(sum(len(part) for part in parts)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self._write(parts, platform.bandwidth)
+
+        do_GET = do_HEAD = do_POST = do_PUT = do_DELETE = handle_request
+
+        def _read_body(self):
+            if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                chunks = []
+                while True:
+                    size = int(self.rfile.readline().split(b";")[0].strip(), 16)
+                    chunks.append(self.rfile.read(size))
+                    self.rfile.readline()
+                    if not size:
+                        return b"".join(chunks)
+            return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+        def _write(self, parts, bandwidth):
+            if not bandwidth:
+                for part in parts:
+                    self.wfile.write(part)
+                return
+
+            start = _monotonic()
+            sent = 0
+            for part in parts:
+                for i in range(0, len(part), _WRITE_SIZE):
+                    block = part[i:i + _WRITE_SIZE]
+                    sent += len(block)
+                    ahead = sent / float(bandwidth) - (_monotonic() - start)
+                    if ahead > 0:
+                        time.sleep(ahead)
+                    self.wfile.write(block)
+
+        def log_message(self, *args):
+            pass
+
+    return RequestHandler
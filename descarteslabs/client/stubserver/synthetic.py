@@ -0,0 +1,423 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Synthetic data served by the stub platform, and the framing of the raster
+responses as sent by the Raster service.
+"""
+
+import base64
+import datetime
+import json
+import re
+import zlib
+from io import BytesIO
+
+import six
+
+from descarteslabs.client.addons import ThirdParty, blosc, numpy as np
+
+
+# Size in bytes of the uncompressed chunks of blosc-framed arrays
+BLOSC_CHUNK_SIZE = 1 << 20
+
+# Bands of every synthetic product: (name, type, data range)
+BANDS = (
+    ("red", "spectral", [0, 10000]),
+    ("green", "spectral", [0, 10000]),
+    ("blue", "spectral", [0, 10000]),
+    ("nir", "spectral", [0, 10000]),
+    ("swir1", "spectral", [0, 10000]),
+    ("alpha", "mask", [0, 1]),
+)
+
+# GDAL data types, by the name used in the ``ot`` parameter
+DATA_TYPES = {
+    "Byte": "uint8",
+    "UInt16": "uint16",
+    "Int16": "int16",
+    "UInt32": "uint32",
+    "Int32": "int32",
+    "Float32": "float32",
+    "Float64": "float64",
+}
+
+_GDAL_TYPES = dict((dtype, name) for name, dtype in DATA_TYPES.items())
+
+# Extensions of the files returned by `/raster`, by output format
+_EXTENSIONS = {"GTiff": "tif", "PNG": "png", "JPEG": "jpg"}
+
+_DATETIME = re.compile(r"^(\d{4})-(\d{2})-(\d{2})(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.\d+)?)?)?")
+
+
+def parse_datetime(value):
+    """
+    The naive UTC datetime of an ISO 8601 date or datetime string, ignoring
+    any time zone. Raises ValueError for other strings.
+    """
+    match = _DATETIME.match(value or "")
+    if match is None:
+        raise ValueError("Invalid datetime {!r}".format(value))
+    return datetime.datetime(*(int(part) for part in match.groups(0)))
+
+
+def seed_of(*values):
+    """A seed for a random state, stable for the given JSON-serializable values"""
+    return zlib.crc32(json.dumps(values, sort_keys=True).encode("utf-8")) & 0xffffffff
+
+
+class Catalog(object):
+    """
+    The synthetic scenes of the stub Metadata service.
+
+    Every product has the same number of scenes, acquired at a fixed interval
+    from a start date, all covering the same `footprint`. The cloud and fill
+    fractions of the scenes are random but stable for a given `seed`. Any
+    product id is valid: the scenes of products other than the default
+    `products` are only returned when searched for explicitly.
+    """
+
+    def __init__(
+        self,
+        products=("stub:synthetic",),
+        scenes=1000,
+        start=datetime.datetime(2018, 1, 1),
+        interval=datetime.timedelta(days=1),
+        footprint=None,
+        raster_size=(256, 256),
+        seed=0,
+    ):
+        """
+        :param list(str) products: The products searched when a search has no products.
+        :param int scenes: Number of scenes of each product.
+        :param datetime.datetime start: Acquisition date of the first scene.
+        :param datetime.timedelta interval: Time between the acquisitions of consecutive scenes.
+        :param dict footprint: GeoJSON geometry of all scenes, the whole world by default.
+        :param tuple(int) raster_size: The ``raster_size`` of all scenes.
+        :param int seed: Seed of the random cloud and fill fractions.
+        """
+        self.products = tuple(products)
+        self.scenes = int(scenes)
+        self.start = start
+        self.interval = interval
+        self.footprint = footprint if footprint is not None else {
+            "type": "Polygon",
+            "coordinates": [[[-180.0, -90.0], [180.0, -90.0], [180.0, 90.0], [-180.0, 90.0], [-180.0, -90.0]]],
+        }
+        self.raster_size = list(raster_size)
+        self.seed = seed
+        self._fractions = {}
+
+    def scene_id(self, product, index):
+        return "{}:meta_{:08d}_v1".format(product, index)
+
+    def parse_id(self, scene_id):
+        """The ``(product, index)`` of a scene id, or None if there's no such scene"""
+        product, sep, key = scene_id.rpartition(":meta_")
+        if not sep or not product or not key.endswith("_v1"):
+            return None
+        try:
+            index = int(key[:-len("_v1")])
+        except ValueError:
+            return None
+        if not 0 <= index < self.scenes:
+            return None
+        return product, index
+
+    def acquired(self, index):
+        return self.start + self.interval * int(index)
+
+    def fractions(self, product):
+        """The cloud and fill fractions of the scenes of `product`, as arrays"""
+        fractions = self._fractions.get(product)
+        if fractions is None:
+            random = np.random.RandomState(seed_of(self.seed, product))
+            fractions = self._fractions[product] = (
+                random.random_sample(self.scenes),
+                1 - random.random_sample(self.scenes) / 2,
+            )
+        return fractions
+
+    def feature(self, product, index, fields=None):
+        """The GeoJSON feature of a scene, as returned by `/search`"""
+        cloud_fraction, fill_fraction = self.fractions(product)
+        acquired = self.acquired(index)
+        identifier = "meta_{:08d}_v1".format(index)
+        properties = {
+            "acquired": acquired.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            "processed": (acquired + datetime.timedelta(hours=6)).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+            "product": product,
+            "sat_id": "STUB",
+            "key": identifier,
+            "identifier": identifier,
+            "cloud_fraction": round(float(cloud_fraction[index]), 4),
+            "cloud_fraction_0": round(float(cloud_fraction[index]), 4),
+            "fill_fraction": round(float(fill_fraction[index]), 4),
+            "cs_code": "EPSG:4326",
+            "proj4": "+proj=longlat +datum=WGS84 +no_defs ",
+            "geotrans": [-180.0, 360.0 / self.raster_size[0], 0.0, 90.0, 0.0, -180.0 / self.raster_size[1]],
+            "raster_size": self.raster_size,
+            "bits_per_pixel": [2.0] * len(BANDS),
+            "descartes_version": "stub",
+        }
+        if fields is not None:
+            properties = dict((name, value) for name, value in properties.items() if name in fields)
+
+        return {
+            "id": self.scene_id(product, index),
+            "type": "Feature",
+            "geometry": self.footprint,
+            "properties": properties,
+        }
+
+    def search(self, params):
+        """
+        The ``(product, index)`` of the scenes matching the body of a `/search`
+        request, in order.
+        """
+        products = params.get("products") or self.products
+        if isinstance(products, six.string_types):
+            products = [products]
+
+        first, last = 0, self.scenes
+        if params.get("start_datetime"):
+            first = max(first, self._index_at(parse_datetime(params["start_datetime"])))
+        if params.get("end_datetime"):
+            last = min(last, self._index_at(parse_datetime(params["end_datetime"])))
+        if params.get("geom") and not self._intersects(params["geom"]):
+            last = first
+        indices = np.arange(first, max(first, last))
+
+        matches = []
+        for product in products:
+            cloud_fraction, fill_fraction = self.fractions(product)
+            selected = indices
+            for name in ("cloud_fraction", "cloud_fraction_0"):
+                if params.get(name) is not None:
+                    selected = selected[cloud_fraction[selected] <= params[name]]
+            if params.get("fill_fraction") is not None:
+                selected = selected[fill_fraction[selected] >= params["fill_fraction"]]
+            matches.extend((product, int(i)) for i in selected)
+
+        sort_field = params.get("sort_field") or "acquired"
+        if sort_field == "cloud_fraction":
+            matches.sort(key=lambda match: self.fractions(match[0])[0][match[1]])
+        else:
+            matches.sort(key=lambda match: (match[1], match[0]))
+        if params.get("sort_order") == "desc":
+            matches.reverse()
+
+        # like the service, a false seed (e.g. from randomize=False) doesn't randomize
+        if params.get("random_seed"):
+            np.random.RandomState(seed_of(params["random_seed"])).shuffle(matches)
+        return matches
+
+    def _index_at(self, when):
+        # the index of the first scene acquired at or after `when`
+        offset = (when - self.start).total_seconds() / self.interval.total_seconds()
+        return int(min(max(np.ceil(offset), 0), self.scenes))
+
+    def _intersects(self, geom):
+        import shapely.geometry
+        import shapely.wkt
+
+        if isinstance(geom, six.string_types):
+            try:
+                geom = json.loads(geom)
+            except ValueError:
+                return shapely.wkt.loads(geom).intersects(shapely.geometry.shape(self.footprint))
+        if geom.get("type") == "Feature":
+            geom = geom["geometry"]
+        return shapely.geometry.shape(geom).intersects(shapely.geometry.shape(self.footprint))
+
+
+def bands(product):
+    """The bands of a synthetic product, as returned by `/bands/all`"""
+    result = {}
+    for i, (name, kind, data_range) in enumerate(BANDS):
+        band_id = "{}:{}".format(product, name)
+        result[band_id] = {
+            "id": band_id,
+            "name": name,
+            "product": product,
+            "type": kind,
+            "dtype": "UInt16",
+            "data_range": data_range,
+            "default_range": data_range,
+            "nbits": 14 if kind == "spectral" else 1,
+            "nodata": None,
+            "resolution": 15,
+            "resolution_unit": "m",
+            "band_index": i,
+            "file_index": 0,
+        }
+    return result
+
+
+def product(product_id):
+    """A synthetic product, as returned by `/products`"""
+    return {
+        "id": product_id,
+        "title": "Synthetic product {}".format(product_id),
+        "description": "Synthetic scenes served by the stub platform",
+        "resolution": 15,
+        "resolution_unit": "m",
+    }
+
+
+def raster_grid(params, default_size):
+    """
+    The ``(bands, rows, cols, dtype, metadata)`` of the raster requested by the
+    body of an `/npz` or `/raster` request.
+    """
+    from descarteslabs.common import dltile
+
+    band_names = params.get("bands") or [BANDS[0][0]]
+    if isinstance(band_names, six.string_types):
+        band_names = [band_names]
+
+    data_type = params.get("ot") or "UInt16"
+    if data_type not in DATA_TYPES:
+        raise ValueError("Invalid data type {!r}".format(data_type))
+    dtype = np.dtype(DATA_TYPES[data_type])
+
+    metadata = {}
+    if params.get("dltile"):
+        tile = dltile.dltile(params["dltile"])["properties"]
+        cols = rows = tile["tilesize"] + 2 * tile["pad"]
+        geotrans = tile["geotrans"]
+        metadata["coordinateSystem"] = {"proj4": tile["proj4"], "wkt": tile["wkt"]}
+    else:
+        bounds = params.get("outputBounds")
+        resolution = params.get("resolution")
+        cols, rows = params.get("outsize") or (None, None)
+        if bounds and resolution:
+            min_x, min_y, max_x, max_y = bounds
+            cols = cols or int(round((max_x - min_x) / resolution))
+            rows = rows or int(round((max_y - min_y) / resolution))
+        cols = int(cols or default_size[0])
+        rows = int(rows or default_size[1])
+        if bounds:
+            min_x, min_y, max_x, max_y = bounds
+            geotrans = [min_x, (max_x - min_x) / cols, 0.0, max_y, 0.0, -(max_y - min_y) / rows]
+        else:
+            geotrans = [0.0, 1.0, 0.0, 0.0, 0.0, -1.0]
+        if params.get("srs"):
+            metadata["coordinateSystem"] = {"proj4": params["srs"], "wkt": params["srs"]}
+
+    if rows < 1 or cols < 1:
+        raise ValueError("Invalid raster size {}x{}".format(cols, rows))
+
+    min_x, max_y = geotrans[0], geotrans[3]
+    max_x = min_x + cols * geotrans[1]
+    min_y = max_y + rows * geotrans[5]
+    metadata.update({
+        "size": [cols, rows],
+        "geoTransform": geotrans,
+        "cornerCoordinates": {
+            "upperLeft": [min_x, max_y],
+            "lowerLeft": [min_x, min_y],
+            "upperRight": [max_x, max_y],
+            "lowerRight": [max_x, min_y],
+            "center": [(min_x + max_x) / 2, (min_y + max_y) / 2],
+        },
+        "bands": [
+            {"band": i + 1, "description": {"name": name}, "type": _GDAL_TYPES[dtype.name]}
+            for i, name in enumerate(band_names)
+        ],
+    })
+    return band_names, rows, cols, dtype, metadata
+
+
+def raster_array(params, band_names, rows, cols, dtype):
+    """
+    A random raster for the body of an `/npz` or `/raster` request, stable for
+    identical requests, as sent by the service: ``(bands, rows, cols)``, or
+    ``(rows, cols)`` for a single band.
+    """
+    random = np.random.RandomState(seed_of(params))
+    data_ranges = dict((name, data_range) for name, _, data_range in BANDS)
+
+    array = np.empty((len(band_names), rows, cols), dtype=dtype)
+    for i, name in enumerate(band_names):
+        low, high = data_ranges.get(name, [0, 10000])
+        if np.issubdtype(dtype, np.integer):
+            high = min(high, np.iinfo(dtype).max)
+        array[i] = random.randint(low, high + 1, size=(rows, cols))
+
+    if len(band_names) == 1:
+        array = array[0]
+    return array
+
+
+def blosc_frames(array, metadata, chunk_size=BLOSC_CHUNK_SIZE):
+    """
+    The parts of a ``blosc`` `/npz` response for `array`: the metadata and the
+    description of the array as JSON lines, followed by the blosc chunks.
+    """
+    if isinstance(blosc, ThirdParty):
+        raise ValueError("The blosc format requires blosc to be installed")
+
+    data = array.tobytes()
+    chunks = [
+        blosc.compress(data[i:i + chunk_size], typesize=array.itemsize)
+        for i in range(0, len(data), chunk_size)
+    ]
+    array_meta = {"shape": array.shape, "dtype": array.dtype.name, "chunks": [len(chunk) for chunk in chunks]}
+    return [json_line(metadata), json_line(array_meta)] + chunks
+
+
+def npz_content(array, metadata):
+    """The content of an ``npz`` `/npz` response for `array`"""
+    content = BytesIO()
+    np.savez(content, data=array, metadata=np.array(json.dumps(metadata).encode("utf-8")))
+    return content.getvalue()
+
+
+def raster_files(params, array, metadata):
+    """
+    The parts of a `/raster` response: the metadata and, for each file, its name
+    and length as JSON lines followed by its content. The single file holds
+    the raw bytes of the raster, not an actual image.
+    """
+    ids = params.get("ids") or ["raster"]
+    if isinstance(ids, six.string_types):
+        ids = [ids]
+    name = "{}.{}".format(ids[0].replace(":", "_"), _EXTENSIONS.get(params.get("of") or "GTiff", "tif"))
+    content = array.tobytes()
+    return [
+        json_line({"files": 1, "metadata": metadata}),
+        json_line({"name": name, "length": len(content)}),
+        content,
+    ]
+
+
+def task_result(group_id, task_id, arguments=None):
+    """A successful task result, as returned by `/groups/<group_id>/results/batch`"""
+    return {
+        "id": task_id,
+        "group_id": group_id,
+        "status": "SUCCESS",
+        "peak_memory_usage": 0,
+        "execution_stats": {"cpu_time": 0.0, "wall_time": 0.0},
+        "arguments": arguments,
+    }
+
+
+def encode_result(value):
+    return base64.b64encode(json.dumps(value).encode("utf-8")).decode("ascii")
+
+
+def json_line(value):
+    return json.dumps(value).encode("utf-8") + b"\n"
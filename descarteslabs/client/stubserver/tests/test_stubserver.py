@@ -0,0 +1,200 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import subprocess
+import sys
+import time
+import unittest
+
+import mock
+import requests
+
+from descarteslabs.client.addons import numpy as np
+from descarteslabs.client.exceptions import NotFoundError
+from descarteslabs.client.services.metadata import Metadata
+from descarteslabs.client.services.raster import Raster
+from descarteslabs.client.services.raster.tests.iowa_geometry import iowa_geom
+from descarteslabs.client.services.storage import Storage
+from descarteslabs.client.services.tasks import Tasks
+from descarteslabs.client.stubserver import Catalog, StubPlatform
+
+
+class StubPlatformTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.platform = StubPlatform(catalog=Catalog(scenes=100)).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.platform.stop()
+
+    def client(self, cls, variable):
+        return cls(url=self.platform.service_url(variable), auth=self.platform.auth())
+
+
+class TestStubRaster(StubPlatformTestCase):
+
+    def setUp(self):
+        self.raster = self.client(Raster, "DESCARTESLABS_RASTER_URL")
+
+    def test_ndarray_dltile(self):
+        arr, meta = self.raster.ndarray(
+            "stub:synthetic:meta_00000000_v1", bands=["red", "green", "alpha"], dltile="256:16:30.0:15:-2:45")
+        self.assertEqual(arr.shape, (288, 288, 3))
+        self.assertEqual(arr.dtype, np.uint16)
+        self.assertEqual(meta["size"], [288, 288])
+        self.assertTrue((arr[..., 2] <= 1).all())
+
+        again, _ = self.raster.ndarray(
+            "stub:synthetic:meta_00000000_v1", bands=["red", "green", "alpha"], dltile="256:16:30.0:15:-2:45")
+        self.assertTrue((arr == again).all())
+
+    def test_ndarray_npz(self):
+        with mock.patch("descarteslabs.client.services.raster.raster.ndarray_format", return_value="npz"):
+            arr, meta = self.raster.ndarray(
+                "stub:synthetic:meta_00000000_v1", bands=["red"], dimensions=(30, 20), data_type="Float32")
+        self.assertEqual(arr.shape, (20, 30))
+        self.assertEqual(arr.dtype, np.float32)
+
+    def test_raster(self):
+        result = self.raster.raster("stub:synthetic:meta_00000000_v1", bands=["red", "green"], dimensions=(30, 20))
+        self.assertEqual(list(result["files"]), ["stub_synthetic_meta_00000000_v1.tif"])
+        self.assertEqual(len(result["files"]["stub_synthetic_meta_00000000_v1.tif"]), 2 * 20 * 30 * 2)
+
+    def test_iter_dltiles_from_shape(self):
+        tiles = list(self.raster.iter_dltiles_from_shape(30.0, 2048, 16, iowa_geom, maxtiles=7))
+        self.assertEqual(len(tiles), 58)
+        self.assertEqual(len(set(tile.properties.key for tile in tiles)), 58)
+        self.assertGreaterEqual(self.platform.counts["POST /raster/v1/dlkeys/from_shape"], 9)
+
+    def test_dltile(self):
+        tile = self.raster.dltile_from_latlon(42.0, -93.0, 30.0, 256, 0)
+        self.assertEqual(self.raster.dltile(tile.properties.key), tile)
+
+
+class TestStubMetadata(StubPlatformTestCase):
+
+    def setUp(self):
+        self.metadata = self.client(Metadata, "DESCARTESLABS_METADATA_URL")
+
+    def test_features(self):
+        features = list(self.metadata.features(
+            start_datetime="2018-02-01", end_datetime="2018-03-01T00:00:00", batch_size=7))
+        self.assertEqual(len(features), 28)
+        self.assertEqual(features[0].properties.acquired, "2018-02-01T00:00:00.000000Z")
+        self.assertEqual(features[-1].properties.acquired, "2018-02-28T00:00:00.000000Z")
+
+    def test_search_filters(self):
+        fc = self.metadata.search(cloud_fraction=0.5, limit=1000, sort_field="cloud_fraction", sort_order="desc")
+        fractions = [f.properties.cloud_fraction for f in fc.features]
+        self.assertTrue(0 < len(fractions) < 100)
+        self.assertEqual(fractions, sorted(fractions, reverse=True))
+        self.assertTrue(max(fractions) <= 0.5)
+
+    def test_search_randomize(self):
+        ids = [f.id for f in self.metadata.search(limit=1000).features]
+        self.assertEqual([f.id for f in self.metadata.search(limit=1000, randomize=False).features], ids)
+        shuffled = [f.id for f in self.metadata.search(limit=1000, randomize=1).features]
+        self.assertNotEqual(shuffled, ids)
+        self.assertEqual(sorted(shuffled), sorted(ids))
+
+    def test_get_by_ids(self):
+        ids = ["stub:synthetic:meta_00000003_v1", "nope", "other:product:meta_00000001_v1"]
+        features = self.metadata.get_by_ids(ids)
+        self.assertEqual([f.id for f in features], [ids[0], ids[2]])
+        with self.assertRaises(NotFoundError):
+            self.metadata.get_by_ids(ids, ignore_not_found=False)
+
+    def test_get(self):
+        scene = self.metadata.get("stub:synthetic:meta_00000003_v1")
+        self.assertEqual(scene.id, "stub:synthetic:meta_00000003_v1")
+        self.assertEqual(scene.product, "stub:synthetic")
+        self.assertIn("stub:synthetic:red", self.metadata.get_bands_by_product("stub:synthetic"))
+
+
+class TestStubStorageAndTasks(StubPlatformTestCase):
+
+    def test_storage(self):
+        storage = self.client(Storage, "DESCARTESLABS_STORAGE_URL")
+        storage.set("stub/a", b"hello")
+        storage.set("stub/b", b"world")
+        self.assertEqual(storage.get("stub/a"), b"hello")
+        self.assertTrue(storage.exists("stub/b"))
+        self.assertEqual(requests.get(storage.get_signed_url("stub/b")).content, b"world")
+
+        self.platform.list_page_size = 1
+        try:
+            self.assertEqual(list(storage.iter_list(prefix="stub/")), ["stub/a", "stub/b"])
+        finally:
+            self.platform.list_page_size = 1000
+
+        storage.delete("stub/a")
+        self.assertFalse(storage.exists("stub/a"))
+
+    def test_tasks_results(self):
+        tasks = self.client(Tasks, "DESCARTESLABS_TASKS_URL")
+        created = tasks.new_tasks("group", list_of_arguments=[[1], [2]])
+        ids = [task.id for task in created.tasks]
+
+        results = tasks.get_task_result_batch("group", ids)
+        self.assertEqual([result.id for result in results.results], ids)
+        self.assertEqual(results.results[1].arguments, [2])
+        self.assertEqual(tasks.get_task_result("group", ids[0]).result, b"[1]")
+
+
+class TestStubPlatform(unittest.TestCase):
+
+    def test_env(self):
+        with StubPlatform() as platform, mock.patch.dict(os.environ, platform.env()):
+            raster = Raster()
+            self.assertEqual(raster.base_url, platform.url + "/raster/v1")
+            self.assertEqual(raster.dltile("256:0:30.0:15:0:605").properties.ti, 0)
+
+    def test_latency(self):
+        with StubPlatform(latency=lambda method, path: 0.2 if path.endswith("npz") else 0.0) as platform:
+            raster = Raster(url=platform.url + "/raster/v1", auth=platform.auth())
+            start = time.time()
+            raster.dltile("256:0:30.0:15:0:605")
+            self.assertLess(time.time() - start, 0.2)
+
+            start = time.time()
+            raster.ndarray("stub:synthetic:meta_00000000_v1", bands=["red"], dimensions=(2, 2))
+            self.assertGreaterEqual(time.time() - start, 0.2)
+
+    def test_bandwidth(self):
+        with StubPlatform(bandwidth=1000000) as platform:
+            raster = Raster(url=platform.url + "/raster/v1", auth=platform.auth())
+            start = time.time()
+            raster.raster("stub:synthetic:meta_00000000_v1", bands=["red"], dimensions=(250, 1000))
+            self.assertGreaterEqual(time.time() - start, 0.5)
+
+    def test_subprocess(self):
+        process = subprocess.Popen(
+            [sys.executable, "-m", "descarteslabs.client.stubserver", "--scenes", "10"],
+            stdout=subprocess.PIPE,
+        )
+        try:
+            env = {}
+            for _ in range(5):
+                name, value = process.stdout.readline().decode("utf-8").strip()[len("export "):].split("=", 1)
+                env[name] = value
+
+            with mock.patch.dict(os.environ, env):
+                self.assertEqual(len(Metadata().search(limit=100).features), 10)
+        finally:
+            process.terminate()
+            process.wait()
+            process.stdout.close()
@@ -0,0 +1,3 @@
+from .sqlite import Transaction, connect
+
+__all__ = ["Transaction", "connect"]
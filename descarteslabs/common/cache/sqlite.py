@@ -0,0 +1,32 @@
+import os
+import sqlite3
+
+
+def connect(path, name):
+    """
+    Open the SQLite database `name` in the directory `path`, in autocommit
+    mode so transactions are only started by `Transaction`.
+
+    A connection can't be shared across threads or processes.
+    """
+    return sqlite3.connect(os.path.join(path, name), timeout=60, isolation_level=None)
+
+
+class Transaction(object):
+    """
+    Holds the database's write lock while in use, so concurrent processes
+    see a consistent index.
+    """
+
+    def __init__(self, db):
+        self._db = db
+
+    def __enter__(self):
+        self._db.execute("BEGIN IMMEDIATE")
+        return self._db
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self._db.execute("COMMIT")
+        else:
+            self._db.execute("ROLLBACK")
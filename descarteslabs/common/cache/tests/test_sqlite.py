@@ -0,0 +1,32 @@
+import shutil
+import tempfile
+import unittest
+
+from descarteslabs.common.cache import Transaction, connect
+
+
+class TransactionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.db = connect(self.path, "test.sqlite")
+        self.db.execute("CREATE TABLE entries (key TEXT PRIMARY KEY)")
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.path)
+
+    def keys(self):
+        return [row[0] for row in connect(self.path, "test.sqlite").execute("SELECT key FROM entries")]
+
+    def test_commit(self):
+        with Transaction(self.db) as db:
+            db.execute("INSERT INTO entries VALUES ('a')")
+        self.assertEqual(self.keys(), ["a"])
+
+    def test_rollback(self):
+        with self.assertRaises(ValueError):
+            with Transaction(self.db) as db:
+                db.execute("INSERT INTO entries VALUES ('a')")
+                raise ValueError()
+        self.assertEqual(self.keys(), [])
@@ -0,0 +1,376 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Local computation of the DLTile grid.
+
+A DLTile key ``tilesize:pad:resolution:zone:ti:tj`` fully determines a tile:
+in the UTM zone ``zone`` (always the northern EPSG:326xx projection), the
+tile's valid area spans ``tilesize * resolution`` meters, offset by ``ti``
+tiles east of the false easting and ``tj`` tiles north of the equator,
+buffered on each side by ``pad`` pixels.
+
+The functions in this module mirror the DLTile methods of
+:class:`~descarteslabs.client.services.raster.Raster`, returning the same
+GeoJSON features, but compute the grid with NumPy instead of calling the
+service. Coordinates are transformed with the Kruger series for the
+transverse Mercator projection, accurate to well below a millimeter
+within a UTM zone.
+"""
+
+import shapely.geometry
+import shapely.prepared
+
+from descarteslabs.client.addons import numpy as np
+
+
+# WGS84 ellipsoid
+_A = 6378137.0
+_F = 1 / 298.257223563
+
+# UTM projection
+_K0 = 0.9996
+_FALSE_EASTING = 500000.0
+
+_N = _F / (2 - _F)
+_E = (_F * (2 - _F)) ** 0.5
+_RECTIFYING_RADIUS = _A / (1 + _N) * (1 + _N ** 2 / 4 + _N ** 4 / 64 + _N ** 6 / 256)
+
+# Kruger series coefficients to 6th order in the third flattening (Karney 2011)
+_ALPHA = (
+    _N / 2 - 2 * _N ** 2 / 3 + 5 * _N ** 3 / 16 + 41 * _N ** 4 / 180 - 127 * _N ** 5 / 288 + 7891 * _N ** 6 / 37800,
+    13 * _N ** 2 / 48 - 3 * _N ** 3 / 5 + 557 * _N ** 4 / 1440 + 281 * _N ** 5 / 630 - 1983433 * _N ** 6 / 1935360,
+    61 * _N ** 3 / 240 - 103 * _N ** 4 / 140 + 15061 * _N ** 5 / 26880 + 167603 * _N ** 6 / 181440,
+    49561 * _N ** 4 / 161280 - 179 * _N ** 5 / 168 + 6601661 * _N ** 6 / 7257600,
+    34729 * _N ** 5 / 80640 - 3418889 * _N ** 6 / 1995840,
+    212378941 * _N ** 6 / 319334400,
+)
+_BETA = (
+    _N / 2 - 2 * _N ** 2 / 3 + 37 * _N ** 3 / 96 - _N ** 4 / 360 - 81 * _N ** 5 / 512 + 96199 * _N ** 6 / 604800,
+    _N ** 2 / 48 + _N ** 3 / 15 - 437 * _N ** 4 / 1440 + 46 * _N ** 5 / 105 - 1118711 * _N ** 6 / 3870720,
+    17 * _N ** 3 / 480 - 37 * _N ** 4 / 840 - 209 * _N ** 5 / 4480 + 5569 * _N ** 6 / 90720,
+    4397 * _N ** 4 / 161280 - 11 * _N ** 5 / 504 - 830251 * _N ** 6 / 7257600,
+    4583 * _N ** 5 / 161280 - 108847 * _N ** 6 / 3991680,
+    20648693 * _N ** 6 / 638668800,
+)
+
+_WKT = (
+    'PROJCS["WGS 84 / UTM zone {zone}N",GEOGCS["WGS 84",DATUM["WGS_1984",'
+    'SPHEROID["WGS 84",6378137,298.257223563,AUTHORITY["EPSG","7030"]],AUTHORITY["EPSG","6326"]],'
+    'PRIMEM["Greenwich",0,AUTHORITY["EPSG","8901"]],UNIT["degree",0.0174532925199433,AUTHORITY["EPSG","9122"]],'
+    'AUTHORITY["EPSG","4326"]],PROJECTION["Transverse_Mercator"],PARAMETER["latitude_of_origin",0],'
+    'PARAMETER["central_meridian",{central_meridian}],PARAMETER["scale_factor",0.9996],'
+    'PARAMETER["false_easting",500000],PARAMETER["false_northing",0],UNIT["metre",1,AUTHORITY["EPSG","9001"]],'
+    'AXIS["Easting",EAST],AXIS["Northing",NORTH],AUTHORITY["EPSG","{epsg}"]]'
+)
+
+# Number of points along each side of a shape's bounding box used to find
+# the extent of the bounding box in UTM coordinates
+_BOUNDARY_POINTS = 64
+
+
+def utm_zone(lon):
+    """
+    The UTM zone(s) containing the given longitude(s) (WGS84).
+    """
+    return (np.floor((np.asarray(lon, dtype=float) + 180) / 6) % 60 + 1).astype(int)
+
+
+def central_meridian(zone):
+    """
+    The longitude of the central meridian of the given UTM zone(s).
+    """
+    return np.asarray(zone) * 6 - 183
+
+
+def lonlat_to_utm(lon, lat, zone):
+    """
+    Project longitudes and latitudes (WGS84) into the given UTM zone(s).
+
+    :param lon: Longitudes in degrees.
+    :param lat: Latitudes in degrees.
+    :param zone: UTM zone(s), broadcast against `lon` and `lat`.
+
+    :return: A tuple ``(x, y)`` of arrays of eastings and northings in meters.
+    """
+    lam = np.radians(np.asarray(lon, dtype=float) - central_meridian(zone))
+    lam = (lam + np.pi) % (2 * np.pi) - np.pi
+    phi = np.radians(np.asarray(lat, dtype=float))
+
+    # conformal latitude
+    sin_phi = np.sin(phi)
+    tau = np.sinh(np.arctanh(sin_phi) - _E * np.arctanh(_E * sin_phi))
+    cos_lam = np.cos(lam)
+    xi_prime = np.arctan2(tau, cos_lam)
+    eta_prime = np.arcsinh(np.sin(lam) / np.sqrt(tau ** 2 + cos_lam ** 2))
+
+    xi = xi_prime.copy()
+    eta = eta_prime.copy()
+    for j, alpha in enumerate(_ALPHA, 1):
+        xi += alpha * np.sin(2 * j * xi_prime) * np.cosh(2 * j * eta_prime)
+        eta += alpha * np.cos(2 * j * xi_prime) * np.sinh(2 * j * eta_prime)
+
+    x = _FALSE_EASTING + _K0 * _RECTIFYING_RADIUS * eta
+    y = _K0 * _RECTIFYING_RADIUS * xi
+    return x, y
+
+
+def utm_to_lonlat(x, y, zone):
+    """
+    Unproject UTM coordinates in the given zone(s) into longitudes and latitudes (WGS84).
+
+    :param x: Eastings in meters.
+    :param y: Northings in meters (negative in the southern hemisphere).
+    :param zone: UTM zone(s), broadcast against `x` and `y`.
+
+    :return: A tuple ``(lon, lat)`` of arrays of degrees.
+    """
+    xi = np.asarray(y, dtype=float) / (_K0 * _RECTIFYING_RADIUS)
+    eta = (np.asarray(x, dtype=float) - _FALSE_EASTING) / (_K0 * _RECTIFYING_RADIUS)
+
+    xi_prime = xi.copy()
+    eta_prime = eta.copy()
+    for j, beta in enumerate(_BETA, 1):
+        xi_prime -= beta * np.sin(2 * j * xi) * np.cosh(2 * j * eta)
+        eta_prime -= beta * np.cos(2 * j * xi) * np.sinh(2 * j * eta)
+
+    cos_xi = np.cos(xi_prime)
+    sinh_eta = np.sinh(eta_prime)
+    tau_prime = np.sin(xi_prime) / np.sqrt(sinh_eta ** 2 + cos_xi ** 2)
+    lam = np.arctan2(sinh_eta, cos_xi)
+
+    # invert the conformal latitude with Newton's method, which converges
+    # to machine precision in a few iterations
+    e2 = _E ** 2
+    tau = tau_prime.copy()
+    for _ in range(5):
+        sqrt_tau = np.sqrt(1 + tau ** 2)
+        sigma = np.sinh(_E * np.arctanh(_E * tau / sqrt_tau))
+        tau_i = tau * np.sqrt(1 + sigma ** 2) - sigma * sqrt_tau
+        tau += (tau_prime - tau_i) / np.sqrt(1 + tau_i ** 2) * (1 + (1 - e2) * tau ** 2) / ((1 - e2) * sqrt_tau)
+
+    lon = np.degrees(lam) + central_meridian(zone)
+    lat = np.degrees(np.arctan(tau))
+    return lon, lat
+
+
+class Grid(object):
+    """
+    The grid of DLTiles with a given resolution, tile size and padding.
+
+    Tiles are identified by arrays of ``(zone, ti, tj)``, so that many tiles
+    can be computed at once.
+    """
+
+    def __init__(self, resolution, tilesize, pad):
+        """
+        :param float resolution: Resolution of the tiles, in meters.
+        :param int tilesize: Number of valid pixels along each side of a tile.
+        :param int pad: Number of ghost pixels by which each side of a tile is buffered.
+        """
+        resolution = float(resolution)
+        tilesize = int(tilesize)
+        pad = int(pad)
+        if resolution <= 0:
+            raise ValueError("Invalid DLTile resolution {}".format(resolution))
+        if tilesize <= 0:
+            raise ValueError("Invalid DLTile tilesize {}".format(tilesize))
+        if pad < 0:
+            raise ValueError("Invalid DLTile pad {}".format(pad))
+
+        self.resolution = resolution
+        self.tilesize = tilesize
+        self.pad = pad
+
+    @property
+    def step(self):
+        "float: Distance in meters between the origins of adjacent tiles"
+        return self.tilesize * self.resolution
+
+    def key(self, zone, ti, tj):
+        "The key of a single tile."
+        return "{}:{}:{!r}:{}:{}:{}".format(self.tilesize, self.pad, self.resolution, int(zone), int(ti), int(tj))
+
+    def index_from_lonlat(self, lon, lat):
+        """
+        The ``(zone, ti, tj)`` of the tiles containing the given points (WGS84).
+        """
+        zone = utm_zone(lon)
+        x, y = lonlat_to_utm(lon, lat, zone)
+        ti = np.floor((x - _FALSE_EASTING) / self.step).astype(int)
+        tj = np.floor(y / self.step).astype(int)
+        return zone, ti, tj
+
+    def bounds(self, ti, tj, padded=True):
+        """
+        The ``(min_x, min_y, max_x, max_y)`` UTM bounds of tiles, as an array of shape ``(N, 4)``.
+
+        :param bool padded: Whether to include the padding in the bounds.
+        """
+        ti = np.asarray(ti, dtype=float)
+        tj = np.asarray(tj, dtype=float)
+        pad = self.pad * self.resolution if padded else 0.0
+        min_x = _FALSE_EASTING + ti * self.step - pad
+        min_y = tj * self.step - pad
+        size = self.step + 2 * pad
+        return np.stack([min_x, min_y, min_x + size, min_y + size], axis=-1)
+
+    def polygons(self, zone, ti, tj, padded=True):
+        """
+        The corners of tiles in WGS84, as an array of closed rings of shape ``(N, 5, 2)``.
+
+        :param bool padded: Whether to include the padding in the polygons.
+        """
+        bounds = self.bounds(ti, tj, padded=padded)
+        # counter-clockwise from the lower left corner
+        x = bounds[..., [0, 2, 2, 0, 0]]
+        y = bounds[..., [1, 1, 3, 3, 1]]
+        lon, lat = utm_to_lonlat(x, y, np.asarray(zone)[..., np.newaxis])
+        return np.stack([lon, lat], axis=-1)
+
+    def features(self, zone, ti, tj):
+        """
+        GeoJSON features for tiles, identical to those returned by `Raster.dltile`.
+        """
+        zone, ti, tj = [np.atleast_1d(np.asarray(a, dtype=int)) for a in (zone, ti, tj)]
+        bounds = self.bounds(ti, tj).tolist()
+        polygons = self.polygons(zone, ti, tj).tolist()
+
+        features = []
+        for z, i, j, b, polygon in zip(zone.tolist(), ti.tolist(), tj.tolist(), bounds, polygons):
+            epsg = 32600 + z
+            features.append({
+                "type": "Feature",
+                "geometry": {"type": "Polygon", "coordinates": [polygon]},
+                "properties": {
+                    "key": self.key(z, i, j),
+                    "resolution": self.resolution,
+                    "tilesize": self.tilesize,
+                    "pad": self.pad,
+                    "zone": z,
+                    "ti": i,
+                    "tj": j,
+                    "cs_code": "EPSG:{}".format(epsg),
+                    "outputBounds": b,
+                    "geotrans": [b[0], self.resolution, 0, b[3], 0, -self.resolution],
+                    "proj4": "+proj=utm +zone={} +datum=WGS84 +units=m +no_defs ".format(z),
+                    "wkt": _WKT.format(zone=z, central_meridian=int(central_meridian(z)), epsg=epsg),
+                },
+            })
+        return features
+
+    def index_from_shape(self, shape):
+        """
+        The ``(zone, ti, tj)`` of the tiles whose valid (unpadded) area intersects
+        a shape (WGS84). In each UTM zone, tiles are found for the part of the
+        shape within that zone, so tiles of adjacent zones overlap along the
+        zone boundary.
+
+        :param shape: A shapely geometry.
+        """
+        zones, tis, tjs = [], [], []
+        if shape.is_empty:
+            return tuple(np.empty(0, dtype=int) for _ in range(3))
+
+        min_lon, _, max_lon, _ = shape.bounds
+        first_zone = min(int(utm_zone(min_lon)), 60)
+        last_zone = 60 if max_lon >= 180 else int(utm_zone(max_lon))
+        for zone in range(first_zone, last_zone + 1):
+            meridian = int(central_meridian(zone))
+            part = shape.intersection(shapely.geometry.box(meridian - 3, -90, meridian + 3, 90))
+            if part.is_empty:
+                continue
+
+            ti, tj = self._candidates(part, zone)
+            polygons = self.polygons(np.full(ti.shape, zone), ti, tj, padded=False)
+            prepared = shapely.prepared.prep(part)
+            hits = np.array([prepared.intersects(shapely.geometry.Polygon(p)) for p in polygons], dtype=bool)
+
+            zones.append(np.full(np.count_nonzero(hits), zone, dtype=int))
+            tis.append(ti[hits])
+            tjs.append(tj[hits])
+
+        if not zones:
+            return tuple(np.empty(0, dtype=int) for _ in range(3))
+        return np.concatenate(zones), np.concatenate(tis), np.concatenate(tjs)
+
+    def _candidates(self, part, zone):
+        # tiles covering the extent in UTM of the part's bounding box, plus one more
+        # tile on every side to allow for the curvature of the projected box's edges
+        min_lon, min_lat, max_lon, max_lat = part.bounds
+        t = np.linspace(0, 1, _BOUNDARY_POINTS)
+        lon = np.concatenate([min_lon + (max_lon - min_lon) * t, np.full_like(t, max_lon),
+                              max_lon - (max_lon - min_lon) * t, np.full_like(t, min_lon)])
+        lat = np.concatenate([np.full_like(t, min_lat), min_lat + (max_lat - min_lat) * t,
+                              np.full_like(t, max_lat), max_lat - (max_lat - min_lat) * t])
+        x, y = lonlat_to_utm(lon, lat, zone)
+
+        ti = np.arange(int(np.floor((x.min() - _FALSE_EASTING) / self.step)) - 1,
+                       int(np.floor((x.max() - _FALSE_EASTING) / self.step)) + 2)
+        tj = np.arange(int(np.floor(y.min() / self.step)) - 1,
+                       int(np.floor(y.max() / self.step)) + 2)
+        # ordered by ti, then tj, like the tiles returned by the service
+        ti, tj = np.meshgrid(ti, tj, indexing="ij")
+        return ti.ravel(), tj.ravel()
+
+
+def parse_key(key):
+    """
+    Split a DLTile key into its ``(Grid, zone, ti, tj)``.
+    """
+    try:
+        tilesize, pad, resolution, zone, ti, tj = key.split(":")
+        return Grid(float(resolution), int(tilesize), int(pad)), int(zone), int(ti), int(tj)
+    except (AttributeError, ValueError):
+        raise ValueError("Invalid DLTile key {!r}".format(key))
+
+
+def dltile(key):
+    """
+    Compute the GeoJSON feature of a DLTile from its key, like `Raster.dltile`.
+
+    :param str key: A DLTile key, e.g. ``"128:16:960.0:15:-1:37"``.
+    """
+    grid, zone, ti, tj = parse_key(key)
+    if not 1 <= zone <= 60:
+        raise ValueError("Invalid DLTile key {!r}".format(key))
+    return grid.features(zone, ti, tj)[0]
+
+
+def dltile_from_latlon(lat, lon, resolution, tilesize, pad):
+    """
+    Compute the GeoJSON feature of the DLTile containing a point, like `Raster.dltile_from_latlon`.
+    """
+    grid = Grid(resolution, tilesize, pad)
+    return grid.features(*grid.index_from_lonlat(lon, lat))[0]
+
+
+def dltiles_from_shape(resolution, tilesize, pad, shape):
+    """
+    Compute the GeoJSON features of the DLTiles intersecting a shape, like `Raster.dltiles_from_shape`.
+
+    :param shape: A GeoJSON geometry or Feature, or an object with a ``__geo_interface__``, in WGS84.
+
+    :return: A GeoJSON FeatureCollection.
+    """
+    if hasattr(shape, "__geo_interface__"):
+        shape = shape.__geo_interface__
+    if shape.get("type") == "Feature":
+        shape = shape["geometry"]
+
+    grid = Grid(resolution, tilesize, pad)
+    return {
+        "type": "FeatureCollection",
+        "features": grid.features(*grid.index_from_shape(shapely.geometry.shape(shape))),
+    }
@@ -0,0 +1,199 @@
+import unittest
+
+import shapely.geometry
+
+from descarteslabs.client.addons import numpy as np
+from descarteslabs.client.services.raster.tests.iowa_geometry import iowa_geom
+from descarteslabs.common.dltile import (
+    Grid,
+    dltile,
+    dltile_from_latlon,
+    dltiles_from_shape,
+    lonlat_to_utm,
+    utm_to_lonlat,
+)
+
+
+# responses recorded from the Raster service's /dlkeys endpoints
+recorded_tiles = [
+    {
+        'geometry': {
+            'coordinates': [[
+                [-94.64171754779824, 40.9202359006794],
+                [-92.81755164322226, 40.93177944075989],
+                [-92.81360932958779, 42.31528732533928],
+                [-94.6771717075502, 42.303172487087394],
+                [-94.64171754779824, 40.9202359006794]
+            ]],
+            'type': 'Polygon'
+        },
+        'properties': {
+            'cs_code': 'EPSG:32615',
+            'key': '128:16:960.0:15:-1:37',
+            'outputBounds': [361760.0, 4531200.0, 515360.0, 4684800.0],
+            'pad': 16,
+            'resolution': 960.0,
+            'ti': -1,
+            'tilesize': 128,
+            'tj': 37,
+            'zone': 15,
+            'geotrans': [361760.0, 960.0, 0, 4684800.0, 0, -960.0],
+            'proj4': '+proj=utm +zone=15 +datum=WGS84 +units=m +no_defs ',
+            'wkt': 'PROJCS["WGS 84 / UTM zone 15N",GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563,AUTHORITY["EPSG","7030"]],AUTHORITY["EPSG","6326"]],PRIMEM["Greenwich",0,AUTHORITY["EPSG","8901"]],UNIT["degree",0.0174532925199433,AUTHORITY["EPSG","9122"]],AUTHORITY["EPSG","4326"]],PROJECTION["Transverse_Mercator"],PARAMETER["latitude_of_origin",0],PARAMETER["central_meridian",-93],PARAMETER["scale_factor",0.9996],PARAMETER["false_easting",500000],PARAMETER["false_northing",0],UNIT["metre",1,AUTHORITY["EPSG","9001"]],AXIS["Easting",EAST],AXIS["Northing",NORTH],AUTHORITY["EPSG","32615"]]' # noqa
+        },
+        'type': 'Feature'
+    },
+    {
+        'geometry': {
+            'coordinates': [[
+                [59.88428127486419, 44.89851158847289],
+                [60.08463455818353, 44.90380671613201],
+                [60.077403974563175, 45.046212550598135],
+                [59.87655568675822, 45.040891215906676],
+            ]],
+            'type': 'Polygon'
+        },
+        'properties': {
+            'cs_code': 'EPSG:32641',
+            'key': '1024:16:15.0:41:-16:324',
+            'outputBounds': [254000.0, 4976400.0, 269840.0, 4992240.0],
+            'pad': 16,
+            'resolution': 15.0,
+            'ti': -16,
+            'tilesize': 1024,
+            'tj': 324,
+            'zone': 41,
+            'proj4': '+proj=utm +zone=41 +datum=WGS84 +units=m +no_defs ',
+        },
+        'type': 'Feature'
+    },
+    {
+        'geometry': {
+            'coordinates': [[
+                [-96.81264975325402, 41.045203319986356],
+                [-96.07101667769108, 41.02873098016475],
+                [-96.04576296033223, 41.59007261142797],
+                [-96.79377566762066, 41.60687154946031],
+            ]],
+            'type': 'Polygon'
+        },
+        'properties': {
+            'cs_code': 'EPSG:32614',
+            'key': '2048:16:30.0:14:3:74',
+            'outputBounds': [683840.0, 4546080.0, 746240.0, 4608480.0],
+            'pad': 16,
+            'resolution': 30.0,
+            'ti': 3,
+            'tilesize': 2048,
+            'tj': 74,
+            'zone': 14,
+            'proj4': '+proj=utm +zone=14 +datum=WGS84 +units=m +no_defs ',
+        },
+        'type': 'Feature'
+    },
+]
+
+
+class TestUTM(unittest.TestCase):
+    def test_round_trip(self):
+        lon = np.linspace(-3, 3, 25) - 93
+        lat = np.linspace(-80, 84, 25)
+        lon, lat = [a.ravel() for a in np.meshgrid(lon, lat)]
+        x, y = lonlat_to_utm(lon, lat, 15)
+        lon2, lat2 = utm_to_lonlat(x, y, 15)
+        np.testing.assert_allclose(lon2, lon, atol=1e-9)
+        np.testing.assert_allclose(lat2, lat, atol=1e-9)
+
+    def test_central_meridian(self):
+        x, y = lonlat_to_utm([-93, -93], [0, 45], 15)
+        np.testing.assert_allclose(x, [500000, 500000])
+        self.assertEqual(y[0], 0)
+
+
+class TestDLTile(unittest.TestCase):
+    def assertTileEqual(self, tile, expected):
+        for key, value in expected["properties"].items():
+            if key in ("outputBounds", "geotrans"):
+                np.testing.assert_allclose(tile["properties"][key], value)
+            else:
+                self.assertEqual(tile["properties"][key], value, key)
+
+        expected_ring = expected["geometry"]["coordinates"][0]
+        ring = tile["geometry"]["coordinates"][0]
+        np.testing.assert_allclose(ring[:len(expected_ring)], expected_ring, rtol=0, atol=1e-9)
+        self.assertEqual(ring[0], ring[-1])
+
+    def test_dltile(self):
+        for expected in recorded_tiles:
+            self.assertTileEqual(dltile(expected["properties"]["key"]), expected)
+
+    def test_dltile_invalid(self):
+        for key in [None, "", "128:16:960.0:15:-1", "128:16:foo:15:-1:37", "128:16:960.0:61:-1:37"]:
+            with self.assertRaises(ValueError):
+                dltile(key)
+
+    def test_dltile_from_latlon(self):
+        self.assertTileEqual(dltile_from_latlon(45, 60, 15.0, 1024, 16), recorded_tiles[1])
+        self.assertEqual(dltile_from_latlon(45.0, -90.0, 30.0, 2048, 16)["properties"]["key"], "2048:16:30.0:16:-4:81")
+
+    def test_dltiles_from_shape(self):
+        tiles = dltiles_from_shape(30.0, 2048, 16, iowa_geom)
+        self.assertEqual(len(tiles["features"]), 58)
+        self.assertEqual(len(set(t["properties"]["key"] for t in tiles["features"])), 58)
+
+        iowa = shapely.geometry.shape(iowa_geom)
+        for tile in tiles["features"]:
+            self.assertTrue(shapely.geometry.shape(tile["geometry"]).intersects(iowa))
+
+    def test_dltiles_from_shape_order(self):
+        iowa_simple = {
+            "coordinates": [[
+                [-96.498997, 42.560832],
+                [-95.765645, 40.585208],
+                [-91.729115, 40.61364],
+                [-91.391613, 40.384038],
+                [-90.952233, 40.954047],
+                [-91.04589, 41.414085],
+                [-90.343228, 41.587833],
+                [-90.140613, 41.995999],
+                [-91.065059, 42.751338],
+                [-91.217706, 43.50055],
+                [-96.599191, 43.500456],
+                [-96.498997, 42.560832]
+            ]],
+            "type": "Polygon"
+        }
+        tiles = dltiles_from_shape(30.0, 2048, 16, iowa_simple)
+        self.assertTileEqual(tiles["features"][0], recorded_tiles[2])
+
+    def test_dltiles_from_shape_empty(self):
+        tiles = dltiles_from_shape(30.0, 2048, 16, shapely.geometry.Polygon())
+        self.assertEqual(tiles["features"], [])
+
+
+class TestGrid(unittest.TestCase):
+    def test_vectorized(self):
+        grid = Grid(30.0, 512, 8)
+        lon = np.random.uniform(-180, 180, 1000)
+        lat = np.random.uniform(-80, 80, 1000)
+        zone, ti, tj = grid.index_from_lonlat(lon, lat)
+
+        bounds = grid.bounds(ti, tj, padded=False)
+        x, y = lonlat_to_utm(lon, lat, zone)
+        self.assertTrue((bounds[:, 0] <= x).all() and (x < bounds[:, 2]).all())
+        self.assertTrue((bounds[:, 1] <= y).all() and (y < bounds[:, 3]).all())
+
+        polygons = grid.polygons(zone, ti, tj)
+        self.assertEqual(polygons.shape, (1000, 5, 2))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            Grid(0, 512, 8)
+        with self.assertRaises(ValueError):
+            Grid(30.0, 0, 8)
+        with self.assertRaises(ValueError):
+            Grid(30.0, 512, -1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,3 @@
+from .lazy import lazy_attributes, lazy_import
+
+__all__ = ["lazy_attributes", "lazy_import"]
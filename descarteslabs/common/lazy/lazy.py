@@ -0,0 +1,56 @@
+import importlib
+import sys
+import threading
+
+
+def lazy_attributes(module_name, factories):
+    """
+    Create attributes of the module `module_name` only when they are first
+    accessed, so importing the module stays cheap.
+
+    `factories` maps the name of each attribute to a callable without
+    arguments which creates it. Attributes are created at most once, even
+    when first accessed from several threads at once.
+
+    This relies on module-level ``__getattr__`` (PEP 562). Before Python 3.7,
+    the attributes are created right away instead, except those whose
+    factory raises an ImportError.
+    """
+    module = sys.modules[module_name]
+    # reentrant, as a factory may use other lazy attributes of the module
+    lock = threading.RLock()
+
+    def __getattr__(name):
+        factory = factories.get(name)
+        if factory is None:
+            raise AttributeError("module '{}' has no attribute '{}'".format(module_name, name))
+
+        with lock:
+            if name not in module.__dict__:
+                setattr(module, name, factory())
+        return module.__dict__[name]
+
+    def __dir__():
+        return sorted(set(module.__dict__) | set(factories))
+
+    if sys.version_info >= (3, 7):
+        module.__getattr__ = __getattr__
+        module.__dir__ = __dir__
+    else:
+        for name in factories:
+            try:
+                __getattr__(name)
+            except ImportError:
+                pass
+
+
+def lazy_import(module_name, attribute=None):
+    """
+    A factory for `lazy_attributes` importing the module `module_name`,
+    and returning its `attribute` if given, or the module itself.
+    """
+    def factory():
+        module = importlib.import_module(module_name)
+        return module if attribute is None else getattr(module, attribute)
+
+    return factory
@@ -0,0 +1,66 @@
+import sys
+import threading
+import types
+import unittest
+
+from descarteslabs.common.lazy import lazy_attributes, lazy_import
+
+
+@unittest.skipIf(sys.version_info < (3, 7), "module __getattr__ requires Python 3.7+")
+class LazyAttributesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.module = types.ModuleType("lazy_test_module")
+        sys.modules[self.module.__name__] = self.module
+
+    def tearDown(self):
+        del sys.modules[self.module.__name__]
+
+    def test_created_once(self):
+        calls = []
+
+        def factory():
+            calls.append(None)
+            return object()
+
+        lazy_attributes(self.module.__name__, {"value": factory})
+        self.assertEqual(calls, [])
+
+        values = []
+        threads = [threading.Thread(target=lambda: values.append(self.module.value)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(value is values[0] for value in values))
+        self.assertIn("value", dir(self.module))
+
+    def test_dependent_attributes(self):
+        lazy_attributes(self.module.__name__, {
+            "base": lambda: 1,
+            "derived": lambda: self.module.base + 1,
+        })
+        self.assertEqual(self.module.derived, 2)
+
+    def test_missing_attribute(self):
+        lazy_attributes(self.module.__name__, {})
+        with self.assertRaises(AttributeError):
+            self.module.missing
+
+    def test_lazy_import(self):
+        lazy_attributes(self.module.__name__, {
+            "json": lazy_import("json"),
+            "dumps": lazy_import("json", "dumps"),
+            "missing": lazy_import("descarteslabs.missing_module"),
+        })
+        import json
+        self.assertIs(self.module.json, json)
+        self.assertIs(self.module.dumps, json.dumps)
+        with self.assertRaises(ImportError):
+            self.module.missing
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+import collections
+import os
+import threading
+
+from descarteslabs.client.addons import concurrent
+
+# Number of threads of the executor shared by all I/O calls in a process,
+# unless set with `set_io_executor` or the `DESCARTESLABS_IO_WORKERS` environment variable
+DEFAULT_IO_WORKERS = 16
+
+_io_executors = {}
+_io_executors_lock = threading.Lock()
+
+# The executors running a call of `map_unordered` or `map_ordered` on this thread
+_running = threading.local()
+
+
+def _io_workers():
+    return int(os.environ.get("DESCARTESLABS_IO_WORKERS", DEFAULT_IO_WORKERS))
+
+
+def io_executor():
+    """
+    The thread pool shared by all parallel I/O calls in this process
+    (like `Raster.stack` and `SceneCollection.stack`), created when first needed.
+
+    Its threads live as long as the process, so the HTTP sessions they hold
+    (sessions are per thread) keep their connections open from one call to the next.
+    A forked process gets its own executor.
+
+    Raises ImportError if ``concurrent.futures`` is not available.
+    """
+    pid = os.getpid()
+    with _io_executors_lock:
+        executor = _io_executors.get(pid)
+        if executor is None:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=_io_workers())
+            _io_executors.clear()
+            _io_executors[pid] = executor
+    return executor
+
+
+def set_io_executor(executor=None, max_workers=None):
+    """
+    Replace the thread pool returned by `io_executor`, either by the given
+    `executor`, or by a new one with `max_workers` threads. If neither is
+    given, a new one is created when next needed.
+
+    The previous executor is shut down once the calls already submitted to it finish.
+    """
+    if executor is None and max_workers is not None:
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+
+    pid = os.getpid()
+    with _io_executors_lock:
+        previous = _io_executors.pop(pid, None)
+        if executor is not None:
+            _io_executors[pid] = executor
+
+    if previous is not None:
+        previous.shutdown(wait=False)
+
+
+def _on_executor(fn, executor):
+    # mark the thread as running on `executor` during the call
+    def call(item):
+        outer = getattr(_running, "executors", ())
+        _running.executors = outer + (executor,)
+        try:
+            return fn(item)
+        finally:
+            _running.executors = outer
+
+    return call
+
+
+def _running_on(executor):
+    return any(running is executor for running in getattr(_running, "executors", ()))
+
+
+def map_unordered(fn, items, executor=None, max_workers=None):
+    """
+    Call ``fn(item)`` for each of `items` on `executor` (the shared `io_executor`
+    if None), generating ``(index, result)`` tuples in the order the calls complete.
+
+    At most `max_workers` calls are submitted at once (all of them if None), so a
+    single call doesn't take over a shared executor. Calls not yet started are
+    cancelled if a call fails or the generator is closed.
+
+    If called from a call already running on `executor`, the calls are made
+    one at a time on the calling thread, as waiting for the executor from one
+    of its own threads could wait forever.
+    """
+    if max_workers is not None and max_workers < 1:
+        raise ValueError("max_workers must be greater than 0")
+    if executor is None:
+        executor = io_executor()
+    if _running_on(executor):
+        for i, item in enumerate(items):
+            yield i, fn(item)
+        return
+    futures = concurrent.futures
+    call = _on_executor(fn, executor)
+
+    items = iter(enumerate(items))
+    pending = {}
+
+    def submit():
+        for i, item in items:
+            pending[executor.submit(call, item)] = i
+            return True
+        return False
+
+    try:
+        while (max_workers is None or len(pending) < max_workers) and submit():
+            pass
+
+        while pending:
+            done, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                i = pending.pop(future)
+                submit()
+                yield i, future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def map_ordered(fn, items, executor=None, max_workers=None):
+    """
+    Call ``fn(item)`` for each of `items` on `executor` (the shared `io_executor`
+    if None), generating the results in the order of `items`.
+
+    At most `max_workers` calls are pending at once (all of them if None),
+    counting the calls which completed but whose result wasn't generated yet,
+    so that only as many results are held at once. Calls not yet started are
+    cancelled if a call fails or the generator is closed.
+
+    As for `map_unordered`, the calls are made on the calling thread if it's
+    running a call on `executor`.
+    """
+    if max_workers is not None and max_workers < 1:
+        raise ValueError("max_workers must be greater than 0")
+    if executor is None:
+        executor = io_executor()
+    if _running_on(executor):
+        for item in items:
+            yield fn(item)
+        return
+    call = _on_executor(fn, executor)
+
+    items = iter(items)
+    pending = collections.deque()
+
+    def submit():
+        for item in items:
+            pending.append(executor.submit(call, item))
+            return True
+        return False
+
+    try:
+        while (max_workers is None or len(pending) < max_workers) and submit():
+            pass
+
+        while pending:
+            result = pending.popleft().result()
+            submit()
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
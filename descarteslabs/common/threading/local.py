@@ -33,3 +33,45 @@ class ThreadLocalWrapper(object):
     def _create_local(self, pid):
         self._local = threading.local()
         self._local._pid = pid
+
+
+class ProcessLocalWrapper(object):
+    """
+    A wrapper around an object that gets created lazily in every process
+    via the given factory callable when it is accessed, and is then shared
+    by all threads of that process. I.e., at most one instance per process exists.
+
+    In contrast to a module-level global this is compatible with multiple
+    processes: a forked process doesn't inherit the instance of its parent.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+        self._lock_pid = os.getpid()
+
+    def get(self):
+        pid = os.getpid()
+        instance = self._instance
+        if instance is not None and instance[0] == pid:
+            return instance[1]
+
+        with self._get_lock(pid):
+            instance = self._instance
+            if instance is None or instance[0] != pid:
+                instance = (pid, self._factory())
+                self._instance = instance
+        return instance[1]
+
+    def reset(self):
+        """Drop the instance of this process, so a new one gets created when next accessed"""
+        with self._get_lock(os.getpid()):
+            self._instance = None
+
+    def _get_lock(self, pid):
+        # the lock may have been held by another thread while forking
+        if self._lock_pid != pid:
+            self._lock = threading.Lock()
+            self._lock_pid = pid
+        return self._lock
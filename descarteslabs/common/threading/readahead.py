@@ -0,0 +1,149 @@
+import sys
+import threading
+
+import six
+from six.moves import queue
+
+
+# Default number of items (usually pages of search results) fetched ahead
+# of the consumer
+DEFAULT_DEPTH = 1
+
+_DONE = object()
+
+# Interval in seconds at which a producer waiting for room in the buffer checks
+# whether it was cancelled
+_CANCEL_POLL_INTERVAL = 0.1
+
+
+class ReadAhead(object):
+    """
+    An iterator over another iterator, which is advanced in a background thread
+    up to `depth` items ahead of the consumer: at most `depth` items are
+    buffered or being fetched at once. Used to fetch the next page of paged
+    results while the current one is processed.
+
+    Exceptions raised by the wrapped iterator are re-raised by ``next`` in the
+    consumer, in order. Calling ``close``, or letting the ReadAhead be garbage
+    collected, stops the background thread after the item it is fetching, and
+    closes the items fetched ahead which have a ``close`` method, like pages
+    holding open responses.
+
+    The wrapped iterator should not hold a reference to the ReadAhead's
+    consumer, or the consumer will never be garbage collected while the
+    background thread runs.
+    """
+
+    def __init__(self, iterable, depth=DEFAULT_DEPTH):
+        """
+        :param iterable: The iterable to read ahead of.
+        :param int depth: Maximum number of items fetched ahead. If 0, items are
+            fetched by the consumer's thread, when requested.
+        """
+        self._finished = False
+        self._thread = None
+        self._iterator = iter(iterable)
+
+        if depth > 0:
+            self._queue = queue.Queue()
+            # a slot is taken before fetching an item and given back when it's consumed,
+            # so that the item being fetched counts towards the depth
+            self._slots = queue.Queue(maxsize=depth)
+            self._cancelled = threading.Event()
+            self._thread = threading.Thread(
+                target=_produce, args=(self._iterator, self._queue, self._slots, self._cancelled)
+            )
+            self._thread.daemon = True
+            self._thread.start()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._finished:
+            raise StopIteration()
+
+        if self._thread is None:
+            try:
+                return next(self._iterator)
+            except StopIteration:
+                self._finished = True
+                raise
+
+        item, exc_info = self._queue.get()
+        self._slots.get_nowait()
+        if item is _DONE:
+            self._finished = True
+            if exc_info is not None:
+                six.reraise(*exc_info)
+            raise StopIteration()
+        return item
+
+    def next(self):
+        """Backwards compatibility for Python 2"""
+        return self.__next__()
+
+    def close(self):
+        """
+        Stop reading ahead.
+        """
+        self._finished = True
+        if self._thread is not None:
+            self._cancelled.set()
+            _discard(self._queue)
+        elif hasattr(self, "_iterator"):
+            _close(self._iterator)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+
+def _produce(iterator, buffer, slots, cancelled):
+    try:
+        while _acquire(slots, cancelled):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                buffer.put((_DONE, None))
+                return
+            buffer.put((item, None))
+    except Exception:
+        buffer.put((_DONE, sys.exc_info()))
+    finally:
+        _close(iterator)
+        if cancelled.is_set():
+            # the item fetched while the consumer closed
+            _discard(buffer)
+
+
+def _acquire(slots, cancelled):
+    while not cancelled.is_set():
+        try:
+            slots.put(None, timeout=_CANCEL_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _discard(buffer):
+    # close the items left in the buffer
+    while True:
+        try:
+            item, _ = buffer.get_nowait()
+        except queue.Empty:
+            return
+        if item is not _DONE:
+            _close(item)
+
+
+def _close(iterator):
+    close = getattr(iterator, "close", None)
+    if close is not None:
+        close()
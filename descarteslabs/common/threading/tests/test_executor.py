@@ -0,0 +1,156 @@
+import threading
+import time
+import unittest
+
+import mock
+
+from descarteslabs.client.addons import concurrent
+from descarteslabs.common.threading import executor as executor_module
+from descarteslabs.common.threading.executor import io_executor, map_ordered, map_unordered, set_io_executor
+
+
+class Concurrency(object):
+    """A function recording how many of its calls run at once"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def __call__(self, item):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(0.01)
+        with self.lock:
+            self.running -= 1
+        return item * 2
+
+
+class IOExecutorTest(unittest.TestCase):
+
+    def tearDown(self):
+        set_io_executor()
+
+    def test_shared(self):
+        self.assertIs(io_executor(), io_executor())
+        self.assertEqual(io_executor()._max_workers, executor_module.DEFAULT_IO_WORKERS)
+
+    def test_forked(self):
+        executor = io_executor()
+        with mock.patch.object(executor_module.os, "getpid", return_value=-1):
+            self.assertIsNot(io_executor(), executor)
+
+    def test_set(self):
+        set_io_executor(max_workers=3)
+        self.assertEqual(io_executor()._max_workers, 3)
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        set_io_executor(executor)
+        self.assertIs(io_executor(), executor)
+
+        set_io_executor()
+        self.assertIsNot(io_executor(), executor)
+
+    def test_workers_from_environment(self):
+        set_io_executor()
+        with mock.patch.dict(executor_module.os.environ, {"DESCARTESLABS_IO_WORKERS": "5"}):
+            self.assertEqual(io_executor()._max_workers, 5)
+
+
+class MapUnorderedTest(unittest.TestCase):
+
+    def test_map(self):
+        results = dict(map_unordered(lambda item: item * 2, range(20)))
+        self.assertEqual(results, {i: i * 2 for i in range(20)})
+
+    def test_max_workers(self):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+        fn = Concurrency()
+        results = dict(map_unordered(fn, range(20), executor=executor, max_workers=2))
+        self.assertEqual(results, {i: i * 2 for i in range(20)})
+        self.assertEqual(fn.max_running, 2)
+        executor.shutdown()
+
+        with self.assertRaises(ValueError):
+            list(map_unordered(fn, range(20), max_workers=0))
+
+    def test_failure_cancels(self):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        calls = []
+
+        def fn(item):
+            calls.append(item)
+            if item == 1:
+                raise ValueError(item)
+            return item
+
+        with self.assertRaises(ValueError):
+            list(map_unordered(fn, range(20), executor=executor, max_workers=4))
+        executor.shutdown()
+        self.assertLess(len(calls), 20)
+
+    def test_nested(self):
+        # calls made from a call running on the only thread of the executor
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        def outer(item):
+            return sorted(map_unordered(lambda inner: item * inner, range(3), executor=executor))
+
+        results = dict(map_unordered(outer, range(3), executor=executor))
+        executor.shutdown()
+        self.assertEqual(results, {i: [(j, i * j) for j in range(3)] for i in range(3)})
+
+
+class MapOrderedTest(unittest.TestCase):
+
+    def test_map(self):
+        self.assertEqual(list(map_ordered(lambda item: item * 2, range(20))), [i * 2 for i in range(20)])
+
+        def slow_first(item):
+            time.sleep(0.05 if item == 0 else 0)
+            return item
+        self.assertEqual(list(map_ordered(slow_first, range(5), max_workers=3)), list(range(5)))
+
+    def test_max_workers(self):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+        fn = Concurrency()
+        self.assertEqual(list(map_ordered(fn, range(20), executor=executor, max_workers=3)), [i * 2 for i in range(20)])
+        self.assertEqual(fn.max_running, 3)
+
+        # results not generated yet count as pending
+        calls = []
+        results = map_ordered(calls.append, iter(range(20)), executor=executor, max_workers=2)
+        next(results)
+        time.sleep(0.05)
+        self.assertEqual(len(calls), 3)
+        results.close()
+        executor.shutdown()
+
+        with self.assertRaises(ValueError):
+            list(map_ordered(fn, range(20), max_workers=0))
+
+    def test_failure_cancels(self):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        calls = []
+
+        def fn(item):
+            calls.append(item)
+            if item == 1:
+                raise ValueError(item)
+            return item
+
+        with self.assertRaises(ValueError):
+            list(map_ordered(fn, range(20), executor=executor, max_workers=4))
+        executor.shutdown()
+        self.assertLess(len(calls), 20)
+
+    def test_nested(self):
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        def outer(item):
+            return list(map_ordered(lambda inner: item * inner, range(3), executor=executor))
+
+        results = list(map_ordered(outer, range(3), executor=executor))
+        executor.shutdown()
+        self.assertEqual(results, [[i * j for j in range(3)] for i in range(3)])
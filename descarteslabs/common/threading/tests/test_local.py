@@ -3,7 +3,7 @@ import os
 import unittest
 import threading
 
-from descarteslabs.common.threading.local import ThreadLocalWrapper
+from descarteslabs.common.threading.local import ProcessLocalWrapper, ThreadLocalWrapper
 
 
 class ThreadLocalWrapperTest(unittest.TestCase):
@@ -60,3 +60,37 @@ class ThreadLocalWrapperTest(unittest.TestCase):
         self.assertNotEqual(process1_id, process2_id)
         self.assertNotEqual(process2_id, process3_id)
         self.assertNotEqual(process1_id, process3_id)
+
+
+class ProcessLocalWrapperTest(unittest.TestCase):
+
+    def setUp(self):
+        self.wrapper = ProcessLocalWrapper(lambda: (os.getpid(), object()))
+
+    def _store_instance(self):
+        self.thread_instance = self.wrapper.get()
+
+    def _send_pid(self, queue):
+        queue.put(self.wrapper.get()[0])
+
+    def test_wrapper(self):
+        instance = self.wrapper.get()
+        self.assertIs(instance, self.wrapper.get())
+
+        thread = threading.Thread(target=self._store_instance)
+        thread.start()
+        thread.join()
+        self.assertIs(instance, self.thread_instance)
+
+        queue = multiprocessing.Queue()
+        process = multiprocessing.Process(target=self._send_pid, args=(queue,))
+        process.start()
+        process_pid = queue.get()
+        process.join()
+        self.assertEqual(process_pid, process.pid)
+        self.assertIs(instance, self.wrapper.get())
+
+    def test_reset(self):
+        instance = self.wrapper.get()
+        self.wrapper.reset()
+        self.assertIsNot(instance, self.wrapper.get())
@@ -0,0 +1,99 @@
+import gc
+import threading
+import time
+import unittest
+
+from descarteslabs.common.threading.readahead import ReadAhead
+
+
+class Source(object):
+    """An iterator recording how far it has been advanced"""
+
+    def __init__(self, n, fail_at=None):
+        self.n = n
+        self.fail_at = fail_at
+        self.produced = 0
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        try:
+            for i in range(self.n):
+                if i == self.fail_at:
+                    raise ValueError(i)
+                self.produced += 1
+                yield i
+        finally:
+            self.closed.set()
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class ReadAheadTest(unittest.TestCase):
+
+    def test_iterate(self):
+        for depth in [0, 1, 4]:
+            self.assertEqual(list(ReadAhead(iter(Source(10)), depth=depth)), list(range(10)))
+
+    def test_reads_ahead(self):
+        source = Source(10)
+        items = ReadAhead(iter(source), depth=2)
+        self.assertEqual(next(items), 0)
+        # one item consumed, two in the buffer
+        self.assertTrue(wait_for(lambda: source.produced == 3))
+        time.sleep(0.1)
+        self.assertEqual(source.produced, 3)
+        self.assertEqual(next(items), 1)
+        self.assertTrue(wait_for(lambda: source.produced == 4))
+        items.close()
+
+    def test_no_read_ahead(self):
+        source = Source(10)
+        items = ReadAhead(iter(source), depth=0)
+        self.assertEqual(next(items), 0)
+        self.assertEqual(source.produced, 1)
+
+    def test_exception(self):
+        items = ReadAhead(iter(Source(10, fail_at=3)), depth=2)
+        self.assertEqual([next(items) for _ in range(3)], [0, 1, 2])
+        with self.assertRaises(ValueError):
+            next(items)
+        with self.assertRaises(StopIteration):
+            next(items)
+
+    def test_close(self):
+        source = Source(1000)
+        with ReadAhead(iter(source), depth=1) as items:
+            next(items)
+        self.assertTrue(source.closed.wait(5))
+        self.assertLess(source.produced, 1000)
+        with self.assertRaises(StopIteration):
+            next(items)
+
+    def test_close_buffered(self):
+        class Item(object):
+            closed = False
+
+            def close(self):
+                self.closed = True
+
+        items = [Item() for _ in range(5)]
+        pages = ReadAhead(iter(items), depth=2)
+        self.assertIs(next(pages), items[0])
+        self.assertTrue(wait_for(lambda: pages._queue.qsize() == 2))
+        pages.close()
+        pages._thread.join()
+        self.assertEqual([item.closed for item in items], [False, True, True, False, False])
+
+    def test_garbage_collected(self):
+        source = Source(1000)
+        items = ReadAhead(iter(source), depth=1)
+        next(items)
+        del items
+        gc.collect()
+        self.assertTrue(source.closed.wait(5))
+        self.assertLess(source.produced, 1000)
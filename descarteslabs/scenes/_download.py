@@ -60,6 +60,9 @@ def _download(inputs, bands_list, ctx, dtype, dest, format, resampler="near",
 
         format = _format_from_path(dest)
     else:
+        # `dest` is a file-like object
+        if not callable(getattr(dest, "write", None)):
+            raise TypeError("Unable to write to the file-like object {} provided as `dest`".format(dest))
         format = _get_format(format)
 
     raster_params = ctx.raster_params
@@ -76,7 +79,8 @@ def _download(inputs, bands_list, ctx, dtype, dest, format, resampler="near",
     )
 
     try:
-        result = raster_client.raster(**full_raster_args)
+        # the file is streamed to `dest` as it's received, rather than held in memory
+        result = raster_client.raster(dest=dest, **full_raster_args)
     except NotFoundError:
         if len(inputs) == 1:
             msg = "'{}' does not exist in the Descartes catalog".format(inputs[0])
@@ -91,22 +95,12 @@ def _download(inputs, bands_list, ctx, dtype, dest, format, resampler="near",
         msg = msg.format(err=e, args=json.dumps(full_raster_args, indent=2))
         six.raise_from(BadRequestError(msg), None)
 
-    # `result["files"]` should be a dict mapping {default_filename: bytestring}
+    # `result["files"]` should be a dict mapping {default_filename: dest}
     filenames = list(result["files"].keys())
     if len(filenames) == 0:
         raise RuntimeError("Unexpected missing results from raster call")
     elif len(filenames) > 1:
         raise RuntimeError("Unexpected multiple files returned from single raster call: {}".format(filenames))
-    else:
-        file = result["files"][filenames[0]]
 
     if _is_path_like(dest):
-        with open(dest, "wb") as f:
-            f.write(file)
         return dest
-    else:
-        # `dest` is a file-like object
-        try:
-            dest.write(file)
-        except Exception as e:
-            raise TypeError("Unable to write to the file-like object {} provided as `dest`:\n{}".format(dest, e))
@@ -36,7 +36,8 @@ def search(aoi,
            query=None,
            randomize=False,
            raster_client=None,
-           metadata_client=None
+           metadata_client=None,
+           parallel=None
            ):
     """
     Search for Scenes in the Descartes Labs catalog.
@@ -82,6 +83,11 @@ def search(aoi,
     metadata_client : Metadata, optional
         Unneeded in general use; lets you use a specific client instance
         with non-default auth and parameters.
+    parallel : int, optional
+        Split the search into this many shards (by time if both ``start_datetime``
+        and ``end_datetime`` are given, otherwise by area), which are searched
+        concurrently. Useful for searches returning many Scenes; see
+        `Metadata.features <descarteslabs.client.services.metadata.Metadata.features>`.
 
     Returns
     -------
@@ -138,6 +144,8 @@ def search(aoi,
         q=query,
         randomize=randomize
     )
+    if parallel is not None:
+        metadata_params["parallel"] = parallel
 
     metadata = metadata_client.search(**metadata_params)
     if products is None:
@@ -133,8 +133,9 @@ import warnings
 
 from six.moves import reprlib
 
-from descarteslabs.client.addons import mercantile
+from descarteslabs.client.addons import ThirdParty, mercantile, numpy
 from descarteslabs.client.services.raster import Raster
+from descarteslabs.common import dltile
 
 from . import _helpers
 
@@ -619,6 +620,11 @@ class AOI(GeoContext):
             self._shape = shape
 
 
+def _local_dltiles():
+    # the DLTile grid is computed locally when numpy is available
+    return not isinstance(numpy, ThirdParty)
+
+
 class DLTile(GeoContext):
     """
     A GeoContext that clips and projects Scenes to a single DLTile.
@@ -626,6 +632,9 @@ class DLTile(GeoContext):
     DLTiles allow you to define a grid of arbitrary spacing, resolution,
     and overlap that can cover the globe.
     DLTiles are always in a UTM projection.
+
+    If NumPy is installed, DLTiles are computed locally, without requests to
+    the Raster service.
     """
     __slots__ = (
         "_key",
@@ -692,16 +701,19 @@ class DLTile(GeoContext):
             Number of extra pixels by which each side of the tile is buffered.
             This determines the number of pixels by which two tiles overlap.
         raster_client : descarteslabs.client.services.Raster, optional, default None
-            Unneeded in general use; lets you use a specific client instance
-            with non-default auth and parameters.
+            Unneeded in general use. If given, the tile is requested from
+            the Raster service with this client instead of being computed locally.
 
         Returns
         -------
         tile : DLTile
         """
-        if raster_client is None:
-            raster_client = Raster()
-        tile = raster_client.dltile_from_latlon(lat, lon, resolution, tilesize, pad)
+        if raster_client is None and _local_dltiles():
+            tile = dltile.dltile_from_latlon(lat, lon, resolution, tilesize, pad)
+        else:
+            if raster_client is None:
+                raster_client = Raster()
+            tile = raster_client.dltile_from_latlon(lat, lon, resolution, tilesize, pad)
         return cls(tile)
 
     @classmethod
@@ -723,20 +735,24 @@ class DLTile(GeoContext):
             Number of extra pixels by which each side of the tile is buffered.
             This determines the number of pixels by which two tiles overlap.
         raster_client : descarteslabs.client.services.Raster, optional, default None
-            Unneeded in general use; lets you use a specific client instance
-            with non-default auth and parameters.
+            Unneeded in general use. If given, the tiles are requested from
+            the Raster service with this client instead of being computed locally.
 
         Returns
         -------
         tiles : List[DLTile]
         """
-        if raster_client is None:
-            raster_client = Raster()
-
         if hasattr(shape, "__geo_interface__"):
             shape = shape.__geo_interface__
 
-        tiles_fc = raster_client.dltiles_from_shape(resolution=resolution, tilesize=tilesize, pad=pad, shape=shape)
+        if raster_client is None and _local_dltiles():
+            tiles_fc = dltile.dltiles_from_shape(resolution, tilesize, pad, shape)
+        else:
+            if raster_client is None:
+                raster_client = Raster()
+            tiles_fc = raster_client.dltiles_from_shape(
+                resolution=resolution, tilesize=tilesize, pad=pad, shape=shape
+            )
         return [cls(tile) for tile in tiles_fc["features"]]
 
     @classmethod
@@ -749,16 +765,19 @@ class DLTile(GeoContext):
         dltile_key : str
             DLTile key, e.g. '128:16:960.0:15:-1:37'
         raster_client : descarteslabs.client.services.Raster, optional, default None
-            Unneeded in general use; lets you use a specific client instance
-            with non-default auth and parameters.
+            Unneeded in general use. If given, the tile is requested from
+            the Raster service with this client instead of being computed locally.
 
         Returns
         -------
         tile: DLTile
         """
-        if raster_client is None:
-            raster_client = Raster()
-        tile = raster_client.dltile(dltile_key)
+        if raster_client is None and _local_dltiles():
+            tile = dltile.dltile(dltile_key)
+        else:
+            if raster_client is None:
+                raster_client = Raster()
+            tile = raster_client.dltile(dltile_key)
         return cls(tile)
 
     @property
@@ -79,6 +79,45 @@ def _strptime_helper(s):
     return None
 
 
+class _Output(object):
+    """
+    Destination given as ``out`` to `Scene.ndarray`, viewed with bands as the
+    outermost axis, like the arrays returned by the raster service.
+    """
+
+    def __init__(self, out, bands_axis, drop_alpha=False):
+        self._out = out
+        self._bands_axis = bands_axis
+        self._drop_alpha = drop_alpha
+        self._array = None
+
+    def _get(self, shape, dtype):
+        if self._array is None:
+            out = self._out
+            if callable(out):
+                out_shape = list(shape[1:])
+                out_shape.insert(self._bands_axis % 3, shape[0])
+                out = out(tuple(out_shape), dtype)
+            self._array = np.moveaxis(out, self._bands_axis, 0)
+        return self._array
+
+    def raster_out(self, shape, dtype):
+        if len(shape) == 2:
+            shape = (1,) + tuple(shape)
+        if self._drop_alpha:
+            # the alpha band is only requested for masking, and isn't part of the
+            # output, so the raster can't be decompressed directly into it
+            self._get((shape[0] - 1,) + tuple(shape[1:]), dtype)
+            return None
+        return self._get(shape, dtype)
+
+    def fill(self, arr):
+        array = self._get(arr.shape, arr.dtype)
+        if not np.may_share_memory(arr, array):
+            array[...] = arr
+        return array
+
+
 class Scene(object):
     """
     Object holding metadata about a single scene in the Descartes Labs catalog.
@@ -344,7 +383,9 @@ class Scene(object):
                 raster_info=False,
                 resampler="near",
                 processing_level=None,
-                raster_client=None
+                raster_client=None,
+                out=None,
+                tilesize=None,
                 ):
         """
         Load bands from this scene as an ndarray, optionally masking invalid data.
@@ -392,6 +433,20 @@ class Scene(object):
         raster_client : Raster, optional
             Unneeded in general use; lets you use a specific client instance
             with non-default auth and parameters.
+        out : ndarray or callable, optional
+            An array to write the data into, instead of allocating a new one.
+            It must have the shape and dtype of the returned array. When no alpha
+            band has to be dropped after masking and ``out`` is C-contiguous with
+            the bands as its outermost axis, data is decompressed directly into it.
+            May also be a callable ``out(shape, dtype)`` returning such an array,
+            which is called once the shape of the raster is known.
+        tilesize : int, optional
+            If given, the raster is fetched as windows of at most ``tilesize`` by
+            ``tilesize`` pixels, requested in parallel and assembled into one array
+            (see `Raster.ndarray_tiled`). The result is the same, but large
+            GeoContexts don't run into the size limits of a single request.
+            Only possible when the GeoContext's ``bounds_crs`` is its ``crs``,
+            as with the GeoContext returned by `Scene.from_id`.
 
         Returns
         -------
@@ -462,8 +517,17 @@ class Scene(object):
             **raster_params
         )
 
+        if out is not None:
+            out = _Output(out, bands_axis, drop_alpha=mask_alpha and drop_alpha)
+            raster_out = out.raster_out
+        else:
+            raster_out = None
+
         try:
-            arr, info = raster_client.ndarray(**full_raster_args)
+            if tilesize is not None:
+                arr, info = raster_client.ndarray_tiled(out=raster_out, tilesize=tilesize, **full_raster_args)
+            else:
+                arr, info = raster_client.ndarray(out=raster_out, **full_raster_args)
         except NotFoundError:
             six.raise_from(
                 NotFoundError("'{}' does not exist in the Descartes catalog".format(self.properties["id"])), None
@@ -487,6 +551,9 @@ class Scene(object):
                     arr = arr[:-1]
                     bands.pop(-1)
 
+            if out is not None:
+                arr = out.fill(arr)
+
             mask = np.zeros_like(arr, dtype=bool)
 
             if mask_nodata:
@@ -499,6 +566,8 @@ class Scene(object):
                 mask |= alpha == 0
 
             arr = np.ma.MaskedArray(arr, mask, copy=False)
+        elif out is not None:
+            arr = out.fill(arr)
 
         if bands_axis != 0:
             arr = np.moveaxis(arr, 0, bands_axis)
@@ -103,16 +103,24 @@ import six
 import logging
 import json
 import os.path
+import threading
+import time
 
-from descarteslabs.client.addons import concurrent, numpy as np
+from descarteslabs.client.addons import ThirdParty, concurrent, numpy as np
 
+from descarteslabs.client.services.metadata.table import FeatureTable
 from descarteslabs.client.services.raster import Raster
+from descarteslabs.client.services.raster.raster import allocate_array, mask_path
+from descarteslabs.client.services.service.metrics import metrics_registry
 from descarteslabs.client.exceptions import NotFoundError, BadRequestError
+from descarteslabs.common.threading.executor import map_unordered
 
 from .collection import Collection
 from .scene import Scene
 from . import _download
 
+_monotonic = getattr(time, "monotonic", time.time)
+
 
 class SceneCollection(Collection):
     """
@@ -172,6 +180,42 @@ class SceneCollection(Collection):
 
         return self.filter(lambda scene: scene.coverage(geom) >= minimum_coverage)
 
+    def to_table(self, fields=None, geometries=False):
+        """
+        The properties of the Scenes, as a column per property.
+
+        Parameters
+        ----------
+        fields : List[str], optional
+            Properties to make columns of. All the properties of the Scenes if None.
+        geometries : bool, optional, default False
+            Whether to keep the geometries of the Scenes, as WKB.
+            Their bounds are always kept.
+
+        Returns
+        -------
+        table : FeatureTable
+            The table of the properties of the Scenes, in order.
+            See `FeatureTable <descarteslabs.client.services.metadata.table.FeatureTable>`.
+
+        Example
+        -------
+        >>> import descarteslabs as dl
+        >>> import numpy as np
+        >>> scenes, ctx = dl.scenes.search(aoi_geometry, products=["landsat:LC08:PRE:TOAR"],
+        ...    limit=None)  # doctest: +SKIP
+        >>> table = scenes.to_table(["date", "cloud_fraction"])  # doctest: +SKIP
+        >>> clear = scenes[np.flatnonzero(table["cloud_fraction"] < 0.1)]  # doctest: +SKIP
+        """
+        return FeatureTable.from_features(
+            (
+                {"id": scene.properties.get("id"), "geometry": scene.geometry, "properties": scene.properties}
+                for scene in self
+            ),
+            fields=fields,
+            geometries=geometries,
+        )
+
     def stack(self,
               bands,
               ctx,
@@ -183,6 +227,8 @@ class SceneCollection(Collection):
               resampler="near",
               processing_level=None,
               max_workers=None,
+              memmap=None,
+              executor=None,
               ):
         """
         Load bands from all scenes and stack them into a 4D ndarray,
@@ -247,12 +293,20 @@ class SceneCollection(Collection):
             support it, ``surface`` applies Descartes Labs' general surface reflectance
             algorithm to the output.
         max_workers : int, default None
-            Maximum number of threads to use to parallelize individual ndarray
-            calls to each Scene.
-            If None, it defaults to the number of processors on the machine,
-            multiplied by 5.
-            Note that unnecessary threads *won't* be created if ``max_workers``
-            is greater than the number of Scenes in the SceneCollection.
+            Maximum number of individual ndarray calls to each Scene to run in parallel.
+            If None, it is only limited by the number of threads of ``executor``.
+        memmap : str, pathlib.Path, or bool, default None
+            Back the stack and its mask with memory-mapped files instead of memory,
+            so they can be larger than the available memory.
+            If a path, the stack is written to a ``.npy`` file at that path, and its mask
+            (if any) next to it, with ``.mask`` inserted before the extension. Both can later
+            be reopened with ``np.load(path, mmap_mode="r")``.
+            If True, temporary files are used.
+        executor : concurrent.futures.Executor, default None
+            Executor on which to run the individual ndarray calls.
+            If None, the thread pool shared by the whole process is used
+            (see `~descarteslabs.common.threading.executor.io_executor`),
+            so repeated calls reuse its threads and their open connections.
 
         Returns
         -------
@@ -260,6 +314,7 @@ class SceneCollection(Collection):
             Returned array's shape is ``(scene, band, y, x)`` if bands_axis is 1,
             or ``(scene, y, x, band)`` if bands_axis is -1.
             If ``mask_nodata`` or ``mask_alpha`` is True, arr will be a masked array.
+            If ``memmap`` is given, its data and mask are backed by the memory-mapped files.
         raster_info : List[dict]
             If ``raster_info=True``, a list of raster information dicts for each scene
             is also returned
@@ -303,8 +358,6 @@ class SceneCollection(Collection):
         else:
             scenes = self
 
-        full_stack = None
-        mask = None
         if raster_info:
             raster_infos = [None] * len(scenes)
 
@@ -318,50 +371,69 @@ class SceneCollection(Collection):
         if pop_alpha:
             bands.pop(-1)
 
+        # The stack is allocated as soon as the shape of the first raster is known,
+        # so each Scene can write its data directly into its slot.
+        stack = {}
+        lock = threading.Lock()
+
+        def allocate(shape, dtype):
+            with lock:
+                if "array" not in stack:
+                    stack["array"] = allocate_array((len(scenes),) + tuple(shape), dtype, memmap=memmap)
+            return stack["array"]
+
         def threaded_ndarrays():
-            def data_loader(scene_or_scenecollection, bands, ctx, **kwargs):
+            def data_loader(i, scene_or_scenecollection, bands, ctx, **kwargs):
                 ndarray_kwargs = dict(kwargs, raster_client=self._raster_client)
                 if isinstance(scene_or_scenecollection, self.__class__):
                     return lambda: scene_or_scenecollection.mosaic(bands, ctx, **kwargs)
                 else:
+                    ndarray_kwargs["out"] = lambda shape, dtype: allocate(shape, dtype)[i]
                     return lambda: scene_or_scenecollection.ndarray(bands, ctx, **ndarray_kwargs)
 
-            try:
-                futures = concurrent.futures
-            except ImportError:
+            if isinstance(concurrent, ThirdParty):
                 logging.warning(
                     "Failed to import concurrent.futures. ndarray calls will be serial."
                 )
                 for i, scene_or_scenecollection in enumerate(scenes):
-                    yield i, data_loader(scene_or_scenecollection, bands, ctx, **kwargs)()
+                    yield i, data_loader(i, scene_or_scenecollection, bands, ctx, **kwargs)()
             else:
-                with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                    future_ndarrays = {}
-                    for i, scene_or_scenecollection in enumerate(scenes):
-                        future_ndarray = executor.submit(data_loader(scene_or_scenecollection, bands, ctx, **kwargs))
-                        future_ndarrays[future_ndarray] = i
-                    for future in futures.as_completed(future_ndarrays):
-                        i = future_ndarrays[future]
-                        result = future.result()
-                        yield i, result
+                loaders = [
+                    data_loader(i, scene_or_scenecollection, bands, ctx, **kwargs)
+                    for i, scene_or_scenecollection in enumerate(scenes)
+                ]
+                for i, result in map_unordered(
+                        lambda loader: loader(), loaders, executor=executor, max_workers=max_workers):
+                    yield i, result
 
+        mask = None
+        # time spent copying rasters into the stack and flushing it
+        assembly_seconds = 0.0
         for i, arr in threaded_ndarrays():
+            start = _monotonic()
             if raster_info:
                 arr, raster_meta = arr
                 raster_infos[i] = raster_meta
 
-            if full_stack is None:
-                stack_shape = (len(scenes),) + arr.shape
-                full_stack = np.empty(stack_shape, dtype=arr.dtype)
-                if isinstance(arr, np.ma.MaskedArray):
-                    mask = np.empty(stack_shape, dtype=bool)
-
+            full_stack = allocate(arr.shape, arr.dtype)
             if isinstance(arr, np.ma.MaskedArray):
-                full_stack[i] = arr.data
+                if mask is None:
+                    mask = allocate_array(full_stack.shape, bool, memmap=mask_path(memmap))
                 mask[i] = arr.mask
-            else:
-                full_stack[i] = arr
+                arr = arr.data
 
+            if not np.may_share_memory(arr, full_stack[i]):
+                full_stack[i] = arr
+            assembly_seconds += _monotonic() - start
+
+        start = _monotonic()
+        full_stack = stack.get("array")
+        for arr in (full_stack, mask):
+            if isinstance(arr, np.memmap):
+                arr.flush()
+        assembly_seconds += _monotonic() - start
+        metrics_registry().histogram("stack_assembly_seconds", {"method": "SceneCollection.stack"}).observe(
+            assembly_seconds)
         if mask is not None:
             full_stack = np.ma.MaskedArray(full_stack, mask, copy=False)
         if raster_info:
@@ -378,6 +450,7 @@ class SceneCollection(Collection):
                resampler="near",
                processing_level=None,
                raster_info=False,
+               tilesize=None,
                ):
         """
         Load bands from all scenes, combining them into a single 3D ndarray
@@ -425,6 +498,13 @@ class SceneCollection(Collection):
             values are ``toa`` (top of atmosphere) and ``surface``. For products that
             support it, ``surface`` applies Descartes Labs' general surface reflectance
             algorithm to the output.
+        tilesize : int, optional
+            If given, the raster is fetched as windows of at most ``tilesize`` by
+            ``tilesize`` pixels, requested in parallel and assembled into one array
+            (see `Raster.ndarray_tiled`). The result is the same, but large
+            GeoContexts don't run into the size limits of a single request.
+            Only possible when the GeoContext's ``bounds_crs`` is its ``crs``,
+            as with the GeoContext returned by `Scene.from_id`.
 
 
         Returns
@@ -482,7 +562,10 @@ class SceneCollection(Collection):
         )
 
         try:
-            arr, info = self._raster_client.ndarray(**full_raster_args)
+            if tilesize is not None:
+                arr, info = self._raster_client.ndarray_tiled(tilesize=tilesize, **full_raster_args)
+            else:
+                arr, info = self._raster_client.ndarray(**full_raster_args)
         except NotFoundError:
             raise NotFoundError(
                 "Some or all of these IDs don't exist in the Descartes catalog: {}".format(full_raster_args["inputs"])
@@ -543,6 +626,7 @@ class SceneCollection(Collection):
                  resampler="near",
                  processing_level=None,
                  max_workers=None,
+                 executor=None,
                  ):
         """
         Download scenes as image files in parallel.
@@ -585,12 +669,13 @@ class SceneCollection(Collection):
             support it, ``surface`` applies Descartes Labs' general surface reflectance
             algorithm to the output.
         max_workers : int, default None
-            Maximum number of threads to use to parallelize individual ``download``
-            calls to each Scene.
-            If None, it defaults to the number of processors on the machine,
-            multiplied by 5.
-            Note that unnecessary threads *won't* be created if ``max_workers``
-            is greater than the number of Scenes in the SceneCollection.
+            Maximum number of individual ``download`` calls to each Scene to run in parallel.
+            If None, it is only limited by the number of threads of ``executor``.
+        executor : concurrent.futures.Executor, default None
+            Executor on which to run the individual ``download`` calls.
+            If None, the thread pool shared by the whole process is used
+            (see `~descarteslabs.common.threading.executor.io_executor`),
+            so repeated calls reuse its threads and their open connections.
 
         Returns
         -------
@@ -688,23 +773,19 @@ class SceneCollection(Collection):
             processing_level=processing_level,
             raster_client=self._raster_client,
         )
-        try:
-            futures = concurrent.futures
-        except ImportError:
+        if isinstance(concurrent, ThirdParty):
             logging.warning(
                 "Failed to import concurrent.futures. Download calls will be serial."
             )
             for scene, path in zip(self, dest):
                 scene.download(bands, ctx, dest=path, **download_args)
         else:
-            with futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [
-                    executor.submit(
-                        scene.download, bands, ctx, dest=path, **download_args
-                    )
-                    for scene, path in zip(self, dest)
-                ]
-                concurrent.futures.wait(futures)
+            def download(scene_and_path):
+                scene, path = scene_and_path
+                return scene.download(bands, ctx, dest=path, **download_args)
+
+            for _ in map_unordered(download, zip(self, dest), executor=executor, max_workers=max_workers):
+                pass
         return dest
 
     def download_mosaic(self,
@@ -22,14 +22,21 @@ class TestFormat(unittest.TestCase):
             _download._format_from_path("foo")
 
 
+def _raster(*args, **kwargs):
+    # `Raster.raster` streams the file into `dest` if given
+    dest = kwargs.get("dest")
+    if dest is not None and not _download._is_path_like(dest):
+        dest.write(b"i'm a geotiff!")
+    return {
+        "files": {
+            "foo:bar_nir-yellow.tiff": b"i'm a geotiff!" if dest is None else dest
+        }
+    }
+
+
 @mock.patch("descarteslabs.scenes._download.open", new_callable=mock.mock_open)
 @mock.patch("descarteslabs.scenes._download.os.makedirs")
-# wrap return value in lambda so individual tests can safely mutate it
-@mock.patch("descarteslabs.scenes._download.Raster.raster", side_effect=lambda *args, **kwargs: {
-    "files": {
-        "foo:bar_nir-yellow.tiff": b"i'm a geotiff!"
-    }
-})
+@mock.patch("descarteslabs.scenes._download.Raster.raster", side_effect=_raster)
 class TestDownload(unittest.TestCase):
     id = "foo:bar"
     bands = ["nir", "yellow"]
@@ -61,7 +68,7 @@ class TestDownload(unittest.TestCase):
         mock_raster.assert_called_once()
         called_format = mock_raster.call_args[1]["output_format"]
         self.assertEqual(called_format, "JPEG")
-        mock_open.assert_called_once_with(dest, "wb")
+        self.assertEqual(mock_raster.call_args[1]["dest"], dest)
 
     def test_different_format_and_ext(self, mock_raster, mock_makedirs, mock_open):
         dest = "foo.tif"
@@ -69,7 +76,7 @@ class TestDownload(unittest.TestCase):
         mock_raster.assert_called_once()
         called_format = mock_raster.call_args[1]["output_format"]
         self.assertEqual(called_format, "GTiff")
-        mock_open.assert_called_once_with(dest, "wb")
+        self.assertEqual(mock_raster.call_args[1]["dest"], dest)
 
     def test_to_file(self, mock_raster, mock_makedirs, mock_open):
         file = six.BytesIO()
@@ -81,6 +88,12 @@ class TestDownload(unittest.TestCase):
         mock_raster.assert_called_once()
         called_format = mock_raster.call_args[1]["output_format"]
         self.assertEqual(called_format, "JPEG")
+        self.assertIs(mock_raster.call_args[1]["dest"], file)
+
+    def test_to_invalid_file(self, mock_raster, mock_makedirs, mock_open):
+        with self.assertRaises(TypeError):
+            self.download(object(), format="jpg")
+        mock_raster.assert_not_called()
 
     def test_to_file_invalid_format(self, mock_raster, mock_makedirs, mock_open):
         file = six.BytesIO()
@@ -91,14 +104,13 @@ class TestDownload(unittest.TestCase):
         path = "foo/bar.tif"
         result = self.download(path)
         self.assertEqual(result, path)
-        mock_open.assert_called_once_with(path, "wb")
-        mock_open().write.assert_called_once_with(b"i'm a geotiff!")
+        self.assertEqual(mock_raster.call_args[1]["dest"], path)
         mock_makedirs.assert_called_once_with("foo")
 
     def test_to_existing_path(self, mock_raster, mock_makedirs, mock_open):
         path = "../bar.tif"
         self.download(path)
-        mock_open.assert_called_once_with(path, "wb")
+        self.assertEqual(mock_raster.call_args[1]["dest"], path)
         mock_makedirs.assert_not_called()
 
     def test_default_filename_single_scene(self, mock_raster, mock_makedirs, mock_open):
@@ -122,9 +134,8 @@ class TestDownload(unittest.TestCase):
         import pathlib
         path = pathlib.Path("foo/bar.tif")
         self.download(path)
-        mock_open.assert_called_once_with(path, "wb")
+        self.assertEqual(mock_raster.call_args[1]["dest"], path)
         mock_makedirs.assert_called_once_with("foo")
-        mock_open().write.assert_called_once_with(b"i'm a geotiff!")
 
     def test_weird_response(self, mock_raster, mock_makedirs, mock_open):
         mock_raster.side_effect = lambda *args, **kwargs: {
@@ -296,13 +296,18 @@ class TestDLTIle(unittest.TestCase):
             'type': 'Feature'
         }
 
+    def test_from_key_raster_client(self):
+        raster_client = mock.Mock()
+        raster_client.dltile.return_value = self.dltile_dict
+
+        tile = geocontext.DLTile.from_key(self.key, raster_client=raster_client)
+        raster_client.dltile.assert_called_with(self.key)
+        self.assertEqual(tile.key, self.key)
+
     @mock.patch("descarteslabs.scenes.geocontext.Raster")
     def test_from_key(self, mock_raster):
-        mock_raster_instance = mock_raster.return_value
-        mock_raster_instance.dltile.return_value = self.dltile_dict
-
         tile = geocontext.DLTile.from_key(self.key)
-        mock_raster_instance.dltile.assert_called_with(self.key)
+        mock_raster.assert_not_called()
 
         self.assertEqual(tile.key, self.key)
         self.assertEqual(tile.resolution, 960)
@@ -318,6 +323,22 @@ class TestDLTIle(unittest.TestCase):
         self.assertEqual(tile.geotrans, (361760.0, 960, 0, 4684800.0, 0, -960))
         self.assertEqual(tile.proj4, "+proj=utm +zone=15 +datum=WGS84 +units=m +no_defs ")
         self.assertEqual(tile.wkt, 'PROJCS["WGS 84 / UTM zone 15N",GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563,AUTHORITY["EPSG","7030"]],AUTHORITY["EPSG","6326"]],PRIMEM["Greenwich",0,AUTHORITY["EPSG","8901"]],UNIT["degree",0.0174532925199433,AUTHORITY["EPSG","9122"]],AUTHORITY["EPSG","4326"]],PROJECTION["Transverse_Mercator"],PARAMETER["latitude_of_origin",0],PARAMETER["central_meridian",-93],PARAMETER["scale_factor",0.9996],PARAMETER["false_easting",500000],PARAMETER["false_northing",0],UNIT["metre",1,AUTHORITY["EPSG","9001"]],AXIS["Easting",EAST],AXIS["Northing",NORTH],AUTHORITY["EPSG","32615"]]') # noqa
+        self.assertTrue(tile.geometry.equals_exact(
+            shapely.geometry.shape(self.dltile_dict["geometry"]), 1e-9
+        ))
+
+    @mock.patch("descarteslabs.scenes.geocontext.Raster")
+    def test_from_latlon(self, mock_raster):
+        tile = geocontext.DLTile.from_latlon(41.5, -93.5, 960.0, 128, 16)
+        mock_raster.assert_not_called()
+        self.assertEqual(tile.key, self.key)
+
+    @mock.patch("descarteslabs.scenes.geocontext.Raster")
+    def test_from_shape(self, mock_raster):
+        shape = shapely.geometry.box(-93.5, 41.5, -93.4, 41.6)
+        tiles = geocontext.DLTile.from_shape(shape, 960.0, 128, 16)
+        mock_raster.assert_not_called()
+        self.assertEqual([tile.key for tile in tiles], [self.key])
 
 
 class TestXYZTile(unittest.TestCase):
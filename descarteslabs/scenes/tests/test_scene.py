@@ -133,6 +133,41 @@ class TestScene(unittest.TestCase):
         with self.assertRaises(TypeError):
             scene.ndarray("blue", ctx, invalid_argument=True)
 
+    @mock.patch("descarteslabs.client.services.metadata.Metadata.get", _metadata_get)
+    @mock.patch("descarteslabs.client.services.metadata.Metadata.get_bands_by_id", _metadata_get_bands)
+    @mock.patch("descarteslabs.scenes.scene.Raster.ndarray_tiled", _raster_ndarray)
+    def test_load_tiled(self):
+        scene, ctx = Scene.from_id("landsat:LC08:PRE:TOAR:meta_LC80270312016188_v1")
+        with mock.patch("descarteslabs.scenes.scene.Raster.ndarray") as ndarray:
+            arr = scene.ndarray("red", ctx.assign(resolution=1000), tilesize=64)
+        ndarray.assert_not_called()
+        self.assertEqual(arr.shape, (1, 239, 235))
+
+    @mock.patch("descarteslabs.client.services.metadata.Metadata.get", _metadata_get)
+    @mock.patch("descarteslabs.client.services.metadata.Metadata.get_bands_by_id", _metadata_get_bands)
+    @mock.patch("descarteslabs.scenes.scene.Raster.ndarray", _raster_ndarray)
+    def test_load_into_out(self):
+        scene, ctx = Scene.from_id("landsat:LC08:PRE:TOAR:meta_LC80270312016188_v1")
+        ctx = ctx.assign(resolution=1000)
+        expected = scene.ndarray("red", ctx)
+
+        out = np.zeros((239, 235, 1), dtype=np.uint16)
+        arr = scene.ndarray("red", ctx, bands_axis=-1, out=out)
+        self.assertTrue(np.may_share_memory(arr, out))
+        self.assertTrue((out[:, :, 0] == expected.data[0]).all())
+        self.assertTrue((arr.mask[:, :, 0] == expected.mask[0]).all())
+
+        allocated = []
+
+        def allocate(shape, dtype):
+            allocated.append(np.zeros(shape, dtype=dtype))
+            return allocated[-1]
+
+        arr = scene.ndarray("red alpha", ctx, mask_alpha=False, mask_nodata=False, out=allocate)
+        self.assertEqual(allocated[0].shape, (2, 239, 235))
+        self.assertTrue(np.may_share_memory(arr, allocated[0]))
+        self.assertTrue((allocated[0][0] == expected.data[0]).all())
+
     @mock.patch("descarteslabs.client.services.metadata.Metadata.get", _metadata_get)
     @mock.patch("descarteslabs.client.services.metadata.Metadata.get_bands_by_id", _metadata_get_bands)
     def test_nonexistent_band_fails(self):
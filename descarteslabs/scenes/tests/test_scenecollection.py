@@ -1,9 +1,11 @@
 import unittest
 import mock
 import os.path
+import shutil
+import tempfile
 import shapely.geometry
 
-from descarteslabs.client.addons import ThirdParty
+from descarteslabs.client.addons import ThirdParty, numpy as np
 from descarteslabs.scenes import Scene, SceneCollection, geocontext
 
 from .test_scene import MockScene
@@ -98,6 +100,37 @@ class TestSceneCollection(unittest.TestCase):
         stack, metas = scenes.stack("nir", ctx, raster_info=True)
         self.assertEqual(stack.shape, (2, 1, 122, 120))
 
+    @mock.patch("descarteslabs.scenes.scene.Metadata.get", _metadata_get)
+    @mock.patch("descarteslabs.scenes.scene.Metadata.get_bands_by_id", _metadata_get_bands)
+    @mock.patch("descarteslabs.scenes.scenecollection.Raster.ndarray", _raster_ndarray)
+    def test_stack_memmap(self):
+        scenes = ("landsat:LC08:PRE:TOAR:meta_LC80270312016188_v1", "landsat:LC08:PRE:TOAR:meta_LC80260322016197_v1")
+        scenes, ctxs = zip(*[Scene.from_id(scene) for scene in scenes])
+
+        overlap = scenes[0].geometry.intersection(scenes[1].geometry)
+        ctx = ctxs[0].assign(geometry=overlap, bounds="update", resolution=600)
+
+        scenes = SceneCollection(scenes)
+        expected = scenes.stack("nir", ctx)
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, "stack.npy")
+            stack = scenes.stack("nir", ctx, memmap=path)
+            self.assertIsInstance(stack.data, np.memmap)
+            self.assertTrue((stack == expected).all())
+            self.assertTrue((stack.mask == expected.mask).all())
+            del stack
+
+            self.assertTrue((np.load(path, mmap_mode="r") == expected.data).all())
+            self.assertTrue((np.load(os.path.join(tmpdir, "stack.mask.npy"), mmap_mode="r") == expected.mask).all())
+        finally:
+            shutil.rmtree(tmpdir)
+
+        stack = scenes.stack("nir", ctx, memmap=True)
+        self.assertIsInstance(stack.data, np.memmap)
+        self.assertTrue((stack == expected).all())
+
     @mock.patch("descarteslabs.scenes.scene.Metadata.get", _metadata_get)
     @mock.patch("descarteslabs.scenes.scene.Metadata.get_bands_by_id", _metadata_get_bands)
     @mock.patch("descarteslabs.scenes.scenecollection.Raster.ndarray", _raster_ndarray)
@@ -166,6 +199,23 @@ class TestSceneCollection(unittest.TestCase):
 
         self.assertEqual(len(scenes.filter_coverage(ctx)), 1)
 
+    def test_to_table(self):
+        polygon = shapely.geometry.box(0, 1, 2, 3)
+        scenes = SceneCollection([
+            Scene(dict(id='foo', geometry=polygon, properties={"acquired": "2018-01-01T00:00:00Z"}), {}),
+            Scene(dict(id='bar', geometry=polygon, properties={"cloud_fraction": 0.5}), {}),
+        ])
+
+        table = scenes.to_table(geometries=True)
+        self.assertEqual(list(table.ids), ["foo", "bar"])
+        self.assertEqual(table["date"][0], np.datetime64("2018-01-01"))
+        self.assertTrue(np.isnan(table["cloud_fraction"][0]))
+        self.assertEqual(list(table.bounds[1]), [0, 1, 2, 3])
+        self.assertEqual(table.wkb[0], polygon.wkb)
+
+        table = scenes.to_table(["cloud_fraction"])
+        self.assertEqual(table.fields, ["cloud_fraction"])
+
 
 @mock.patch.object(MockScene, "download")
 class TestSceneCollectionDownload(unittest.TestCase):
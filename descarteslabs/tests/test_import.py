@@ -0,0 +1,80 @@
+# Copyright 2018 Descartes Labs.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+# Imports the package in a fresh interpreter, reporting which modules it imported
+IMPORT_SCRIPT = """
+import json, sys
+import descarteslabs
+print(json.dumps({"modules": sorted(sys.modules)}))
+"""
+
+# Modules which must not be imported until used
+HEAVY_MODULES = [
+    "numpy",
+    "shapely",
+    "geojson",
+    "requests",
+    "descarteslabs.client.auth",
+    "descarteslabs.client.services",
+    "descarteslabs.scenes",
+    "descarteslabs.vectors",
+]
+
+
+def import_package(home):
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, HOME=home, PYTHONPATH=root)
+    output = subprocess.check_output([sys.executable, "-c", IMPORT_SCRIPT], env=env, cwd=home)
+    return json.loads(output.decode("utf-8"))
+
+
+@unittest.skipIf(sys.version_info < (3, 7), "lazy imports require Python 3.7+")
+class TestImport(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.home)
+
+    def test_import_is_lazy(self):
+        result = import_package(self.home)
+
+        imported = [
+            module for module in HEAVY_MODULES
+            if module in result["modules"]
+        ]
+        self.assertEqual(imported, [])
+        # nothing is read from or written to the home directory
+        self.assertEqual(os.listdir(self.home), [])
+
+    def test_services(self):
+        import descarteslabs
+        from descarteslabs.client import services
+
+        self.assertTrue(set(services.__all__) <= set(descarteslabs.__all__))
+        for name in services.__all__:
+            self.assertIs(getattr(descarteslabs, name), getattr(services, name))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -114,6 +114,7 @@ def do_setup():
             "numpy>=1.10.0",
             "matplotlib>=2.1.0",
             "mercantile>=1.0.4",
+            'aiohttp>=3.3;python_version>="3.6"',
         ],
     }
     kwargs['license'] = 'Apache 2.0'